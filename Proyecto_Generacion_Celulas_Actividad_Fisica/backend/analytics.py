@@ -0,0 +1,205 @@
+import threading
+import pandas as pd
+
+# Columnas numéricas del dataset usadas en correlaciones y resúmenes
+NUMERIC_COLUMNS = ['duration_minutes', 'intensity', 'age', 'cells_produced',
+                   'heart_rate_avg', 'calories_burned', 'sleep_hours', 'hydration_liters']
+
+# Variables que se correlacionan con la producción de células en los insights
+CORRELATION_FEATURES = ['duration_minutes', 'intensity', 'age', 'heart_rate_avg',
+                        'calories_burned', 'sleep_hours', 'hydration_liters']
+
+
+class AnalyticsCache:
+    """
+    Capa de analítica derivada compartida por insights, resumen y gráficos.
+
+    Cada agregación (groupby, binning, correlaciones...) se calcula una sola
+    vez por versión de datos y se memoriza. `DataProcessor` incrementa su
+    versión en add_record, update_record y delete_record, lo que invalida
+    todos los resultados en la siguiente lectura.
+
+    Los DataFrames y Series devueltos se comparten entre solicitudes: no
+    deben modificarse. `activity_type` y `gender` son categóricas (ver
+    ColumnarStore), por eso los groupby usan observed=True.
+    """
+
+    def __init__(self, data_processor):
+        self.data_processor = data_processor
+        self._lock = threading.Lock()
+        self._version = None
+        self._results = {}
+
+    def invalidate(self):
+        """Descartar todos los resultados memorizados"""
+        with self._lock:
+            self._results = {}
+            self._version = None
+
+    def _memo(self, key, compute):
+        """Calcular `compute()` una sola vez por versión de datos"""
+        version = self.data_processor.version
+        with self._lock:
+            if self._version != version:
+                self._results = {}
+                self._version = version
+            if key in self._results:
+                return self._results[key]
+
+        value = compute()
+
+        with self._lock:
+            if self._version == version:
+                self._results[key] = value
+        return value
+
+    # --- Datos base ---
+
+    def dataframe(self):
+        """DataFrame con fecha como datetime y eficiencia (células por minuto)"""
+        def compute():
+            df = self.data_processor.get_dataframe()
+            if df.empty:
+                return df
+            df['date'] = pd.to_datetime(df['date'])
+            df['efficiency'] = df['cells_produced'] / df['duration_minutes']
+            return df
+        return self._memo('dataframe', compute)
+
+    # --- Agregaciones ---
+
+    def activity_stats(self):
+        """Estadísticas por tipo de actividad en una sola pasada groupby"""
+        def compute():
+            return self.dataframe().groupby('activity_type', observed=True).agg(
+                cells_mean=('cells_produced', 'mean'),
+                cells_std=('cells_produced', 'std'),
+                cells_sum=('cells_produced', 'sum'),
+                cells_max=('cells_produced', 'max'),
+                count=('cells_produced', 'count'),
+                efficiency_mean=('efficiency', 'mean'),
+                duration_mean=('duration_minutes', 'mean'),
+                intensity_mean=('intensity', 'mean'),
+                calories_mean=('calories_burned', 'mean'),
+                heart_rate_mean=('heart_rate_avg', 'mean'),
+                age_mean=('age', 'mean')
+            )
+        return self._memo('activity_stats', compute)
+
+    def overall_stats(self):
+        """Medias y máximos globales de las métricas de los radares"""
+        def compute():
+            df = self.dataframe()
+            columns = ['cells_produced', 'duration_minutes', 'intensity',
+                       'calories_burned', 'heart_rate_avg', 'efficiency']
+            return {'mean': df[columns].mean().to_dict(), 'max': df[columns].max().to_dict()}
+        return self._memo('overall_stats', compute)
+
+    def production_by_activity_gender(self):
+        """Células producidas por actividad (filas) y género (columnas)"""
+        return self._memo('production_by_activity_gender', lambda: (
+            self.dataframe().groupby(['activity_type', 'gender'], observed=True)['cells_produced'].sum().unstack(fill_value=0)
+        ))
+
+    def efficiency_by_bins(self, column, bins=5):
+        """Eficiencia media por rango (pd.cut) de una columna numérica"""
+        return self._memo(f'efficiency_bins_{column}_{bins}', lambda: (
+            self.dataframe().groupby(pd.cut(self.dataframe()[column], bins=bins))['efficiency'].mean()
+        ))
+
+    def best_range(self, column, bins=5):
+        """Rango (intervalo) de la columna con mayor eficiencia media"""
+        return self._memo(f'best_range_{column}_{bins}',
+                          lambda: self.efficiency_by_bins(column, bins).idxmax())
+
+    def gender_efficiency(self):
+        return self._memo('gender_efficiency', lambda: (
+            self.dataframe().groupby('gender', observed=True)['efficiency'].mean()
+        ))
+
+    def correlation_matrix(self):
+        return self._memo('correlation_matrix', lambda: self.dataframe()[NUMERIC_COLUMNS].corr())
+
+    def weekly_production(self):
+        """Producción semanal y acumulada (gráfico de área)"""
+        def compute():
+            df_weekly = self.dataframe().groupby(pd.Grouper(key='date', freq='W'))['cells_produced'].sum().reset_index()
+            df_weekly['cumulative'] = df_weekly['cells_produced'].cumsum()
+            return df_weekly
+        return self._memo('weekly_production', compute)
+
+    def monthly_trends(self):
+        """Promedio mensual de células por actividad (gráfico de tendencias)"""
+        def compute():
+            df = self.dataframe()
+            trends_data = df.groupby([df['date'].dt.to_period('M'), 'activity_type'], observed=True)['cells_produced'].mean().reset_index()
+            trends_data['date'] = trends_data['date'].dt.to_timestamp()
+            return trends_data
+        return self._memo('monthly_trends', compute)
+
+    # --- Respuestas completas ---
+
+    def insights(self):
+        """Contenido de /api/analytics/insights"""
+        def compute():
+            df = self.dataframe()
+            stats = self.activity_stats()
+
+            correlation_with_cells = df[CORRELATION_FEATURES].corrwith(df['cells_produced'])
+
+            most_efficient = stats['efficiency_mean'].idxmax()
+            intensity_range = self.best_range('intensity')
+            duration_range = self.best_range('duration_minutes')
+            age_range = self.best_range('age')
+
+            return {
+                'performance_analysis': {
+                    'most_efficient_activity': most_efficient,
+                    'least_efficient_activity': stats['efficiency_mean'].idxmin(),
+                    'highest_production_activity': stats['cells_mean'].idxmax(),
+                    'most_consistent_activity': stats['cells_std'].idxmin()
+                },
+                'optimal_parameters': {
+                    'best_intensity_range': {
+                        'min': intensity_range.left,
+                        'max': intensity_range.right
+                    },
+                    'best_duration_range': {
+                        'min': duration_range.left,
+                        'max': duration_range.right
+                    }
+                },
+                'demographic_insights': {
+                    'gender_efficiency': self.gender_efficiency().to_dict(),
+                    'age_optimal_range': f"{age_range.left:.0f}-{age_range.right:.0f} años"
+                },
+                'key_correlations': {k: round(float(v), 3) for k, v in correlation_with_cells.abs().sort_values(ascending=False).head(3).to_dict().items()},
+                'recommendations': [
+                    f"Priorizar {most_efficient} para máxima eficiencia",
+                    f"Mantener intensidad entre {intensity_range.left:.1f}-{intensity_range.right:.1f}",
+                    f"Optimizar duración a {duration_range.left:.0f}-{duration_range.right:.0f} minutos"
+                ]
+            }
+        return self._memo('insights', compute)
+
+    def summary(self):
+        """Contenido de /api/stats/summary"""
+        def compute():
+            df = self.dataframe()
+            stats = self.activity_stats()
+            return {
+                'total_records': len(df),
+                'total_cells_produced': int(df['cells_produced'].sum()),
+                'average_cells_per_activity': stats['cells_mean'].to_dict(),
+                'activity_distribution': stats['count'].sort_values(ascending=False).to_dict(),
+                'gender_distribution': df['gender'].value_counts().to_dict(),
+                'average_metrics': {
+                    'duration_minutes': round(df['duration_minutes'].mean(), 2),
+                    'intensity': round(df['intensity'].mean(), 3),
+                    'age': round(df['age'].mean(), 1),
+                    'heart_rate_avg': round(df['heart_rate_avg'].mean(), 1),
+                    'sleep_hours': round(df['sleep_hours'].mean(), 2),
+                    'hydration_liters': round(df['hydration_liters'].mean(), 2)
+                }
+            }
+        return self._memo('summary', compute)
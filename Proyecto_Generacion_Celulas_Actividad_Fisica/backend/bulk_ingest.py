@@ -0,0 +1,256 @@
+import io
+import csv
+import json
+import numpy as np
+import pandas as pd
+
+from data_processor import ACTIVITY_TYPES, GENDERS
+
+# Máximo de filas por carga masiva y de errores detallados en la respuesta
+MAX_BULK_ROWS = 100000
+MAX_REPORTED_ERRORS = 1000
+
+# Esquema de un registro, según generate_sample_data: campo -> rango válido
+INTEGER_FIELDS = {
+    'age': (1, 120),
+    'cells_produced': (0, None),
+    'heart_rate_avg': (30, 250),
+    'calories_burned': (0, None)
+}
+FLOAT_FIELDS = {
+    'duration_minutes': (1, 1440),
+    'intensity': (0, 1),
+    'sleep_hours': (0, 24),
+    'hydration_liters': (0, 20)
+}
+CATEGORY_FIELDS = {
+    'activity_type': ACTIVITY_TYPES,
+    'gender': GENDERS
+}
+# Orden de las columnas en los registros guardados
+FIELDS = ['date', 'activity_type', 'duration_minutes', 'intensity', 'age', 'gender',
+          'cells_produced', 'heart_rate_avg', 'calories_burned', 'sleep_hours', 'hydration_liters']
+
+FORMATS_BY_MIMETYPE = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'application/x-jsonlines': 'ndjson'
+}
+
+
+class BulkIngestError(Exception):
+    """Carga rechazada completa (formato desconocido, cuerpo ilegible o demasiadas filas)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def detect_format(mimetype, requested=None):
+    """Formato del cuerpo: el parámetro ?format= o, si falta, el Content-Type"""
+    fmt = (requested or FORMATS_BY_MIMETYPE.get(mimetype, '')).lower()
+    if fmt not in ('csv', 'json', 'ndjson'):
+        raise BulkIngestError("Formato no soportado: use CSV, un array JSON o NDJSON "
+                              "(Content-Type o parámetro ?format=csv|json|ndjson)", 415)
+    return fmt
+
+
+# --- Lectura ---
+
+def parse_payload(stream, fmt):
+    """
+    Leer el cuerpo de la solicitud como filas sin validar.
+    Devuelve (DataFrame con las columnas de FIELDS, número de fila de cada una,
+    errores de las filas que no se pudieron leer).
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+    try:
+        if fmt == 'csv':
+            rows, row_numbers, errors = _parse_csv(text)
+        elif fmt == 'ndjson':
+            rows, row_numbers, errors = _parse_ndjson(text)
+        else:
+            rows, row_numbers, errors = _parse_json_array(text)
+    except UnicodeDecodeError:
+        raise BulkIngestError("El cuerpo no está codificado en UTF-8")
+
+    frame = pd.DataFrame.from_records(rows, columns=FIELDS) if rows else pd.DataFrame(columns=FIELDS)
+    return frame, np.asarray(row_numbers, dtype=np.int64), errors
+
+
+def _check_size(count):
+    if count > MAX_BULK_ROWS:
+        raise BulkIngestError(f"Demasiadas filas: el máximo por carga es {MAX_BULK_ROWS}", 413)
+
+
+def _parse_csv(text):
+    """CSV con cabecera; las filas con un número de columnas distinto se rechazan"""
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return [], [], []
+    header = [name.strip() for name in header]
+    positions = [header.index(field) if field in header else None for field in FIELDS]
+
+    rows, row_numbers, errors = [], [], []
+    for row_number, row in enumerate(reader, start=1):
+        if not row:
+            continue
+        if len(row) != len(header):
+            errors.append(_error(row_number, None, f"Se esperaban {len(header)} columnas y hay {len(row)}"))
+            continue
+        rows.append(tuple(row[p] if p is not None else None for p in positions))
+        row_numbers.append(row_number)
+        _check_size(len(rows))
+    return rows, row_numbers, errors
+
+
+def _parse_ndjson(text):
+    """Un objeto JSON por línea, leído de forma incremental; las líneas vacías se ignoran"""
+    rows, row_numbers, errors = [], [], []
+    for row_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            errors.append(_error(row_number, None, "JSON inválido"))
+            continue
+        if not isinstance(item, dict):
+            errors.append(_error(row_number, None, "Se esperaba un objeto JSON"))
+            continue
+        rows.append(tuple(item.get(field) for field in FIELDS))
+        row_numbers.append(row_number)
+        _check_size(len(rows))
+    return rows, row_numbers, errors
+
+
+def _parse_json_array(text):
+    try:
+        items = json.load(text)
+    except ValueError:
+        raise BulkIngestError("JSON inválido: se esperaba un array de registros")
+    if not isinstance(items, list):
+        raise BulkIngestError("Se esperaba un array JSON de registros")
+    _check_size(len(items))
+
+    rows, row_numbers, errors = [], [], []
+    for row_number, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            errors.append(_error(row_number, None, "Se esperaba un objeto JSON"))
+            continue
+        rows.append(tuple(item.get(field) for field in FIELDS))
+        row_numbers.append(row_number)
+    return rows, row_numbers, errors
+
+
+# --- Validación ---
+
+def validate(frame, row_numbers):
+    """
+    Validar todas las filas columna a columna (operaciones vectorizadas).
+    Devuelve (registros válidos con tipos nativos, errores por fila y campo).
+    """
+    n = len(frame)
+    valid = np.ones(n, dtype=bool)
+    errors = []
+    columns = {}
+
+    def reject(field, mask, message):
+        positions = np.flatnonzero(mask)
+        errors.extend(_error(int(row_numbers[p]), field, message) for p in positions)
+        valid[mask] = False
+
+    for field in FIELDS:
+        raw = frame[field]
+        missing = raw.isna().to_numpy() | raw.astype(str).str.strip().eq('').to_numpy()
+        # Las comprobaciones de un campo son excluyentes: un error por campo y fila
+        reject(field, missing, "Campo requerido")
+        present = ~missing
+
+        if field == 'date':
+            # Solo cuenta el día: se descarta la hora de las marcas ISO 8601 de los dispositivos
+            days = raw.where(present).astype(str).str.slice(0, 10)
+            dates = pd.to_datetime(days, format='%Y-%m-%d', errors='coerce')
+            reject(field, present & dates.isna().to_numpy(), "Fecha inválida (se espera AAAA-MM-DD)")
+            columns[field] = dates.dt.strftime('%Y-%m-%d')
+        elif field in CATEGORY_FIELDS:
+            values = raw.astype(str).str.strip()
+            allowed = CATEGORY_FIELDS[field]
+            reject(field, present & ~values.isin(allowed).to_numpy(),
+                   f"Valor no permitido (opciones: {', '.join(allowed)})")
+            columns[field] = values
+        else:
+            is_integer = field in INTEGER_FIELDS
+            low, high = INTEGER_FIELDS[field] if is_integer else FLOAT_FIELDS[field]
+            numbers = pd.to_numeric(raw.where(present), errors='coerce').astype(float).to_numpy()
+            with np.errstate(invalid='ignore'):
+                # true/false de JSON no son números (to_numeric los convertiría en 1/0)
+                not_number = present & (~np.isfinite(numbers) | _booleans(raw))
+                reject(field, not_number, "Se esperaba un número")
+                not_integer = present & ~not_number & (numbers != np.floor(numbers)) if is_integer else np.zeros(n, dtype=bool)
+                reject(field, not_integer, "Se esperaba un entero")
+                out_of_range = np.zeros(n, dtype=bool)
+                if low is not None:
+                    out_of_range |= numbers < low
+                if high is not None:
+                    out_of_range |= numbers > high
+            reject(field, present & ~not_number & ~not_integer & out_of_range,
+                   f"Fuera de rango ({low} a {high if high is not None else '∞'})")
+            columns[field] = numbers
+
+    positions = np.flatnonzero(valid)
+    values = []
+    for field in FIELDS:
+        column = columns[field]
+        if isinstance(column, pd.Series):
+            values.append(column.to_numpy()[positions].tolist())
+        elif field in INTEGER_FIELDS:
+            values.append(column[positions].astype(np.int64).tolist())
+        else:
+            values.append(column[positions].tolist())
+    records = [dict(zip(FIELDS, row)) for row in zip(*values)]
+    return records, errors
+
+
+def _booleans(raw):
+    """Máscara de los valores booleanos de una columna leída de JSON"""
+    if raw.dtype == bool:
+        return np.ones(len(raw), dtype=bool)
+    if raw.dtype != object:
+        return np.zeros(len(raw), dtype=bool)
+    return raw.map(lambda value: isinstance(value, (bool, np.bool_))).to_numpy(dtype=bool)
+
+
+def _error(row, field, message):
+    error = {'row': row, 'error': message}
+    if field is not None:
+        error['field'] = field
+    return error
+
+
+def ingest(data_processor, stream, fmt):
+    """
+    Leer, validar y guardar una carga masiva. Las filas inválidas se reportan
+    y se omiten; las válidas se guardan juntas con una sola escritura duradera.
+    """
+    frame, row_numbers, errors = parse_payload(stream, fmt)
+    records, validation_errors = validate(frame, row_numbers)
+    errors = sorted(errors + validation_errors, key=lambda e: e['row'])
+
+    saved = data_processor.add_records(records)
+    rejected_rows = len({e['row'] for e in errors})
+    return {
+        'success': bool(saved) or not errors,
+        'received': len(frame) + len({e['row'] for e in errors if 'field' not in e}),
+        'inserted': len(saved),
+        'rejected': rejected_rows,
+        'first_id': saved[0]['id'] if saved else None,
+        'last_id': saved[-1]['id'] if saved else None,
+        'errors': errors[:MAX_REPORTED_ERRORS],
+        'errors_truncated': len(errors) > MAX_REPORTED_ERRORS
+    }
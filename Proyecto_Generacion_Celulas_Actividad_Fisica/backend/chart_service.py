@@ -0,0 +1,272 @@
+import os
+import glob
+import time
+import atexit
+import signal
+import hashlib
+import threading
+import multiprocessing
+from functools import partial
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import Response, request
+
+from analytics import AnalyticsCache
+from shared_state import read_snapshot, snapshot_directory, write_snapshot
+from startup import STARTUP
+
+# `charts` (matplotlib, seaborn y plotly) se importa al renderizar el primer
+# gráfico: la API arranca sin el stack de gráficos y los procesos del pool lo
+# importan nada más crearse (_init_worker)
+
+
+def import_charts():
+    import charts
+    return charts
+
+
+def _init_worker():
+    """Inicio de un proceso del pool: señales por defecto (no las del proceso web) y stack de gráficos"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import_charts()
+
+
+class FrameSource:
+    """Fuente de datos mínima (versión + DataFrame) para un AnalyticsCache en otro proceso"""
+
+    def __init__(self, version, frame):
+        self.version = version
+        self._frame = frame
+
+    def get_dataframe(self):
+        return self._frame.copy(deep=False)
+
+
+# Analítica del proceso del pool sobre la última instantánea leída: (ruta, AnalyticsCache)
+_worker_analytics = None
+
+
+def render_charts(version, path, keys):
+    """
+    Renderizar varios gráficos sobre la instantánea guardada en `path`
+    (se ejecuta en el pool de procesos). La instantánea se mapea una sola vez
+    por proceso y su analítica se reutiliza entre gráficos.
+    """
+    global _worker_analytics
+    if _worker_analytics is None or _worker_analytics[0] != path:
+        _worker_analytics = (path, AnalyticsCache(FrameSource(version, read_snapshot(path))))
+    return {key: _render(_worker_analytics[1], key) for key in keys}
+
+
+def _render(analytics, key):
+    """(código de estado, contenido JSON) de un gráfico"""
+    charts = import_charts()
+    try:
+        return 200, charts.render(analytics, *key)
+    except charts.ChartNotFound as e:
+        return 404, {'error': str(e)}
+    except Exception as e:
+        return 500, {'error': str(e)}
+
+
+class ChartService:
+    """
+    Renderizado de los gráficos de /api/charts con caché y precálculo.
+
+    Tras cada escritura en `DataProcessor` (y al arrancar) se renderizan todos
+    los gráficos de la nueva versión de datos en un pool de procesos, un trabajo
+    por gráfico sobre una misma instantánea del DataFrame; los trabajos de
+    versiones anteriores que aún no empezaron se cancelan. La instantánea se
+    escribe una sola vez en un archivo (formato de `write_snapshot`) y los
+    procesos la mapean; a cada trabajo solo se le envía la ruta. Las ráfagas
+    de escrituras se agrupan en un solo precálculo (`debounce` segundos).
+
+    Las respuestas se guardan ya serializadas, con su ETag (hash del contenido),
+    en una caché LRU de `max_entries` entradas por (versión, gráfico). Una
+    solicitud con If-None-Match igual al ETag recibe 304 sin cuerpo. Si el
+    gráfico de la versión actual todavía se está renderizando se espera a ese
+    resultado; si no está programado (p. ej. sin pool) se renderiza en el
+    propio proceso.
+
+    El pool usa fork: los procesos se crean en `start()`, antes de que el
+    servidor abra hilos, con pandas ya importado; cada proceso importa el
+    stack de gráficos al crearse. En sistemas sin fork, o con workers=0, todo
+    se renderiza en el proceso de la API.
+
+    En modo prefork (`follow`) los gráficos renderizados se comparten entre
+    procesos web: solo uno precalcula y los demás leen sus resultados.
+    """
+
+    def __init__(self, analytics, serialize, workers=0, max_entries=48, debounce=0.5, wait_timeout=120):
+        self.analytics = analytics
+        self.data_processor = analytics.data_processor
+        self.serialize = serialize
+        self.max_entries = max_entries
+        self.debounce = debounce
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        # pyplot no es seguro entre hilos: un solo renderizado en proceso a la vez
+        self._render_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._dirty = threading.Event()
+        self._started = False
+        self._shared = None
+
+        # El pool (y sus colas) se crea en start(): en modo prefork, cada proceso web tiene el suyo
+        self._executor = None
+        self.workers = workers if 'fork' in multiprocessing.get_all_start_methods() else 0
+
+    def follow(self, shared):
+        """Compartir los gráficos renderizados con los demás procesos web (SharedState)"""
+        self._shared = shared
+
+    def start(self):
+        """Crear los procesos y empezar a precalcular tras cada escritura"""
+        if self.workers <= 0 or self._started:
+            return
+        self._started = True
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('fork'),
+                                             initializer=_init_worker)
+        with STARTUP.phase('pool de gráficos (fork)'):
+            # Con fork, el primer envío crea todos los procesos del pool (sin esperar
+            # a que importen el stack de gráficos)
+            self._executor.submit(int)
+        atexit.register(self._executor.shutdown, wait=False, cancel_futures=True)
+        atexit.register(self._remove_snapshots)
+
+        self.data_processor.subscribe(lambda version: self._dirty.set())
+        threading.Thread(target=self._precompute_loop, name='chart-precompute', daemon=True).start()
+        print(f"🖼️ Precálculo de gráficos activo con {self.workers} procesos")
+
+    # --- Precálculo ---
+
+    def _precompute_loop(self):
+        # Primer precálculo sin esperar: importa `charts` fuera del hilo principal
+        try:
+            self.precompute()
+        except Exception as e:
+            print(f"❌ Error precalculando gráficos: {e}")
+        while True:
+            self._dirty.wait()
+            # Agrupar las ráfagas de escrituras en un solo precálculo
+            time.sleep(self.debounce)
+            self._dirty.clear()
+            try:
+                self.precompute()
+            except Exception as e:
+                print(f"❌ Error precalculando gráficos: {e}")
+
+    def precompute(self):
+        """Enviar al pool todos los gráficos de la versión actual que falten"""
+        charts = import_charts()
+        version, frame = self.data_processor.snapshot()
+        activities = sorted(frame['activity_type'].dropna().unique()) if 'activity_type' in frame else []
+        with self._lock:
+            keys = [key for key in charts.chart_keys(activities)
+                    if (version, key) not in self._cache and (version, key) not in self._pending]
+            stale = [future for (pending_version, _), future in self._pending.items() if pending_version != version]
+        # Los gráficos de versiones anteriores que aún no empezaron ya no se sirven
+        for future in stale:
+            future.cancel()
+        if not keys:
+            return
+
+        # La instantánea se envía una vez como archivo; se borra al terminar el último gráfico
+        path = f"{self._snapshot_prefix()}{version}-{time.monotonic_ns()}.bin"
+        write_snapshot(path, frame)
+        remaining = [len(keys)]
+
+        # Un trabajo por gráfico: los procesos libres toman el siguiente
+        for key in keys:
+            future = self._executor.submit(render_charts, version, path, [key])
+            with self._lock:
+                self._pending[(version, key)] = future
+            future.add_done_callback(partial(self._store_result, version, key, path, remaining))
+
+    def _store_result(self, version, key, path, remaining, future):
+        try:
+            if not future.cancelled():
+                status, payload = future.result()[key]
+                self._store(version, key, status, payload)
+        except Exception as e:
+            print(f"❌ Error en el pool de gráficos ({key[0]}): {e}")
+        with self._lock:
+            self._pending.pop((version, key), None)
+            remaining[0] -= 1
+            done = remaining[0] == 0
+        if done:
+            # Los procesos que la mapearon conservan sus páginas hasta leer otra
+            self._remove(path)
+
+    @staticmethod
+    def _snapshot_prefix():
+        return os.path.join(snapshot_directory(), f"cells-charts-{os.getpid()}-")
+
+    def _remove_snapshots(self):
+        """Borrar las instantáneas de precálculo que queden al cerrar el proceso"""
+        for path in glob.glob(f"{self._snapshot_prefix()}*"):
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    # --- Caché ---
+
+    def _store(self, version, key, status, payload):
+        body = payload if isinstance(payload, bytes) else self.serialize(payload).encode('utf-8')
+        entry = (status, body, hashlib.sha1(body).hexdigest())
+        # Los errores no se guardan: se vuelven a intentar en la siguiente solicitud
+        if status == 200:
+            if self._shared is not None and not isinstance(payload, bytes):
+                self._shared.put_chart(version, key, body)
+            with self._lock:
+                self._cache[(version, key)] = entry
+                self._cache.move_to_end((version, key))
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return entry
+
+    def _get(self, key):
+        version = self.data_processor.version
+        with self._lock:
+            entry = self._cache.get((version, key))
+            if entry is not None:
+                self._cache.move_to_end((version, key))
+                return entry
+            future = self._pending.get((version, key))
+
+        if future is None and self._shared is not None:
+            # Renderizado por otro proceso web
+            body = self._shared.get_chart(version, key)
+            if body is not None:
+                return self._store(version, key, 200, body)
+
+        if future is not None:
+            try:
+                status, payload = future.result(timeout=self.wait_timeout)[key]
+                return self._store(version, key, status, payload)
+            except Exception as e:
+                print(f"⚠️ Precálculo de {key[0]} no disponible, se renderiza en proceso: {e}")
+
+        with self._render_lock:
+            version = self.data_processor.version
+            status, payload = _render(self.analytics, key)
+        return self._store(version, key, status, payload)
+
+    def response(self, name, *args):
+        """Respuesta HTTP del gráfico para la versión actual de los datos, con ETag"""
+        status, body, etag = self._get((name, *args))
+        response = Response(body, status=status, mimetype='application/json')
+        if status == 200:
+            response.set_etag(etag)
+            # El navegador revalida siempre: si no cambió, 304 sin cuerpo
+            response.headers['Cache-Control'] = 'no-cache'
+            response = response.make_conditional(request)
+        return response
@@ -0,0 +1,960 @@
+import io
+import base64
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import seaborn as sns
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+
+# Paleta de colores profesional
+COLOR_PALETTE = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD', '#98D8C8', '#F7DC6F']
+
+
+class ChartNotFound(LookupError):
+    """El gráfico pedido no existe para los datos actuales (p. ej. una actividad sin registros)"""
+
+
+def area_chart(analytics):
+    """Gráfico de área - Producción acumulada mejorado"""
+    # Agrupar por semana para mejor visualización
+    df_weekly = analytics.weekly_production()
+    
+    plt.figure(figsize=(16, 8))
+    
+    # Gráfico de área principal
+    plt.fill_between(df_weekly['date'], df_weekly['cumulative'], 
+                    alpha=0.6, color=COLOR_PALETTE[1], label='Producción Acumulada')
+    
+    # Línea de tendencia
+    plt.plot(df_weekly['date'], df_weekly['cumulative'], 
+            color=COLOR_PALETTE[1], linewidth=3, alpha=0.9)
+    
+    # Puntos de datos importantes
+    max_point = df_weekly.loc[df_weekly['cumulative'].idxmax()]
+    plt.scatter(max_point['date'], max_point['cumulative'], 
+               color=COLOR_PALETTE[0], s=100, zorder=5, 
+               label=f'Máximo: {max_point["cumulative"]:,.0f} células')
+    
+    plt.title('Evolución de la Producción Acumulada de Células', 
+             fontsize=20, fontweight='bold', pad=30, color='white')
+    plt.xlabel('Fecha', fontsize=14, color='white', labelpad=15)
+    plt.ylabel('Células Producidas (Acumuladas)', fontsize=14, color='white', labelpad=15)
+    
+    # Configurar tema oscuro
+    plt.gca().set_facecolor('#1a1a1a')
+    plt.gcf().set_facecolor('#1a1a1a')
+    plt.grid(True, alpha=0.2, color='white')
+    plt.xticks(rotation=45, color='white', fontsize=11)
+    plt.yticks(color='white', fontsize=11)
+    
+    # Formatear eje Y en millones
+    plt.gca().yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x/1000000:.1f}M'))
+    
+    # Leyenda mejorada
+    legend = plt.legend(fontsize=12, framealpha=0.9, loc='upper left')
+    legend.get_frame().set_facecolor('#2a2a2a')
+    legend.get_frame().set_edgecolor('white')
+    for text in legend.get_texts():
+        text.set_color('white')
+    
+    # Estadísticas en el gráfico
+    total_cells = df_weekly['cumulative'].iloc[-1]
+    avg_weekly = df_weekly['cells_produced'].mean()
+    
+    plt.annotate(f'Total: {total_cells/1000000:.1f}M células\n'
+                f'Promedio semanal: {avg_weekly/1000000:.1f}M',
+                xy=(0.02, 0.98), xycoords='axes fraction',
+                fontsize=11, color='white', ha='left', va='top',
+                bbox=dict(boxstyle='round', facecolor='#2a2a2a', alpha=0.8))
+    
+    plt.tight_layout()
+    
+    # Convertir a base64
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
+               facecolor='#1a1a1a', edgecolor='none')
+    buffer.seek(0)
+    image_base64 = base64.b64encode(buffer.getvalue()).decode()
+    plt.close()
+    
+    return {'image': f'data:image/png;base64,{image_base64}'}
+
+def radar_chart(analytics):
+    """Gráfico radar - Comparación por actividad mejorado"""
+    # Métricas por tipo de actividad
+    activity_metrics = analytics.activity_stats()[
+        ['cells_mean', 'duration_mean', 'intensity_mean', 'calories_mean', 'heart_rate_mean', 'age_mean']
+    ].rename(columns={
+        'cells_mean': 'cells_produced',
+        'duration_mean': 'duration_minutes',
+        'intensity_mean': 'intensity',
+        'calories_mean': 'calories_burned',
+        'heart_rate_mean': 'heart_rate_avg',
+        'age_mean': 'age'
+    }).reset_index()
+    
+    # Calcular eficiencia (células por minuto)
+    activity_metrics['efficiency'] = activity_metrics['cells_produced'] / activity_metrics['duration_minutes']
+    
+    # Normalizar métricas para el radar (0-1)
+    metrics_normalized = activity_metrics.copy()
+    metrics_to_normalize = ['cells_produced', 'duration_minutes', 'intensity', 
+                           'calories_burned', 'heart_rate_avg', 'efficiency']
+    
+    for col in metrics_to_normalize:
+        min_val = activity_metrics[col].min()
+        max_val = activity_metrics[col].max()
+        if max_val > min_val:
+            metrics_normalized[col] = (activity_metrics[col] - min_val) / (max_val - min_val)
+        else:
+            metrics_normalized[col] = 0.5
+    
+    # Crear gráfico radar interactivo con Plotly
+    categories = ['Producción Celular', 'Duración', 'Intensidad', 
+                 'Calorías', 'Ritmo Cardíaco', 'Eficiencia']
+    
+    fig = go.Figure()
+    
+    for i, activity in enumerate(activity_metrics['activity_type']):
+        metrics = metrics_normalized[metrics_normalized['activity_type'] == activity].iloc[0]
+        
+        fig.add_trace(go.Scatterpolar(
+            r=[
+                metrics['cells_produced'],
+                metrics['duration_minutes'], 
+                metrics['intensity'],
+                metrics['calories_burned'],
+                metrics['heart_rate_avg'],
+                metrics['efficiency']
+            ],
+            theta=categories,
+            fill='toself',
+            name=activity,
+            line=dict(color=COLOR_PALETTE[i % len(COLOR_PALETTE)], width=2.5),
+            opacity=0.8,
+            hovertemplate=(
+                f"<b>{activity}</b><br>" +
+                "Producción: %{r[0]:.2f}<br>" +
+                "Duración: %{r[1]:.2f}<br>" +
+                "Intensidad: %{r[2]:.2f}<br>" +
+                "Calorías: %{r[3]:.2f}<br>" +
+                "Ritmo Cardíaco: %{r[4]:.2f}<br>" +
+                "Eficiencia: %{r[5]:.2f}<extra></extra>"
+            )
+        ))
+    
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True, 
+                range=[0, 1],
+                tickfont=dict(color='white', size=10),
+                gridcolor='rgba(255,255,255,0.3)',
+                linecolor='rgba(255,255,255,0.5)'
+            ),
+            angularaxis=dict(
+                tickfont=dict(color='white', size=11),
+                gridcolor='rgba(255,255,255,0.3)',
+                linecolor='rgba(255,255,255,0.5)',
+                rotation=90
+            ),
+            bgcolor='rgba(0,0,0,0)'
+        ),
+        showlegend=True,
+        title=dict(
+            text='Análisis Comparativo Multidimensional por Actividad',
+            font=dict(size=22, color='white', family='Arial', weight='bold'),
+            x=0.5,
+            y=0.95
+        ),
+        font=dict(size=12, color='white'),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        legend=dict(
+            font=dict(color='white', size=11),
+            bgcolor='rgba(0,0,0,0.7)',
+            bordercolor='rgba(255,255,255,0.3)',
+            borderwidth=1,
+            orientation='v',
+            yanchor='top',
+            y=0.99,
+            xanchor='left',
+            x=1.05
+        ),
+        height=700,
+        margin=dict(l=80, r=200, t=100, b=80)
+    )
+    
+    # Agregar anotaciones con valores reales
+    annotations = []
+    for i, activity in enumerate(activity_metrics['activity_type']):
+        original_metrics = activity_metrics[activity_metrics['activity_type'] == activity].iloc[0]
+        annotations.append(dict(
+            x=1.15,
+            y=0.9 - (i * 0.12),
+            xref='paper',
+            yref='paper',
+            text=f"<b>{activity}</b><br>" +
+                 f"Células: {original_metrics['cells_produced']:,.0f}<br>" +
+                 f"Eficiencia: {original_metrics['efficiency']:,.0f}/min",
+            showarrow=False,
+            font=dict(color=COLOR_PALETTE[i % len(COLOR_PALETTE)], size=10),
+            bgcolor='rgba(0,0,0,0.7)',
+            bordercolor='rgba(255,255,255,0.3)',
+            borderwidth=1,
+            borderpad=4
+        ))
+    
+    fig.update_layout(annotations=annotations)
+    
+    return fig.to_dict()
+
+def radar_individual_chart(analytics, activity):
+    """Gráfico radar individual para cada actividad - MEJORADO"""
+    stats = analytics.activity_stats()
+    
+    # Filtrar por actividad específica
+    if activity not in stats.index:
+        raise ChartNotFound('Actividad no encontrada')
+    activity_stats = stats.loc[activity]
+    
+    # Calcular métricas para esta actividad
+    metrics = {
+        'cells_produced': activity_stats['cells_mean'],
+        'duration_minutes': activity_stats['duration_mean'],
+        'intensity': activity_stats['intensity_mean'],
+        'calories_burned': activity_stats['calories_mean'],
+        'heart_rate_avg': activity_stats['heart_rate_mean'],
+        'efficiency': activity_stats['efficiency_mean']
+    }
+    
+    # Obtener promedios generales para comparación
+    overall = analytics.overall_stats()
+    overall_metrics = overall['mean']
+    
+    # Normalizar para radar (0-1)
+    categories = ['Producción Celular', 'Duración', 'Intensidad', 'Calorías', 'Ritmo Cardíaco', 'Eficiencia']
+    max_vals = {key: max(overall['max'][key], metrics[key]) for key in metrics}
+    max_vals['intensity'] = 1.0
+    
+    activity_normalized = [metrics[key] / max_vals[key] for key in ['cells_produced', 'duration_minutes', 'intensity', 'calories_burned', 'heart_rate_avg', 'efficiency']]
+    overall_normalized = [overall_metrics[key] / max_vals[key] for key in ['cells_produced', 'duration_minutes', 'intensity', 'calories_burned', 'heart_rate_avg', 'efficiency']]
+    
+    # Crear gráfico radar individual MEJORADO
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatterpolar(
+        r=activity_normalized,
+        theta=categories,
+        fill='toself',
+        name=activity,
+        line=dict(color=COLOR_PALETTE[0], width=3),
+        opacity=0.8,
+        fillcolor='rgba(255, 107, 107, 0.4)'
+    ))
+    
+    fig.add_trace(go.Scatterpolar(
+        r=overall_normalized,
+        theta=categories,
+        fill='toself',
+        name='Promedio General',
+        line=dict(color=COLOR_PALETTE[1], width=2),
+        opacity=0.6,
+        fillcolor='rgba(78, 205, 196, 0.3)'
+    ))
+    
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True, 
+                range=[0, 1],
+                tickfont=dict(color='white', size=12),
+                gridcolor='rgba(255,255,255,0.3)',
+                linecolor='rgba(255,255,255,0.5)',
+                tickvals=[0, 0.2, 0.4, 0.6, 0.8, 1.0],
+                ticktext=['0', '0.2', '0.4', '0.6', '0.8', '1.0']
+            ),
+            angularaxis=dict(
+                tickfont=dict(color='white', size=13),
+                gridcolor='rgba(255,255,255,0.3)',
+                linecolor='rgba(255,255,255,0.5)',
+                rotation=90
+            ),
+            bgcolor='rgba(0,0,0,0)'
+        ),
+        showlegend=True,
+        title=dict(
+            text=f'Análisis Detallado: {activity}',
+            font=dict(size=24, color='white', family='Arial', weight='bold'),
+            x=0.5,
+            y=0.95
+        ),
+        font=dict(size=13, color='white'),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        legend=dict(
+            font=dict(color='white', size=12),
+            bgcolor='rgba(0,0,0,0.8)',
+            bordercolor='rgba(255,255,255,0.3)',
+            borderwidth=1,
+            orientation='v',
+            yanchor='top',
+            y=0.98,
+            xanchor='left',
+            x=1.05
+        ),
+        height=800,  # Aumentado de 600 a 800
+        width=1000,   # Ancho aumentado
+        margin=dict(l=100, r=200, t=120, b=100)  # Márgenes ajustados
+    )
+    
+    # Agregar anotaciones con valores reales MEJORADAS
+    annotations = []
+    for i, (key, value) in enumerate(metrics.items()):
+        annotations.append(dict(
+            x=1.15,
+            y=0.9 - (i * 0.12),
+            xref='paper',
+            yref='paper',
+            text=f"<b>{categories[i]}</b><br>" +
+                 f"{activity}: {format_metric_value(key, value)}<br>" +
+                 f"Promedio: {format_metric_value(key, overall_metrics[key])}",
+            showarrow=False,
+            font=dict(color='white', size=11),
+            bgcolor='rgba(0,0,0,0.8)',
+            bordercolor='rgba(255,255,255,0.3)',
+            borderwidth=1,
+            borderpad=8
+        ))
+    
+    fig.update_layout(annotations=annotations)
+    
+    return fig.to_dict()
+
+def format_metric_value(key, value):
+    """Formatear valores de métricas para mejor visualización"""
+    if key == 'cells_produced':
+        return f"{value/1000:.0f}K"
+    elif key == 'duration_minutes':
+        return f"{value:.0f} min"
+    elif key == 'intensity':
+        return f"{value:.2f}"
+    elif key == 'calories_burned':
+        return f"{value:.0f}"
+    elif key == 'heart_rate_avg':
+        return f"{value:.0f} BPM"
+    elif key == 'efficiency':
+        return f"{value:.0f}/min"
+    else:
+        return f"{value:.2f}"
+
+def stacked_bar_chart(analytics):
+    """Gráfico de barras apiladas - Producción por actividad y género"""
+    production_by_activity_gender = analytics.production_by_activity_gender()
+    
+    plt.figure(figsize=(14, 9))
+    ax = production_by_activity_gender.plot(
+        kind='bar', 
+        stacked=True, 
+        color=[COLOR_PALETTE[0], COLOR_PALETTE[1]], 
+        figsize=(14, 9),
+        width=0.8,
+        edgecolor='white',
+        linewidth=0.5
+    )
+    
+    plt.title('Producción de Células por Actividad y Género', 
+             fontsize=20, fontweight='bold', pad=25, color='white')
+    plt.xlabel('Tipo de Actividad', fontsize=14, color='white', labelpad=15)
+    plt.ylabel('Células Producidas', fontsize=14, color='white', labelpad=15)
+    plt.xticks(rotation=45, ha='right', color='white', fontsize=11)
+    plt.yticks(color='white', fontsize=11)
+    
+    # Configurar tema oscuro
+    plt.gca().set_facecolor('#1a1a1a')
+    plt.gcf().set_facecolor('#1a1a1a')
+    ax.grid(axis='y', alpha=0.2, color='white')
+    
+    # Formatear eje Y en millones
+    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x/1000000:.1f}M'))
+    
+    # Configurar leyenda
+    legend = plt.legend(title='Género', title_fontsize=12, fontsize=11, 
+                       framealpha=0.9, loc='upper right')
+    legend.get_title().set_color('white')
+    for text in legend.get_texts():
+        text.set_color('white')
+    legend.get_frame().set_facecolor('#2a2a2a')
+    legend.get_frame().set_edgecolor('white')
+    
+    # Agregar valores en las barras
+    for container in ax.containers:
+        ax.bar_label(container, label_type='center', fmt='%.1fM', 
+                    color='white', fontsize=9, fontweight='bold',
+                    padding=3)
+    
+    # Configurar bordes
+    for spine in ax.spines.values():
+        spine.set_color('white')
+        spine.set_alpha(0.5)
+    
+    plt.tight_layout()
+    
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
+               facecolor='#1a1a1a', edgecolor='none')
+    buffer.seek(0)
+    image_base64 = base64.b64encode(buffer.getvalue()).decode()
+    plt.close()
+    
+    return {'image': f'data:image/png;base64,{image_base64}'}
+
+def stacked_bar_percentage_chart(analytics):
+    """Gráfico de barras apiladas con porcentajes"""
+    production_by_activity_gender = analytics.production_by_activity_gender()
+    
+    # Calcular porcentajes
+    total_by_activity = production_by_activity_gender.sum(axis=1)
+    percentage_data = production_by_activity_gender.div(total_by_activity, axis=0) * 100
+    
+    plt.figure(figsize=(14, 9))
+    ax = percentage_data.plot(
+        kind='bar', 
+        stacked=True, 
+        color=[COLOR_PALETTE[0], COLOR_PALETTE[1]], 
+        figsize=(14, 9),
+        width=0.8,
+        edgecolor='white',
+        linewidth=0.5
+    )
+    
+    plt.title('Distribución Porcentual de Producción por Actividad y Género', 
+             fontsize=20, fontweight='bold', pad=25, color='white')
+    plt.xlabel('Tipo de Actividad', fontsize=14, color='white', labelpad=15)
+    plt.ylabel('Porcentaje de Producción (%)', fontsize=14, color='white', labelpad=15)
+    plt.xticks(rotation=45, ha='right', color='white', fontsize=11)
+    plt.yticks(color='white', fontsize=11)
+    
+    # Configurar tema oscuro
+    plt.gca().set_facecolor('#1a1a1a')
+    plt.gcf().set_facecolor('#1a1a1a')
+    ax.grid(axis='y', alpha=0.2, color='white')
+    
+    # Agregar porcentajes en las barras
+    for container in ax.containers:
+        ax.bar_label(container, label_type='center', fmt='%.1f%%', 
+                    color='white', fontsize=10, fontweight='bold',
+                    padding=3)
+    
+    # Configurar leyenda
+    legend = plt.legend(title='Género', title_fontsize=12, fontsize=11, 
+                       framealpha=0.9, loc='upper right')
+    legend.get_title().set_color('white')
+    for text in legend.get_texts():
+        text.set_color('white')
+    legend.get_frame().set_facecolor('#2a2a2a')
+    legend.get_frame().set_edgecolor('white')
+    
+    # Configurar bordes
+    for spine in ax.spines.values():
+        spine.set_color('white')
+        spine.set_alpha(0.5)
+    
+    plt.tight_layout()
+    
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
+               facecolor='#1a1a1a', edgecolor='none')
+    buffer.seek(0)
+    image_base64 = base64.b64encode(buffer.getvalue()).decode()
+    plt.close()
+    
+    # Preparar datos para la leyenda
+    legend_data = []
+    for activity in production_by_activity_gender.index:
+        male_cells = production_by_activity_gender.loc[activity, 'Male'] if 'Male' in production_by_activity_gender.columns else 0
+        female_cells = production_by_activity_gender.loc[activity, 'Female'] if 'Female' in production_by_activity_gender.columns else 0
+        total_cells = male_cells + female_cells
+        legend_data.append({
+            'activity': activity,
+            'male_cells': f"{male_cells/1000000:.1f}M",
+            'female_cells': f"{female_cells/1000000:.1f}M", 
+            'total_cells': f"{total_cells/1000000:.1f}M",
+            'male_percentage': f"{(male_cells/total_cells*100):.1f}%" if total_cells > 0 else "0%",
+            'female_percentage': f"{(female_cells/total_cells*100):.1f}%" if total_cells > 0 else "0%"
+        })
+    
+    return {
+        'image': f'data:image/png;base64,{image_base64}',
+        'legend_data': legend_data
+    }
+
+def pie_chart(analytics):
+    """Gráfico de pastel - Distribución por actividad"""
+    activity_distribution = analytics.activity_stats()['cells_sum']
+    
+    # Calcular porcentajes
+    total = activity_distribution.sum()
+    percentages = (activity_distribution / total * 100).round(1)
+    
+    plt.figure(figsize=(14, 10))
+    wedges, texts, autotexts = plt.pie(
+        activity_distribution.values, 
+        labels=activity_distribution.index,
+        colors=COLOR_PALETTE,
+        autopct=lambda p: f'{p:.1f}%' if p > 3 else '',
+        startangle=90,
+        textprops={'fontsize': 12, 'color': 'white', 'fontweight': 'bold'},
+        wedgeprops={'edgecolor': 'white', 'linewidth': 2, 'alpha': 0.9},
+        explode=[0.05 if i == activity_distribution.argmax() else 0 for i in range(len(activity_distribution))]
+    )
+    
+    plt.title('Distribución de Producción Celular por Tipo de Actividad', 
+             fontsize=20, fontweight='bold', pad=30, color='white')
+    
+    # Mejorar estética de los porcentajes
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+        autotext.set_fontsize(11)
+        autotext.set_bbox(dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', 
+                             edgecolor='white', alpha=0.8))
+    
+    # Leyenda mejorada con valores absolutos
+    legend_labels = [f'{label}\n({value/1000000:.1f}M células, {percentages[label]:.1f}%)' 
+                    for label, value in activity_distribution.items()]
+    legend = plt.legend(wedges, legend_labels, title="Actividades", 
+                       loc="center left", bbox_to_anchor=(1, 0, 0.5, 1),
+                       fontsize=11, framealpha=0.9)
+    legend.get_title().set_color('white')
+    legend.get_title().set_fontweight('bold')
+    for text in legend.get_texts():
+        text.set_color('white')
+    legend.get_frame().set_facecolor('#2a2a2a')
+    legend.get_frame().set_edgecolor('white')
+    
+    # Configurar fondo oscuro
+    plt.gcf().set_facecolor('#1a1a1a')
+    
+    plt.tight_layout()
+    
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
+               facecolor='#1a1a1a', edgecolor='none')
+    buffer.seek(0)
+    image_base64 = base64.b64encode(buffer.getvalue()).decode()
+    plt.close()
+    
+    return {'image': f'data:image/png;base64,{image_base64}'}
+
+def correlation_heatmap(analytics):
+    """Mapa de calor de correlaciones"""
+    correlation_matrix = analytics.correlation_matrix()
+    
+    plt.figure(figsize=(14, 10))
+    sns.heatmap(
+        correlation_matrix, 
+        annot=True, 
+        cmap='RdBu_r', 
+        center=0,
+        square=True, 
+        linewidths=1, 
+        cbar_kws={"shrink": .8, "label": "Coeficiente de Correlación"},
+        annot_kws={"size": 11, "color": "black", "weight": "bold"},
+        fmt='.2f',
+        vmin=-1, vmax=1
+    )
+    
+    plt.title('Mapa de Calor - Correlación entre Variables del Dataset', 
+             fontsize=18, fontweight='bold', pad=25, color='white')
+    plt.xticks(rotation=45, ha='right', color='white', fontsize=11)
+    plt.yticks(rotation=0, color='white', fontsize=11)
+    
+    # Configurar colorbar
+    cbar = plt.gcf().axes[-1]
+    cbar.tick_params(colors='white')
+    cbar.yaxis.label.set_color('white')
+    cbar.yaxis.label.set_fontsize(12)
+    
+    # Configurar fondo oscuro
+    plt.gca().set_facecolor('#1a1a1a')
+    plt.gcf().set_facecolor('#1a1a1a')
+    
+    plt.tight_layout()
+    
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
+               facecolor='#1a1a1a', edgecolor='none')
+    buffer.seek(0)
+    image_base64 = base64.b64encode(buffer.getvalue()).decode()
+    plt.close()
+    
+    return {'image': f'data:image/png;base64,{image_base64}'}
+
+def trends_chart(analytics):
+    """Gráfico de tendencias y proyecciones"""
+    # Tendencias por actividad (mensual)
+    trends_data = analytics.monthly_trends()
+    
+    # Proyección (simulada basada en tendencias)
+    last_date = trends_data['date'].max()
+    future_dates = [last_date + pd.DateOffset(months=i) for i in range(1, 7)]
+    
+    plt.figure(figsize=(16, 10))
+    
+    # Gráfico de tendencias
+    for i, activity in enumerate(trends_data['activity_type'].unique()):
+        activity_data = trends_data[trends_data['activity_type'] == activity]
+        
+        # Línea de tendencia histórica
+        plt.plot(activity_data['date'], activity_data['cells_produced'], 
+                marker='o', linewidth=3, markersize=6, label=activity, 
+                color=COLOR_PALETTE[i], alpha=0.9)
+        
+        # Proyección (línea punteada)
+        last_value = activity_data['cells_produced'].iloc[-1]
+        growth_rate = 0.15  # 15% de crecimiento proyectado
+        
+        plt.plot([last_date, future_dates[-1]], [last_value, last_value * (1 + growth_rate)], 
+                '--', color=COLOR_PALETTE[i], alpha=0.6, linewidth=2,
+                label=f'{activity} (Proyección)')
+    
+    plt.title('Tendencias Históricas y Proyecciones de Producción Celular', 
+             fontsize=20, fontweight='bold', pad=30, color='white')
+    plt.xlabel('Fecha', fontsize=14, color='white', labelpad=15)
+    plt.ylabel('Células Producidas (Promedio Mensual)', fontsize=14, color='white', labelpad=15)
+    
+    # Leyenda mejorada
+    legend = plt.legend(title='Actividades y Proyecciones', title_fontsize=12, 
+                       fontsize=11, framealpha=0.9, loc='upper left')
+    legend.get_title().set_color('white')
+    for text in legend.get_texts():
+        text.set_color('white')
+    legend.get_frame().set_facecolor('#2a2a2a')
+    legend.get_frame().set_edgecolor('white')
+    
+    plt.grid(True, alpha=0.3, color='white')
+    plt.xticks(rotation=45, color='white', fontsize=11)
+    plt.yticks(color='white', fontsize=11)
+    
+    # Formatear eje Y
+    plt.gca().yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x/1000:.0f}K'))
+    
+    # Línea vertical indicando inicio de proyección
+    plt.axvline(x=last_date, color='white', linestyle=':', alpha=0.7, linewidth=1)
+    plt.annotate('Inicio Proyección', xy=(last_date, plt.ylim()[1] * 0.9), 
+                xytext=(10, 0), textcoords='offset points',
+                color='white', fontsize=10, ha='left')
+    
+    # Configurar tema oscuro
+    plt.gca().set_facecolor('#1a1a1a')
+    plt.gcf().set_facecolor('#1a1a1a')
+    
+    plt.tight_layout()
+    
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
+               facecolor='#1a1a1a', edgecolor='none')
+    buffer.seek(0)
+    image_base64 = base64.b64encode(buffer.getvalue()).decode()
+    plt.close()
+    
+    return {'image': f'data:image/png;base64,{image_base64}'}
+
+def performance_metrics(analytics):
+    """Métricas de performance detalladas"""
+    df = analytics.dataframe()
+    stats = analytics.activity_stats()
+    
+    # Eficiencia (células por minuto)
+    efficiency_by_activity = stats['efficiency_mean'].sort_values(ascending=False)
+    
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(20, 16))
+    
+    # Gráfico 1: Eficiencia por actividad
+    bars1 = efficiency_by_activity.plot(kind='bar', ax=ax1, color=COLOR_PALETTE, 
+                                      edgecolor='white', linewidth=0.5)
+    ax1.set_title('Eficiencia: Células Producidas por Minuto', 
+                 fontsize=16, fontweight='bold', color='white', pad=20)
+    ax1.set_ylabel('Células por Minuto', color='white', fontsize=12)
+    ax1.tick_params(axis='x', rotation=45, colors='white', labelsize=11)
+    ax1.tick_params(axis='y', colors='white', labelsize=11)
+    
+    # Agregar valores en las barras
+    for i, v in enumerate(efficiency_by_activity):
+        ax1.text(i, v + 1000, f'{v:,.0f}', ha='center', va='bottom', 
+                color='white', fontweight='bold', fontsize=10)
+    
+    # Gráfico 2: Producción máxima por actividad
+    max_production = stats['cells_max']
+    bars2 = max_production.plot(kind='bar', ax=ax2, color=COLOR_PALETTE[1:], 
+                              edgecolor='white', linewidth=0.5)
+    ax2.set_title('Producción Máxima por Actividad', 
+                 fontsize=16, fontweight='bold', color='white', pad=20)
+    ax2.set_ylabel('Células Producidas', color='white', fontsize=12)
+    ax2.tick_params(axis='x', rotation=45, colors='white', labelsize=11)
+    ax2.tick_params(axis='y', colors='white', labelsize=11)
+    ax2.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x/1000000:.1f}M'))
+    
+    # Gráfico 3: Intensidad vs Producción
+    scatter1 = ax3.scatter(df['intensity'], df['cells_produced'], 
+                          alpha=0.7, color=COLOR_PALETTE[2], s=50)
+    ax3.set_title('Relación: Intensidad vs Producción Celular', 
+                 fontsize=16, fontweight='bold', color='white', pad=20)
+    ax3.set_xlabel('Intensidad', color='white', fontsize=12)
+    ax3.set_ylabel('Células Producidas', color='white', fontsize=12)
+    ax3.tick_params(axis='both', colors='white', labelsize=11)
+    ax3.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x/1000:.0f}K'))
+    
+    # Línea de tendencia
+    z = np.polyfit(df['intensity'], df['cells_produced'], 1)
+    p = np.poly1d(z)
+    ax3.plot(df['intensity'], p(df['intensity']), "r--", alpha=0.8, linewidth=2)
+    
+    # Gráfico 4: Duración vs Eficiencia
+    scatter2 = ax4.scatter(df['duration_minutes'], df['efficiency'], 
+                          alpha=0.7, color=COLOR_PALETTE[3], s=50)
+    ax4.set_title('Relación: Duración vs Eficiencia', 
+                 fontsize=16, fontweight='bold', color='white', pad=20)
+    ax4.set_xlabel('Duración (minutos)', color='white', fontsize=12)
+    ax4.set_ylabel('Eficiencia (células/minuto)', color='white', fontsize=12)
+    ax4.tick_params(axis='both', colors='white', labelsize=11)
+    
+    # Configurar tema oscuro para todos los subplots
+    for ax in [ax1, ax2, ax3, ax4]:
+        ax.set_facecolor('#1a1a1a')
+        for spine in ax.spines.values():
+            spine.set_color('white')
+            spine.set_alpha(0.5)
+    
+    fig.suptitle('Métricas Avanzadas de Performance - Análisis Completo', 
+                fontsize=22, fontweight='bold', color='white', y=0.95)
+    fig.patch.set_facecolor('#1a1a1a')
+    plt.tight_layout()
+    
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
+               facecolor='#1a1a1a', edgecolor='none')
+    buffer.seek(0)
+    image_base64 = base64.b64encode(buffer.getvalue()).decode()
+    plt.close()
+    
+    return {'image': f'data:image/png;base64,{image_base64}'}
+
+def efficiency_analysis_chart(analytics):
+    """Gráfico específico de análisis de eficiencia"""
+    # Análisis de eficiencia por actividad
+    efficiency_by_activity = analytics.activity_stats()['efficiency_mean'].sort_values(ascending=False)
+    
+    plt.figure(figsize=(14, 8))
+    bars = efficiency_by_activity.plot(kind='bar', color=COLOR_PALETTE, edgecolor='white', linewidth=0.5)
+    
+    plt.title('Análisis de Eficiencia por Tipo de Actividad', 
+             fontsize=18, fontweight='bold', pad=25, color='white')
+    plt.xlabel('Tipo de Actividad', fontsize=14, color='white', labelpad=15)
+    plt.ylabel('Células por Minuto', fontsize=14, color='white', labelpad=15)
+    plt.xticks(rotation=45, ha='right', color='white', fontsize=11)
+    plt.yticks(color='white', fontsize=11)
+    
+    # Agregar valores en las barras
+    for i, v in enumerate(efficiency_by_activity):
+        plt.text(i, v + 500, f'{v:,.0f}', ha='center', va='bottom', 
+                color='white', fontweight='bold', fontsize=10)
+    
+    # Configurar tema oscuro
+    plt.gca().set_facecolor('#1a1a1a')
+    plt.gcf().set_facecolor('#1a1a1a')
+    plt.grid(axis='y', alpha=0.2, color='white')
+    
+    # Configurar bordes
+    for spine in plt.gca().spines.values():
+        spine.set_color('white')
+        spine.set_alpha(0.5)
+    
+    plt.tight_layout()
+    
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
+               facecolor='#1a1a1a', edgecolor='none')
+    buffer.seek(0)
+    image_base64 = base64.b64encode(buffer.getvalue()).decode()
+    plt.close()
+    
+    return {'image': f'data:image/png;base64,{image_base64}'}
+
+def production_analysis_chart(analytics):
+    """Gráfico específico de análisis de producción"""
+    # Análisis de producción por actividad
+    production_by_activity = analytics.activity_stats()['cells_mean'].sort_values(ascending=False)
+    
+    plt.figure(figsize=(14, 8))
+    bars = production_by_activity.plot(kind='bar', color=COLOR_PALETTE[1:], edgecolor='white', linewidth=0.5)
+    
+    plt.title('Producción Promedio por Tipo de Actividad', 
+             fontsize=18, fontweight='bold', pad=25, color='white')
+    plt.xlabel('Tipo de Actividad', fontsize=14, color='white', labelpad=15)
+    plt.ylabel('Células Producidas', fontsize=14, color='white', labelpad=15)
+    plt.xticks(rotation=45, ha='right', color='white', fontsize=11)
+    plt.yticks(color='white', fontsize=11)
+    
+    # Formatear eje Y
+    plt.gca().yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x/1000:.0f}K'))
+    
+    # Agregar valores en las barras
+    for i, v in enumerate(production_by_activity):
+        plt.text(i, v + 5000, f'{v/1000:.0f}K', ha='center', va='bottom', 
+                color='white', fontweight='bold', fontsize=10)
+    
+    # Configurar tema oscuro
+    plt.gca().set_facecolor('#1a1a1a')
+    plt.gcf().set_facecolor('#1a1a1a')
+    plt.grid(axis='y', alpha=0.2, color='white')
+    
+    # Configurar bordes
+    for spine in plt.gca().spines.values():
+        spine.set_color('white')
+        spine.set_alpha(0.5)
+    
+    plt.tight_layout()
+    
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
+               facecolor='#1a1a1a', edgecolor='none')
+    buffer.seek(0)
+    image_base64 = base64.b64encode(buffer.getvalue()).decode()
+    plt.close()
+    
+    return {'image': f'data:image/png;base64,{image_base64}'}
+
+def intensity_analysis_chart(analytics):
+    """Gráfico específico de análisis de intensidad"""
+    df = analytics.dataframe()
+    
+    plt.figure(figsize=(14, 8))
+    
+    # Scatter plot de intensidad vs producción
+    scatter = plt.scatter(df['intensity'], df['cells_produced'], 
+                         alpha=0.6, color=COLOR_PALETTE[2], s=60)
+    
+    # Línea de tendencia
+    z = np.polyfit(df['intensity'], df['cells_produced'], 1)
+    p = np.poly1d(z)
+    plt.plot(df['intensity'], p(df['intensity']), color=COLOR_PALETTE[0], 
+            linewidth=3, alpha=0.8, label='Tendencia')
+    
+    plt.title('Relación entre Intensidad y Producción Celular', 
+             fontsize=18, fontweight='bold', pad=25, color='white')
+    plt.xlabel('Intensidad del Ejercicio', fontsize=14, color='white', labelpad=15)
+    plt.ylabel('Células Producidas', fontsize=14, color='white', labelpad=15)
+    plt.xticks(color='white', fontsize=11)
+    plt.yticks(color='white', fontsize=11)
+    
+    # Formatear eje Y
+    plt.gca().yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x/1000:.0f}K'))
+    
+    # Leyenda
+    legend = plt.legend(fontsize=12, framealpha=0.9)
+    legend.get_frame().set_facecolor('#2a2a2a')
+    for text in legend.get_texts():
+        text.set_color('white')
+    
+    # Configurar tema oscuro
+    plt.gca().set_facecolor('#1a1a1a')
+    plt.gcf().set_facecolor('#1a1a1a')
+    plt.grid(True, alpha=0.2, color='white')
+    
+    # Configurar bordes
+    for spine in plt.gca().spines.values():
+        spine.set_color('white')
+        spine.set_alpha(0.5)
+    
+    plt.tight_layout()
+    
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
+               facecolor='#1a1a1a', edgecolor='none')
+    buffer.seek(0)
+    image_base64 = base64.b64encode(buffer.getvalue()).decode()
+    plt.close()
+    
+    return {'image': f'data:image/png;base64,{image_base64}'}
+
+def duration_analysis_chart(analytics):
+    """Gráfico específico de análisis de duración"""
+    # Eficiencia ya calculada en el DataFrame compartido
+    df = analytics.dataframe()
+    
+    plt.figure(figsize=(14, 8))
+    
+    # Scatter plot de duración vs eficiencia
+    scatter = plt.scatter(df['duration_minutes'], df['efficiency'], 
+                         alpha=0.6, color=COLOR_PALETTE[3], s=60)
+    
+    # Línea de tendencia
+    z = np.polyfit(df['duration_minutes'], df['efficiency'], 1)
+    p = np.poly1d(z)
+    plt.plot(df['duration_minutes'], p(df['duration_minutes']), color=COLOR_PALETTE[1], 
+            linewidth=3, alpha=0.8, label='Tendencia')
+    
+    plt.title('Relación entre Duración y Eficiencia', 
+             fontsize=18, fontweight='bold', pad=25, color='white')
+    plt.xlabel('Duración (minutos)', fontsize=14, color='white', labelpad=15)
+    plt.ylabel('Eficiencia (células/minuto)', fontsize=14, color='white', labelpad=15)
+    plt.xticks(color='white', fontsize=11)
+    plt.yticks(color='white', fontsize=11)
+    
+    # Leyenda
+    legend = plt.legend(fontsize=12, framealpha=0.9)
+    legend.get_frame().set_facecolor('#2a2a2a')
+    for text in legend.get_texts():
+        text.set_color('white')
+    
+    # Configurar tema oscuro
+    plt.gca().set_facecolor('#1a1a1a')
+    plt.gcf().set_facecolor('#1a1a1a')
+    plt.grid(True, alpha=0.2, color='white')
+    
+    # Configurar bordes
+    for spine in plt.gca().spines.values():
+        spine.set_color('white')
+        spine.set_alpha(0.5)
+    
+    plt.tight_layout()
+    
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight', 
+               facecolor='#1a1a1a', edgecolor='none')
+    buffer.seek(0)
+    image_base64 = base64.b64encode(buffer.getvalue()).decode()
+    plt.close()
+    
+    return {'image': f'data:image/png;base64,{image_base64}'}
+
+# Gráficos de /api/charts/<nombre>; cada función recibe un AnalyticsCache
+# y devuelve el contenido JSON de la respuesta
+CHARTS = {
+    'area': area_chart,
+    'radar': radar_chart,
+    'radar_individual': radar_individual_chart,
+    'stacked_bar': stacked_bar_chart,
+    'stacked_bar_percentage': stacked_bar_percentage_chart,
+    'pie': pie_chart,
+    'correlation': correlation_heatmap,
+    'trends': trends_chart,
+    'performance_metrics': performance_metrics,
+    'efficiency_analysis': efficiency_analysis_chart,
+    'production_analysis': production_analysis_chart,
+    'intensity_analysis': intensity_analysis_chart,
+    'duration_analysis': duration_analysis_chart
+}
+
+def chart_keys(activities):
+    """Todos los gráficos a precalcular: (nombre,) o (nombre, actividad) para los radares individuales"""
+    return [(name,) for name in CHARTS if name != 'radar_individual'] + \
+           [('radar_individual', activity) for activity in activities]
+
+def render(analytics, name, *args):
+    """Contenido JSON de un gráfico"""
+    return CHARTS[name](analytics, *args)
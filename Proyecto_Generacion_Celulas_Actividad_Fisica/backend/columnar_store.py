@@ -0,0 +1,324 @@
+import threading
+import numpy as np
+import pandas as pd
+
+# Columnas de texto con pocos valores distintos: se guardan como códigos enteros
+CATEGORICAL_COLUMNS = ('activity_type', 'gender')
+
+_MISSING = object()
+
+
+def _is_missing(value):
+    return value is None or value is _MISSING or (isinstance(value, float) and np.isnan(value))
+
+
+def _value_kind(value):
+    """Tipo de columna mínimo que puede guardar el valor: 'i', 'f' u 'O'"""
+    if _is_missing(value):
+        return 'f'
+    if isinstance(value, (bool, np.bool_)):
+        return 'O'
+    if isinstance(value, (int, np.integer)):
+        return 'i'
+    if isinstance(value, (float, np.floating)):
+        return 'f'
+    return 'O'
+
+
+class ColumnarStore:
+    """
+    Almacén columnar tipado de los registros de actividad física.
+
+    Cada columna es un array de NumPy con capacidad de reserva, de modo que
+    agregar un registro escribe una fila en O(1) amortizado. `activity_type`
+    y `gender` se guardan como códigos enteros con sus categorías ordenadas.
+    Los tipos siguen la inferencia de pandas: una columna entera pasa a
+    flotante al recibir un valor faltante o decimal, y a objeto con texto.
+
+    `frame()` devuelve un DataFrame construido sobre vistas de los arrays
+    (sin copiar datos). Las filas visibles de una instantánea nunca se
+    modifican en sitio: si hay instantáneas entregadas, una actualización
+    copia antes las columnas que cambia (copy-on-write).
+
+    Un índice id -> fila hace que buscar, reemplazar y eliminar por id sean
+    O(1). Eliminar solo marca la fila (lápida); las filas marcadas se
+    descartan de una vez, conservando el orden, en la siguiente lectura.
+    """
+
+    def __init__(self, records=()):
+        self._lock = threading.RLock()
+        self._columns = {}
+        self._categories = {}
+        self._n = 0
+        # id -> posición de su fila, y posiciones eliminadas aún sin compactar
+        self._rows = {}
+        self._removed = []
+        self._snapshot = None
+        # Columnas cuyos arrays están referenciados por instantáneas entregadas
+        self._shared = set()
+        self.load(records)
+
+    def __len__(self):
+        return self._n - len(self._removed)
+
+    # --- Carga inicial ---
+
+    def load(self, records):
+        """Reemplazar el contenido completo (una sola inferencia de tipos con pandas)"""
+        with self._lock:
+            df = pd.DataFrame(list(records))
+            self._columns = {}
+            self._categories = {}
+            self._n = len(df)
+            for name in df.columns:
+                column = df[name]
+                if name in CATEGORICAL_COLUMNS:
+                    categorical = pd.Categorical(column)
+                    categories = categorical.categories.tolist()
+                    if not all(isinstance(c, str) for c in categories):
+                        # Solo el texto es categoría; el resto se trata como faltante
+                        categories = sorted(c for c in categories if isinstance(c, str))
+                        categorical = pd.Categorical(column.astype(object), categories=categories)
+                    self._categories[name] = categories
+                    self._columns[name] = categorical.codes.astype(self._code_dtype(categories))
+                elif column.dtype.kind in 'if':
+                    dtype = np.int64 if column.dtype.kind == 'i' else np.float64
+                    self._columns[name] = column.to_numpy(dtype=dtype, copy=True)
+                else:
+                    self._columns[name] = column.to_numpy(dtype=object, copy=True)
+            self._removed = []
+            self._index_rows()
+            self._snapshot = None
+            self._shared = set()
+
+    # --- Lectura ---
+
+    def frame(self):
+        """
+        DataFrame con las filas actuales, sobre vistas de los arrays internos.
+        Se puede agregar o reasignar columnas en él sin afectar al almacén.
+        """
+        with self._lock:
+            if self._removed:
+                self._compact()
+            if self._snapshot is None:
+                n = self._n
+                data = {}
+                for name, array in self._columns.items():
+                    if name in self._categories:
+                        data[name] = self._categorical(name, array[:n])
+                    else:
+                        data[name] = array[:n]
+                self._snapshot = pd.DataFrame(data, copy=False)
+            self._shared = set(self._columns)
+            return self._snapshot.copy(deep=False)
+
+    def _categorical(self, name, codes):
+        categories = self._categories[name]
+        # Las categorías sin filas (tras eliminar registros) no se exponen
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories)) if len(codes) else np.zeros(len(categories))
+        values = pd.Categorical.from_codes(codes, categories=categories)
+        if len(categories) and not counts.all():
+            values = values.remove_unused_categories()
+        return values
+
+    def position(self, record_id):
+        """Posición de la fila con ese id o None"""
+        return self._rows.get(record_id)
+
+    def _index_rows(self):
+        """Reconstruir el índice id -> fila (carga y compactación)"""
+        ids = self._columns.get('id')
+        self._rows = {} if ids is None else {
+            record_id: position for position, record_id in enumerate(ids[:self._n].tolist())
+            if not _is_missing(record_id)
+        }
+
+    def _compact(self):
+        """Descartar las filas eliminadas en arrays nuevos (las instantáneas entregadas no cambian)"""
+        keep = np.ones(self._n, dtype=bool)
+        keep[self._removed] = False
+        self._columns = {name: array[:self._n][keep] for name, array in self._columns.items()}
+        self._n = int(keep.sum())
+        self._removed = []
+        self._index_rows()
+        self._shared = set()
+
+    # --- Escritura ---
+
+    def append(self, record):
+        """Agregar una fila al final"""
+        with self._lock:
+            self._reserve(self._n + 1)
+            position = self._n
+            self._n += 1
+            for name in self._column_names(record):
+                self._set(name, position, record.get(name, _MISSING))
+            if not _is_missing(record.get('id')):
+                self._rows[record['id']] = position
+            self._snapshot = None
+
+    def extend(self, records):
+        """
+        Agregar varias filas al final. Si el lote tiene las mismas columnas que
+        el almacén, se escribe columna a columna (una inferencia de tipos con
+        pandas para todo el lote); si no, fila a fila.
+        """
+        records = list(records)
+        if not records:
+            return
+        with self._lock:
+            batch = pd.DataFrame(records)
+            if not self._columns or list(batch.columns) != list(self._columns):
+                for record in records:
+                    self.append(record)
+                return
+
+            start, end = self._n, self._n + len(batch)
+            self._reserve(end)
+            for name in batch.columns:
+                column = batch[name]
+                if name in self._categories:
+                    # Primero las categorías nuevas (recodifican), después los códigos
+                    for value in column.dropna().unique():
+                        self._category_code(name, value)
+                    # Los valores que no son texto quedan fuera de las categorías (-1)
+                    codes = pd.Categorical(column, categories=self._categories[name]).codes
+                    self._columns[name][start:end] = codes
+                    continue
+
+                array = self._columns[name]
+                missing = column.isna().to_numpy()
+                # Una columna solo con faltantes no fuerza el tipo objeto (como _value_kind)
+                kind = column.dtype.kind if column.dtype.kind in 'if' else ('f' if missing.all() else 'O')
+                if array.dtype.kind == 'i' and kind != 'i':
+                    array = self._columns[name] = array.astype(np.float64 if kind == 'f' else object)
+                    self._shared.discard(name)
+                elif array.dtype.kind == 'f' and kind == 'O':
+                    array = self._columns[name] = array.astype(object)
+                    self._shared.discard(name)
+                array[start:end] = column.to_numpy(dtype=array.dtype)
+                if array.dtype.kind == 'O':
+                    # Los faltantes se guardan como NaN, igual que en append()
+                    array[start:end][missing] = np.nan
+            self._n = end
+            if 'id' in batch.columns:
+                self._rows.update(zip(batch['id'].tolist(), range(start, end)))
+            self._snapshot = None
+
+    def replace(self, record_id, record):
+        """Reemplazar la fila con ese id por el registro completo"""
+        with self._lock:
+            position = self.position(record_id)
+            if position is None:
+                return False
+            for name in self._column_names(record):
+                self._set(name, position, record.get(name, _MISSING), copy_on_write=True)
+            self._snapshot = None
+            return True
+
+    def remove(self, record_id):
+        """Eliminar la fila con ese id (se compacta en la siguiente lectura, conservando el orden)"""
+        with self._lock:
+            position = self._rows.pop(record_id, None)
+            if position is None:
+                return False
+            self._removed.append(position)
+            self._snapshot = None
+            return True
+
+    def _column_names(self, record):
+        """Columnas existentes seguidas de las nuevas del registro, en orden"""
+        return list(self._columns) + [name for name in record if name not in self._columns]
+
+    def _writable(self, name, array, copy_on_write):
+        """Array de la columna que se puede modificar sin alterar instantáneas"""
+        if copy_on_write and name in self._shared:
+            array = self._columns[name] = array.copy()
+            self._shared.discard(name)
+        return array
+
+    def _reserve(self, size):
+        """Asegurar capacidad para `size` filas (crecimiento geométrico)"""
+        for name, array in self._columns.items():
+            if len(array) < size:
+                grown = np.empty(max(size, 2 * len(array), 16), dtype=array.dtype)
+                grown[:self._n] = array[:self._n]
+                self._columns[name] = grown
+
+    def _new_column(self, name, kind):
+        """Columna nueva: las filas anteriores quedan como faltantes (NaN)"""
+        capacity = max(len(next(iter(self._columns.values()))) if self._columns else 0, self._n, 16)
+        if name in CATEGORICAL_COLUMNS:
+            self._categories[name] = []
+            array = np.full(capacity, -1, dtype=np.int8)
+        elif kind == 'O':
+            array = np.full(capacity, np.nan, dtype=object)
+        elif kind == 'i' and self._n <= 1:
+            array = np.zeros(capacity, dtype=np.int64)
+        else:
+            array = np.full(capacity, np.nan, dtype=np.float64)
+        self._columns[name] = array
+        return array
+
+    def _set(self, name, position, value, copy_on_write=False):
+        array = self._columns.get(name)
+        if array is None:
+            if _is_missing(value):
+                return
+            array = self._new_column(name, _value_kind(value))
+
+        if name in self._categories:
+            code = self._category_code(name, value)
+            array = self._columns[name]
+            if copy_on_write and array[position] == code:
+                return
+            array = self._writable(name, array, copy_on_write)
+            array[position] = code
+            return
+
+        kind = _value_kind(value)
+        if value is _MISSING:
+            value = np.nan
+        if array.dtype.kind == 'i' and kind != 'i':
+            array = self._columns[name] = array.astype(np.float64 if kind == 'f' else object)
+            self._shared.discard(name)
+        elif array.dtype.kind == 'f' and kind == 'O':
+            array = self._columns[name] = array.astype(object)
+            self._shared.discard(name)
+        elif copy_on_write:
+            if _same(array[position], value):
+                return
+            array = self._writable(name, array, copy_on_write)
+        array[position] = value
+
+    def _category_code(self, name, value):
+        """Código de la categoría; las nuevas se insertan en orden y se recodifica"""
+        if not isinstance(value, str):
+            return -1
+        categories = self._categories[name]
+        index = np.searchsorted(np.array(categories, dtype=object), value) if categories else 0
+        index = int(index)
+        if index < len(categories) and categories[index] == value:
+            return index
+
+        # Categoría nueva: mantener el orden alfabético (como el groupby sobre texto)
+        new_categories = categories[:index] + [value] + categories[index:]
+        old_codes = self._columns[name]
+        codes = old_codes.astype(self._code_dtype(new_categories))
+        codes[(old_codes >= index)] += 1
+        self._columns[name] = codes
+        self._shared.discard(name)
+        self._categories[name] = new_categories
+        return index
+
+    @staticmethod
+    def _code_dtype(categories):
+        return np.int8 if len(categories) < 127 else np.int32
+
+
+def _same(a, b):
+    try:
+        return a == b or (_is_missing(a) and _is_missing(b))
+    except (TypeError, ValueError):
+        return False
@@ -3,11 +3,96 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
+import atexit
+import threading
+
+from columnar_store import ColumnarStore
+
+# Valores válidos de las columnas categóricas (los de generate_sample_data)
+ACTIVITY_TYPES = ['Running', 'Swimming', 'Cycling', 'Weight Training', 'Yoga', 'HIIT']
+GENDERS = ['Male', 'Female']
 
 class DataProcessor:
-    def __init__(self, data_file):
+    """
+    Registros de actividad física indexados por id.
+
+    Cada escritura se anexa primero a un diario (write-ahead journal) junto al
+    JSON y se confirma con fsync; el JSON completo se reescribe después, en
+    segundo plano, agrupando todas las escrituras de `flush_delay` segundos.
+    Al arrancar se carga el JSON y se reproduce el diario encima. Los ids se
+    asignan con un contador monótono que no reutiliza ids eliminados. Solo
+    vuelca el proceso que ha escrito: uno que solo cargó los datos no toca
+    el JSON ni el diario, ni siquiera al salir.
+    
+    En el modo prefork, los procesos web siguen a un `SharedState` (ver
+    `follow`): leen la instantánea compartida y envían las escrituras al
+    proceso escritor, el único que toca el diario y el JSON.
+    """
+    
+    def __init__(self, data_file, flush_delay=2.0, max_journal_ops=1000, flush_at_exit=True):
         self.data_file = data_file
-        self.data = self.load_data()
+        self.journal_file = f"{os.path.splitext(data_file)[0]}.journal"
+        self.flush_delay = flush_delay
+        self.max_journal_ops = max_journal_ops
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._flush_timer = None
+        self._subscribers = []
+        self._shared = None
+        
+        self._records = {record['id']: record for record in self.load_data()}
+        self._next_id = max(self._records, default=0) + 1
+        self._journal_lines = []
+        # Operaciones escritas por este proceso y aún no volcadas al JSON
+        self._unflushed_ops = 0
+        self._replay_journal()
+        
+        # Copia columnar tipada del dataset, actualizada en cada escritura
+        self.store = ColumnarStore(self._records.values())
+        # Se incrementa en cada escritura; invalida la analítica derivada
+        self._version = 0
+        
+        # No perder escrituras pendientes de volcar al cerrar el proceso
+        if flush_at_exit:
+            atexit.register(self.flush)
+    
+    @property
+    def version(self):
+        """Versión de los datos (la compartida entre procesos si sigue a un SharedState)"""
+        return self._version if self._shared is None else self._shared.version
+    
+    @property
+    def data(self):
+        """Lista de registros en orden de inserción (copia superficial)"""
+        if self._shared is not None:
+            return self._shared.call('data')
+        with self._lock:
+            return list(self._records.values())
+    
+    def count(self):
+        return len(self.store)
+    
+    def get_record(self, record_id):
+        if self._shared is not None:
+            return self._shared.call('get_record', record_id)
+        return self._records.get(record_id)
+    
+    def follow(self, shared):
+        """
+        Convertir esta instancia (en un proceso web recién creado con fork) en
+        lectora de `shared`: las lecturas usan la instantánea compartida y las
+        escrituras se ejecutan en el proceso escritor.
+        """
+        self._shared = shared
+        self.store = shared
+        # La copia heredada del proceso escritor no se usa: ni diario ni volcados aquí
+        self._records = {}
+        self._journal_lines = []
+        self._unflushed_ops = 0
+        self._flush_timer = None
+        # Los locks heredados pudieron copiarse tomados por un hilo que no existe tras el fork
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
         
     def load_data(self):
         """Cargar datos desde el archivo JSON con manejo de errores"""
@@ -33,7 +118,9 @@ class DataProcessor:
     
     def convert_numpy_types(self, obj):
         """Convertir tipos NumPy a tipos nativos de Python para JSON serialization"""
-        if isinstance(obj, (np.integer, np.int64, np.int32)):
+        if obj is None or type(obj) in (str, int, float, bool):
+            return obj
+        elif isinstance(obj, (np.integer, np.int64, np.int32)):
             return int(obj)
         elif isinstance(obj, (np.floating, np.float64, np.float32)):
             return float(obj)
@@ -50,9 +137,9 @@ class DataProcessor:
         """Generar datos de ejemplo robustos"""
         print("🔄 Generando base de datos de ejemplo...")
         np.random.seed(42)
-        activities = ['Running', 'Swimming', 'Cycling', 'Weight Training', 'Yoga', 'HIIT']
+        activities = ACTIVITY_TYPES
         ages = range(18, 65)
-        genders = ['Male', 'Female']
+        genders = GENDERS
         
         data = []
         base_date = datetime.now() - timedelta(days=365)
@@ -100,48 +187,205 @@ class DataProcessor:
         os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
         with open(self.data_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+        # Un diario anterior pertenece a los datos reemplazados
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
         
         print(f"✅ Base de datos generada: {len(data)} registros guardados en {self.data_file}")
         return data
     
     def get_dataframe(self):
-        """Convertir datos a DataFrame de pandas"""
-        return pd.DataFrame(self.data)
+        """
+        DataFrame de los datos sobre el almacén columnar (sin copiar los arrays).
+        Agregar o reasignar columnas no afecta al almacén.
+        """
+        return self.store.frame()
+    
+    def snapshot(self):
+        """(versión, DataFrame) leídos de forma consistente"""
+        if self._shared is not None:
+            return self._shared.snapshot()
+        with self._lock:
+            return self.version, self.store.frame()
+    
+    def subscribe(self, callback):
+        """Registrar una función que recibe la nueva versión tras cada escritura"""
+        self._subscribers.append(callback)
+    
+    def _changed(self):
+        self._version += 1
+        self._notify(self._version)
+    
+    def _notify(self, version):
+        for callback in self._subscribers:
+            callback(version)
     
     def add_record(self, record):
         """Agregar nuevo registro"""
         # Convertir tipos NumPy antes de agregar
         record = self.convert_numpy_types(record)
-        record['id'] = len(self.data) + 1
-        self.data.append(record)
-        self.save_data()
+        if self._shared is not None:
+            return self._shared.call('add_record', record)
+        with self._lock:
+            record['id'] = self._next_id
+            self._write_journal({'op': 'add', 'record': record})
+            self._apply({'op': 'add', 'record': record})
+            self.store.append(record)
+            self._changed()
         return record
     
+    def add_records(self, records):
+        """
+        Agregar varios registros: los ids se asignan de una sola vez y el lote
+        se escribe en el diario como una única operación (un solo fsync).
+        """
+        records = self.convert_numpy_types(list(records))
+        if not records:
+            return []
+        if self._shared is not None:
+            return self._shared.call('add_records', records)
+        with self._lock:
+            first_id = self._next_id
+            records = [{'id': first_id + offset, **{k: v for k, v in record.items() if k != 'id'}}
+                       for offset, record in enumerate(records)]
+            operation = {'op': 'add_batch', 'records': records}
+            self._write_journal(operation)
+            self._apply(operation)
+            self.store.extend(records)
+            self._changed()
+        return records
+    
     def update_record(self, record_id, updated_data):
         """Actualizar registro existente"""
         # Convertir tipos NumPy antes de actualizar
         updated_data = self.convert_numpy_types(updated_data)
-        for i, record in enumerate(self.data):
-            if record['id'] == record_id:
-                updated_data['id'] = record_id
-                self.data[i] = updated_data
-                self.save_data()
-                return updated_data
-        return None
+        if self._shared is not None:
+            return self._shared.call('update_record', record_id, updated_data)
+        with self._lock:
+            if record_id not in self._records:
+                return None
+            updated_data['id'] = record_id
+            self._write_journal({'op': 'update', 'record': updated_data})
+            self._apply({'op': 'update', 'record': updated_data})
+            self.store.replace(record_id, updated_data)
+            self._changed()
+        return updated_data
     
     def delete_record(self, record_id):
         """Eliminar registro"""
-        self.data = [record for record in self.data if record['id'] != record_id]
-        self.save_data()
+        if self._shared is not None:
+            return self._shared.call('delete_record', record_id)
+        with self._lock:
+            if record_id in self._records:
+                self._write_journal({'op': 'delete', 'id': record_id})
+                self._apply({'op': 'delete', 'id': record_id})
+                self.store.remove(record_id)
+                self._changed()
         return True
     
+    # --- Diario y volcado a disco ---
+    
+    def _apply(self, operation):
+        """Aplicar una operación del diario al índice en memoria (idempotente)"""
+        op = operation.get('op')
+        if op in ('add', 'update', 'add_batch'):
+            records = operation['records'] if op == 'add_batch' else [operation['record']]
+            for record in records:
+                self._records[record['id']] = record
+                self._next_id = max(self._next_id, record['id'] + 1)
+        elif op == 'delete':
+            self._records.pop(operation['id'], None)
+        elif op == 'next_id':
+            self._next_id = max(self._next_id, operation['value'])
+    
+    def _replay_journal(self):
+        """Reproducir sobre el JSON las operaciones aún no volcadas"""
+        if not os.path.exists(self.journal_file):
+            return
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    operation = json.loads(line)
+                except ValueError:
+                    # Línea incompleta por una caída durante la escritura
+                    print("⚠️ Línea inválida en el diario, se ignora")
+                    continue
+                self._apply(operation)
+                self._journal_lines.append(line if line.endswith('\n') else line + '\n')
+        if self._journal_lines:
+            print(f"📒 Diario reproducido: {len(self._journal_lines)} operaciones")
+    
+    def _write_journal(self, *operations):
+        """Anexar operaciones al diario de forma duradera (un solo fsync)"""
+        lines = [json.dumps(operation, ensure_ascii=False) + '\n' for operation in operations]
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_lines.extend(lines)
+        self._unflushed_ops += len(lines)
+        self._schedule_flush()
+    
+    def _schedule_flush(self):
+        """Programar un volcado agrupado del JSON completo"""
+        if len(self._journal_lines) >= self.max_journal_ops:
+            delay = 0
+        elif self._flush_timer is not None:
+            return
+        else:
+            delay = self.flush_delay
+        
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        self._flush_timer = threading.Timer(delay, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+    
+    def flush(self):
+        """
+        Volcar el estado actual al JSON y recortar el diario, solo si este
+        proceso escribió algo desde la carga o el último volcado: con el
+        estado cargado al arrancar se pisarían las escrituras de otro proceso.
+        El JSON se escribe fuera del lock de escritura; las operaciones que
+        llegan mientras tanto se conservan en el diario.
+        """
+        if self._shared is not None:
+            return
+        with self._flush_lock:
+            with self._lock:
+                self._flush_timer = None
+                if not self._unflushed_ops:
+                    return
+                records = list(self._records.values())
+                flushed_ops = len(self._journal_lines)
+                written_ops = self._unflushed_ops
+            
+            try:
+                tmp_file = f"{self.data_file}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(records, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                
+                with self._lock:
+                    os.replace(tmp_file, self.data_file)
+                    # El contador de ids se conserva aunque se hayan eliminado los últimos
+                    header = json.dumps({'op': 'next_id', 'value': self._next_id}) + '\n'
+                    self._journal_lines = [header] + self._journal_lines[flushed_ops:]
+                    tmp_journal = f"{self.journal_file}.tmp"
+                    with open(tmp_journal, 'w', encoding='utf-8') as f:
+                        f.writelines(self._journal_lines)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_journal, self.journal_file)
+                    self._unflushed_ops -= written_ops
+                    # Escrituras llegadas durante el volcado
+                    if self._unflushed_ops:
+                        self._schedule_flush()
+                print(f"💾 Datos guardados: {len(records)} registros")
+            except Exception as e:
+                print(f"❌ Error guardando datos: {e}")
+    
     def save_data(self):
-        """Guardar datos al archivo JSON"""
-        try:
-            # Convertir tipos NumPy antes de guardar
-            data_to_save = self.convert_numpy_types(self.data)
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, indent=2, ensure_ascii=False)
-            print(f"💾 Datos guardados: {len(self.data)} registros")
-        except Exception as e:
-            print(f"❌ Error guardando datos: {e}")
\ No newline at end of file
+        """Guardar datos al archivo JSON inmediatamente"""
+        self.flush()
\ No newline at end of file
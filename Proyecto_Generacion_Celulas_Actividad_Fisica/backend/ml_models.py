@@ -1,17 +1,93 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.metrics import r2_score, mean_absolute_error
 import json
+import os
+import copy
+import time
+import threading
+from datetime import datetime
+
+from data_processor import ACTIVITY_TYPES
+from startup import STARTUP
+
+# scikit-learn y joblib se importan al usarse (más de un segundo de importación):
+# la API arranca sin ellos y el modelo se carga en segundo plano (MLProcessor.start)
+
+# Características del modelo, en el orden en que se entrena
+NUMERIC_FEATURES = ['duration_minutes', 'intensity', 'age', 'heart_rate_avg',
+                    'calories_burned', 'sleep_hours', 'hydration_liters']
+CATEGORICAL_FEATURES = ['activity_type', 'gender']
+FEATURES = NUMERIC_FEATURES + [col + '_encoded' for col in CATEGORICAL_FEATURES]
+
+# Formato del artefacto guardado en disco; cambiarlo invalida los anteriores
+ARTIFACT_FORMAT = 2
+
+# Estimadores disponibles: bosque aleatorio (por defecto) o regresor lineal SGD
+ESTIMATORS = ('forest', 'sgd')
+# Tamaño máximo del bosque al agregar árboles incrementalmente
+MAX_FOREST_TREES = 300
+
+# Máximo de perfiles por solicitud de predicción por lotes
+MAX_BATCH_ROWS = 100000
+
+# Rejilla por defecto de los planes recomendados (minutos e intensidades)
+GRID_DURATIONS = [15, 30, 45, 60, 75, 90, 105, 120]
+GRID_INTENSITIES = [round(0.5 + 0.05 * i, 2) for i in range(11)]
+# Calorías por minuto a intensidad 1, como en generate_sample_data
+CALORIES_PER_MINUTE = 8
+# Filas de la rejilla por llamada a model.predict (acota la memoria con muchos usuarios);
+# también es el máximo de planes de la rejilla de un usuario
+MAX_GRID_ROWS = 500000
+# Máximo de filas puntuadas (usuarios × planes) por solicitud de planes
+MAX_PLAN_ROWS = 5000000
+
+class SGDCellRegressor:
+    """
+    Regresor lineal con descenso de gradiente estocástico, alternativa al
+    bosque que admite partial_fit. El objetivo se entrena en millones de
+    células para que los pasos del gradiente sean estables.
+    """
+    TARGET_SCALE = 1e6
+    
+    def __init__(self, random_state=42):
+        from sklearn.linear_model import SGDRegressor
+        self.regressor = SGDRegressor(max_iter=1000, tol=1e-4, random_state=random_state)
+    
+    def fit(self, X, y):
+        self.regressor.fit(X, np.asarray(y, dtype=float) / self.TARGET_SCALE)
+        return self
+    
+    def partial_fit(self, X, y):
+        self.regressor.partial_fit(X, np.asarray(y, dtype=float) / self.TARGET_SCALE)
+        return self
+    
+    def predict(self, X):
+        return self.regressor.predict(X) * self.TARGET_SCALE
+    
+    @property
+    def feature_importances_(self):
+        """Peso relativo de cada característica (coeficientes en valor absoluto)"""
+        weights = np.abs(self.regressor.coef_)
+        return weights / weights.sum() if weights.sum() else weights
 
 class MLProcessor:
-    def __init__(self, data_processor):
+    def __init__(self, data_processor, model_path=None):
         self.data_processor = data_processor
         self.model = None
-        self.scaler = StandardScaler()
+        self.scaler = None
         self.label_encoders = {}
+        self.model_path = model_path or os.path.join(
+            os.path.dirname(os.path.abspath(data_processor.data_file)), 'models', 'cell_model.joblib')
+        # Modelo en servicio: se reemplaza completo (modelo, escalador y categorías) de una vez
+        self._serving = None
+        # Un solo entrenamiento (completo o incremental) a la vez
+        self._train_lock = threading.RLock()
+        # Sin activar mientras el modelo se carga en segundo plano (start)
+        self._loaded = threading.Event()
+        self._loaded.set()
+        # Modo prefork: versión compartida del artefacto (ver follow)
+        self._shared = None
+        self._model_version = 0
         
     def convert_numpy_types(self, obj):
         """Convertir tipos NumPy a tipos nativos de Python"""
@@ -28,111 +104,439 @@ class MLProcessor:
         else:
             return obj
         
+    def start(self):
+        """
+        Cargar (o entrenar) el modelo en un hilo en segundo plano. Las
+        predicciones que lleguen antes esperan a que termine.
+        """
+        self._loaded.clear()
+        threading.Thread(target=self._load_in_background, name='ml-load', daemon=True).start()
+    
+    def _load_in_background(self):
+        try:
+            # Un entrenamiento pedido mientras tanto espera a que termine la carga
+            with self._train_lock, STARTUP.phase('modelo (scikit-learn + artefacto)', background=True):
+                self.load_or_train()
+        finally:
+            self._loaded.set()
+    
+    @property
+    def ready(self):
+        return self._loaded.is_set() and self._serving is not None
+    
+    @property
+    def loading(self):
+        return not self._loaded.is_set()
+    
+    def follow(self, shared):
+        """
+        Compartir el modelo entre los procesos web del modo prefork: tras
+        guardar un artefacto se anuncia en `shared` y los demás procesos lo
+        recargan antes de su siguiente predicción.
+        """
+        self._shared = shared
+        self._model_version = shared.model_version
+        self._train_lock = threading.RLock()
+    
+    def _current(self, timeout=300):
+        """Modelo en servicio, esperando a la carga en segundo plano si sigue en curso"""
+        self._loaded.wait(timeout)
+        if self._shared is not None and self._shared.model_version != self._model_version:
+            with self._train_lock:
+                version = self._shared.model_version
+                if version != self._model_version:
+                    # Otro proceso guardó un modelo más reciente
+                    self._model_version = version
+                    self.load_model()
+        return self._serving
+    
     def prepare_features(self, df):
         """Preparar características para el modelo"""
+        from sklearn.preprocessing import LabelEncoder
         # Codificar variables categóricas
-        categorical_cols = ['activity_type', 'gender']
-        for col in categorical_cols:
+        for col in CATEGORICAL_FEATURES:
             self.label_encoders[col] = LabelEncoder()
             df[col + '_encoded'] = self.label_encoders[col].fit_transform(df[col])
         
-        # Seleccionar características
-        features = ['duration_minutes', 'intensity', 'age', 'heart_rate_avg', 
-                   'calories_burned', 'sleep_hours', 'hydration_liters',
-                   'activity_type_encoded', 'gender_encoded']
-        
-        X = df[features]
+        X = df[FEATURES]
         y = df['cells_produced']
         
         return X, y
     
-    def train_model(self):
-        """Entrenar modelo de machine learning"""
-        try:
-            df = self.data_processor.get_dataframe()
-            X, y = self.prepare_features(df)
-            
-            # Escalar características
-            X_scaled = self.scaler.fit_transform(X)
-            
-            # Dividir datos
-            X_train, X_test, y_train, y_test = train_test_split(
-                X_scaled, y, test_size=0.2, random_state=42
-            )
-            
-            # Entrenar modelo
-            self.model = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42
-            )
-            
-            self.model.fit(X_train, y_train)
+    def train_model(self, estimator='forest'):
+        """Entrenar modelo de machine learning (completo, con todos los registros)"""
+        if estimator not in ESTIMATORS:
+            raise ValueError(f"Estimador desconocido: {estimator} (opciones: {', '.join(ESTIMATORS)})")
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.metrics import r2_score, mean_absolute_error
+        with self._train_lock:
+            try:
+                df = self.data_processor.get_dataframe()
+                X, y = self.prepare_features(df)
+                
+                # Escalar características (escalador nuevo: el anterior sigue en servicio)
+                scaler = StandardScaler()
+                X_scaled = scaler.fit_transform(X)
+                
+                # Dividir datos
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X_scaled, y, test_size=0.2, random_state=42
+                )
+                
+                # Entrenar modelo
+                if estimator == 'forest':
+                    model = RandomForestRegressor(
+                        n_estimators=100,
+                        max_depth=10,
+                        random_state=42
+                    )
+                else:
+                    model = SGDCellRegressor(random_state=42)
+                
+                model.fit(X_train, y_train)
+                
+                # Evaluar modelo
+                y_pred = model.predict(X_test)
+                r2 = r2_score(y_test, y_pred)
+                mae = mean_absolute_error(y_test, y_pred)
+                
+                # Convertir importancia de características a tipos nativos
+                feature_importance = dict(zip(X.columns, model.feature_importances_))
+                feature_importance = self.convert_numpy_types(feature_importance)
+                
+                metrics = {
+                    'r2_score': float(r2),
+                    'mae': float(mae),
+                    'feature_importance': feature_importance,
+                    'mode': 'full',
+                    'estimator': estimator
+                }
+                self.model, self.scaler = model, scaler
+                self._serve(
+                    model, scaler,
+                    categories={col: [str(c) for c in self.label_encoders[col].classes_] for col in CATEGORICAL_FEATURES},
+                    # Las categorías no vistas en el entrenamiento se predicen como la más frecuente
+                    fallback={col: str(df[col].mode().iloc[0]) for col in CATEGORICAL_FEATURES},
+                    metrics=metrics, source='trained', records=len(df),
+                    watermark=int(df['id'].max()), estimator=estimator
+                )
+                self.save_model()
+                return metrics
+            except Exception as e:
+                print(f"❌ Error entrenando modelo: {e}")
+                raise
+    
+    def train_incremental(self):
+        """
+        Actualizar el modelo en servicio solo con los registros agregados desde
+        el último entrenamiento (id mayor que la marca de agua).
+        
+        - Bosque: se agregan árboles (warm_start) entrenados con los registros
+          nuevos, en proporción a su peso sobre el total. Si el bosque superara
+          MAX_FOREST_TREES se reentrena completo.
+        - SGD: un paso de partial_fit con los registros nuevos.
+        
+        El escalador y las categorías no cambian. Antes de actualizar se mide
+        el error del modelo sobre los registros nuevos (que aún no ha visto).
+        Los cambios de registros ya entrenados no se incorporan hasta el
+        siguiente entrenamiento completo.
+        """
+        from sklearn.metrics import r2_score, mean_absolute_error
+        with self._train_lock:
+            serving = self._current()
+            if serving is None:
+                return self.train_model()
             
-            # Evaluar modelo
-            y_pred = self.model.predict(X_test)
-            r2 = r2_score(y_test, y_pred)
-            mae = mean_absolute_error(y_test, y_pred)
+            df = self.data_processor.get_dataframe()
+            new = df[df['id'] > serving['watermark']]
+            X_new, y_new = self._encode_frame(new, serving)
+            if not len(X_new):
+                return {'mode': 'incremental', 'estimator': serving['estimator'], 'new_records': 0, 'updated': False}
             
-            # Convertir importancia de características a tipos nativos
-            feature_importance = dict(zip(X.columns, self.model.feature_importances_))
-            feature_importance = self.convert_numpy_types(feature_importance)
+            old_model = serving['model']
+            if serving['estimator'] == 'forest':
+                trees = max(1, round(len(old_model.estimators_) * len(X_new) / max(serving['records'], 1)))
+                if len(old_model.estimators_) + trees > MAX_FOREST_TREES:
+                    metrics = self.train_model('forest')
+                    return {**metrics, 'reason': f"El bosque superaría {MAX_FOREST_TREES} árboles"}
             
-            return {
-                'r2_score': float(r2),
+            try:
+                # Evaluación previa (prequential): registros que el modelo no ha visto
+                y_pred = old_model.predict(X_new)
+                mae = mean_absolute_error(y_new, y_pred)
+                r2 = r2_score(y_new, y_pred) if len(y_new) > 1 else None
+                
+                if serving['estimator'] == 'forest':
+                    # Copia superficial con su propia lista de árboles: el modelo en servicio no cambia
+                    model = copy.copy(old_model)
+                    model.estimators_ = list(old_model.estimators_)
+                    model.set_params(warm_start=True, n_estimators=len(old_model.estimators_) + trees)
+                    model.fit(X_new, y_new)
+                else:
+                    model = copy.deepcopy(old_model)
+                    model.partial_fit(X_new, y_new)
+                
+                feature_importance = self.convert_numpy_types(dict(zip(FEATURES, model.feature_importances_)))
+                metrics = {
+                    **serving['metrics'],
+                    'feature_importance': feature_importance,
+                    'mode': 'incremental',
+                    'new_records': int(len(X_new)),
+                    'new_records_mae': float(mae),
+                    'new_records_r2': float(r2) if r2 is not None else None
+                }
+                self.model = model
+                self._serve(
+                    model, serving['scaler'], serving['categories'], serving['fallback'], metrics,
+                    source='incremental', records=serving['records'] + int(len(X_new)),
+                    watermark=int(new['id'].max()), estimator=serving['estimator']
+                )
+                self.save_model()
+                return {**metrics, 'updated': True}
+            except Exception as e:
+                print(f"❌ Error en el entrenamiento incremental: {e}")
+                raise
+    
+    def new_records_report(self):
+        """
+        Registros nuevos desde la marca de agua y señales de deriva: error del
+        modelo sobre ellos frente a su MAE de entrenamiento, y desplazamiento de
+        la media de cada característica numérica (en desviaciones típicas).
+        """
+        serving = self._serving
+        if serving is None or not self._loaded.is_set():
+            return None
+        from sklearn.metrics import mean_absolute_error
+        df = self.data_processor.get_dataframe()
+        X_new, y_new = self._encode_frame(df[df['id'] > serving['watermark']], serving)
+        report = {'new_records': int(len(X_new)), 'watermark': serving['watermark']}
+        if len(X_new):
+            mae = mean_absolute_error(y_new, serving['model'].predict(X_new))
+            train_mae = serving['metrics'].get('mae') or 0
+            # X_new ya está escalado: la media de cada columna es el desplazamiento en desviaciones típicas
+            shift = np.abs(X_new[:, :len(NUMERIC_FEATURES)].mean(axis=0))
+            report.update({
                 'mae': float(mae),
-                'feature_importance': feature_importance
-            }
+                'mae_ratio': float(mae / train_mae) if train_mae else None,
+                'feature_shift': {col: round(float(v), 3) for col, v in zip(NUMERIC_FEATURES, shift)},
+                'max_feature_shift': float(shift.max())
+            })
+        return report
+    
+    def _encode_frame(self, df, serving):
+        """Características escaladas y objetivo de registros del dataset (se omiten filas incompletas)"""
+        X = np.empty((len(df), len(FEATURES)), dtype=np.float64)
+        for j, col in enumerate(NUMERIC_FEATURES):
+            X[:, j] = pd.to_numeric(df[col], errors='coerce').astype(float).to_numpy()
+        for j, col in enumerate(CATEGORICAL_FEATURES, start=len(NUMERIC_FEATURES)):
+            categories = serving['categories'][col]
+            codes = pd.Categorical(df[col].astype(object), categories=categories).codes.astype(np.int64)
+            codes[codes < 0] = categories.index(serving['fallback'][col])
+            X[:, j] = codes
+        y = pd.to_numeric(df['cells_produced'], errors='coerce').astype(float).to_numpy()
+        complete = np.isfinite(X).all(axis=1) & np.isfinite(y)
+        X, y = X[complete], y[complete]
+        if len(X):
+            X = serving['scaler'].transform(pd.DataFrame(X, columns=FEATURES))
+        return X, y
+    
+    # --- Modelo en servicio y artefacto en disco ---
+    
+    def _serve(self, model, scaler, categories, fallback, metrics, source, records, watermark,
+               estimator, trained_at=None):
+        """Publicar un modelo para las predicciones (reemplazo atómico)"""
+        self._serving = {
+            'model': model,
+            'scaler': scaler,
+            'categories': categories,
+            'fallback': fallback,
+            'metrics': metrics,
+            'source': source,
+            'trained_at': trained_at or datetime.now().isoformat(timespec='seconds'),
+            'records': records,
+            # Mayor id incluido en el entrenamiento: los registros posteriores son nuevos
+            'watermark': watermark,
+            'estimator': estimator
+        }
+    
+    def save_model(self):
+        """Guardar el modelo en servicio como artefacto versionado"""
+        serving = self._serving
+        if serving is None:
+            return
+        import joblib
+        import sklearn
+        try:
+            os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+            tmp_path = f"{self.model_path}.{os.getpid()}.tmp"
+            joblib.dump({
+                'format': ARTIFACT_FORMAT,
+                'sklearn_version': sklearn.__version__,
+                'features': FEATURES,
+                **{key: serving[key] for key in ('model', 'scaler', 'categories', 'fallback', 'metrics',
+                                                 'trained_at', 'records', 'watermark', 'estimator')}
+            }, tmp_path)
+            if self._shared is not None:
+                # Reemplazo y anuncio juntos: el último artefacto anunciado es el del disco
+                with self._shared.model_lock:
+                    os.replace(tmp_path, self.model_path)
+                    self._model_version = self._shared.bump_model_version()
+            else:
+                os.replace(tmp_path, self.model_path)
+            print(f"💾 Modelo guardado: {self.model_path}")
         except Exception as e:
-            print(f"❌ Error entrenando modelo: {e}")
-            raise
+            print(f"❌ Error guardando modelo: {e}")
+    
+    def load_model(self):
+        """
+        Cargar el artefacto del disco. Devuelve False si no existe o si fue
+        generado con otro formato, otra versión de scikit-learn u otras características.
+        """
+        if not os.path.exists(self.model_path):
+            return False
+        import joblib
+        import sklearn
+        from sklearn.preprocessing import LabelEncoder
+        try:
+            artifact = joblib.load(self.model_path)
+        except Exception as e:
+            print(f"❌ Error cargando modelo: {e}")
+            return False
+        if (artifact.get('format') != ARTIFACT_FORMAT
+                or artifact.get('sklearn_version') != sklearn.__version__
+                or artifact.get('features') != FEATURES):
+            print("⚠️ Artefacto de modelo incompatible, se reentrenará")
+            return False
+        
+        self.model = artifact['model']
+        self.scaler = artifact['scaler']
+        self.label_encoders = {}
+        for col, classes in artifact['categories'].items():
+            self.label_encoders[col] = LabelEncoder()
+            self.label_encoders[col].classes_ = np.array(classes, dtype=object)
+        self._serve(self.model, self.scaler, artifact['categories'], artifact['fallback'], artifact['metrics'],
+                    source='artifact', records=artifact['records'], watermark=artifact['watermark'],
+                    estimator=artifact['estimator'], trained_at=artifact['trained_at'])
+        print(f"✅ Modelo cargado ({artifact['records']} registros, entrenado {artifact['trained_at']})")
+        return True
+    
+    def load_or_train(self):
+        """Dejar un modelo listo al arrancar: el artefacto del disco o uno recién entrenado"""
+        if not self.load_model():
+            print("🤖 Entrenando modelo inicial...")
+            try:
+                self.train_model()
+            except Exception:
+                # La API arranca igual; /api/ml/train permite reintentar
+                pass
+    
+    def model_info(self):
+        serving = self._serving
+        if serving is None:
+            return None
+        return {key: serving[key] for key in ('source', 'trained_at', 'records', 'watermark', 'estimator')}
     
     def predict_cells(self, input_data):
         """Predecir producción de células"""
-        if self.model is None:
-            self.train_model()
-        
         try:
-            # Preparar datos de entrada
-            df_input = pd.DataFrame([input_data])
-            
-            # Codificar variables categóricas
-            for col in ['activity_type', 'gender']:
-                if col in input_data:
-                    if col in self.label_encoders:
-                        df_input[col + '_encoded'] = self.label_encoders[col].transform([input_data[col]])
-            
-            # Seleccionar características
-            features = ['duration_minutes', 'intensity', 'age', 'heart_rate_avg', 
-                       'calories_burned', 'sleep_hours', 'hydration_liters',
-                       'activity_type_encoded', 'gender_encoded']
-            
-            X_input = df_input[features]
-            X_scaled = self.scaler.transform(X_input)
-            
-            prediction = self.model.predict(X_scaled)[0]
-            
-            return int(prediction)
+            result = self.predict_batch([input_data])
+            if result['errors']:
+                error = result['errors'][0]
+                raise ValueError(f"{error.get('field', 'perfil')}: {error['error']}")
+            return result['predictions'][0]
         except Exception as e:
             print(f"❌ Error en predicción: {e}")
             raise
     
+    def encode_profiles(self, profiles):
+        """
+        Matriz de características (sin escalar) de varios perfiles.
+        Devuelve (X, filas válidas, errores, avisos); las categorías no vistas
+        en el entrenamiento se sustituyen por la más frecuente y se avisa.
+        """
+        serving = self._current()
+        columns = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+        errors, warnings = [], []
+        rows = []
+        for index, profile in enumerate(profiles):
+            if isinstance(profile, dict):
+                rows.append(tuple(profile.get(col) for col in columns))
+            else:
+                rows.append((None,) * len(columns))
+                errors.append({'row': index + 1, 'error': 'Se esperaba un objeto JSON'})
+        frame = pd.DataFrame.from_records(rows, columns=columns) if rows else pd.DataFrame(columns=columns)
+        n = len(frame)
+        valid = np.ones(n, dtype=bool)
+        valid[[e['row'] - 1 for e in errors]] = False
+        
+        X = np.empty((n, len(FEATURES)), dtype=np.float64)
+        for j, col in enumerate(NUMERIC_FEATURES):
+            values = pd.to_numeric(frame[col], errors='coerce').astype(float).to_numpy()
+            bad = valid & ~np.isfinite(values)
+            for position in np.flatnonzero(bad):
+                message = 'Campo requerido' if pd.isna(frame[col].iat[position]) else 'Se esperaba un número'
+                errors.append({'row': int(position) + 1, 'field': col, 'error': message})
+            valid &= ~bad
+            X[:, j] = values
+        
+        for j, col in enumerate(CATEGORICAL_FEATURES, start=len(NUMERIC_FEATURES)):
+            categories = serving['categories'][col]
+            codes = pd.Categorical(frame[col], categories=categories).codes.astype(np.int64)
+            unseen = valid & (codes < 0)
+            for position in np.flatnonzero(unseen):
+                warnings.append({'row': int(position) + 1, 'field': col,
+                                 'warning': f"Categoría desconocida {frame[col].iat[position]!r}, "
+                                            f"se usa {serving['fallback'][col]!r}"})
+            codes[codes < 0] = categories.index(serving['fallback'][col])
+            X[:, j] = codes
+        
+        errors.sort(key=lambda e: e['row'])
+        return X, valid, errors, warnings
+    
+    def predict_batch(self, profiles):
+        """Predecir la producción de células de muchos perfiles en una sola pasada"""
+        serving = self._current()
+        if serving is None:
+            raise RuntimeError("Modelo no disponible: entrénelo con /api/ml/train")
+        if len(profiles) > MAX_BATCH_ROWS:
+            raise ValueError(f"Demasiados perfiles: el máximo por lote es {MAX_BATCH_ROWS}")
+        
+        start = time.perf_counter()
+        X, valid, errors, warnings = self.encode_profiles(profiles)
+        predictions = [None] * len(X)
+        if valid.any():
+            X_scaled = serving['scaler'].transform(pd.DataFrame(X[valid], columns=FEATURES))
+            for position, value in zip(np.flatnonzero(valid), serving['model'].predict(X_scaled).astype(np.int64)):
+                predictions[position] = int(value)
+        elapsed = time.perf_counter() - start
+        
+        return {
+            'predictions': predictions,
+            'errors': errors,
+            'warnings': warnings,
+            'rows': len(predictions),
+            'elapsed_ms': round(elapsed * 1000, 3),
+            'rows_per_second': int(len(predictions) / elapsed) if elapsed > 0 else None,
+            'model': self.model_info()
+        }
+    
     def get_activity_recommendations(self, user_profile):
         """Generar recomendaciones de actividad optimizadas"""
         try:
-            activities = ['Running', 'Swimming', 'Cycling', 'Weight Training', 'Yoga', 'HIIT']
-            recommendations = []
+            # Una sola predicción para todas las actividades con la duración e intensidad del perfil
+            result = self.predict_batch([dict(user_profile, activity_type=activity) for activity in ACTIVITY_TYPES])
+            if result['errors']:
+                error = result['errors'][0]
+                raise ValueError(f"{error.get('field', 'perfil')}: {error['error']}")
             
-            for activity in activities:
-                test_input = user_profile.copy()
-                test_input['activity_type'] = activity
-                
-                predicted_cells = self.predict_cells(test_input)
-                
+            recommendations = []
+            for activity, predicted_cells in zip(ACTIVITY_TYPES, result['predictions']):
                 recommendations.append({
                     'activity': activity,
                     'predicted_cells': int(predicted_cells),
-                    'efficiency_score': float(predicted_cells / test_input['duration_minutes'])
+                    'efficiency_score': float(predicted_cells / user_profile['duration_minutes'])
                 })
             
             # Ordenar por eficiencia
@@ -141,4 +545,95 @@ class MLProcessor:
             return recommendations
         except Exception as e:
             print(f"❌ Error generando recomendaciones: {e}")
-            raise
\ No newline at end of file
+            raise
+    
+    def recommend_plans(self, profiles, durations=None, intensities=None, top_k=5):
+        """
+        Planes recomendados para uno o muchos usuarios.
+        
+        Para cada perfil se puntúa la rejilla actividad × duración × intensidad
+        (las calorías se derivan de duración e intensidad) y se devuelven los
+        `top_k` planes con más células por minuto. La rejilla de todos los
+        usuarios se evalúa como una sola matriz, en llamadas a model.predict de
+        hasta MAX_GRID_ROWS filas. Los tamaños (planes por usuario y filas en
+        total, MAX_PLAN_ROWS) se comprueban antes de crear ningún array.
+        """
+        serving = self._current()
+        if serving is None:
+            raise RuntimeError("Modelo no disponible: entrénelo con /api/ml/train")
+        durations = GRID_DURATIONS if durations is None else durations
+        intensities = GRID_INTENSITIES if intensities is None else intensities
+        if not isinstance(durations, (list, tuple)) or not isinstance(intensities, (list, tuple)):
+            raise ValueError("Duraciones e intensidades deben ser listas de números")
+        activities = serving['categories']['activity_type']
+        grid_size = len(activities) * len(durations) * len(intensities)
+        if grid_size > MAX_GRID_ROWS:
+            raise ValueError(f"La rejilla tiene {grid_size} planes por usuario (máximo {MAX_GRID_ROWS})")
+        if len(profiles) > MAX_BATCH_ROWS:
+            raise ValueError(f"Demasiados perfiles: el máximo por lote es {MAX_BATCH_ROWS}")
+        if len(profiles) * grid_size > MAX_PLAN_ROWS:
+            raise ValueError(f"Demasiadas filas: {len(profiles)} perfiles × {grid_size} planes "
+                             f"(máximo {MAX_PLAN_ROWS} por solicitud)")
+        durations = np.asarray(durations, dtype=np.float64)
+        intensities = np.asarray(intensities, dtype=np.float64)
+        if durations.ndim != 1 or intensities.ndim != 1 or not len(durations) or not len(intensities) \
+                or not np.isfinite(durations).all() or not np.isfinite(intensities).all() \
+                or (durations <= 0).any() or (intensities < 0).any() or (intensities > 1).any():
+            raise ValueError("Duraciones (> 0) e intensidades (0 a 1) no válidas")
+        top_k = max(1, int(top_k))
+        
+        start = time.perf_counter()
+        # Rejilla: actividad × duración × intensidad, aplanada
+        grid_activity, grid_duration, grid_intensity = [
+            axis.ravel() for axis in np.meshgrid(np.arange(len(activities)), durations, intensities, indexing='ij')]
+        grid_calories = np.floor(grid_duration * grid_intensity * CALORIES_PER_MINUTE)
+        
+        # Los campos de la rejilla no se piden en el perfil
+        grid_fields = {'duration_minutes': durations[0], 'intensity': intensities[0],
+                       'calories_burned': 0, 'activity_type': activities[0]}
+        users = [dict(profile, **grid_fields) if isinstance(profile, dict) else profile for profile in profiles]
+        X_users, valid, errors, warnings = self.encode_profiles(users)
+        X_users = X_users[valid]
+        
+        columns = {name: FEATURES.index(name) for name in
+                   ('duration_minutes', 'intensity', 'calories_burned', 'activity_type_encoded')}
+        grid_values = {'duration_minutes': grid_duration, 'intensity': grid_intensity,
+                       'calories_burned': grid_calories, 'activity_type_encoded': grid_activity}
+        
+        cells = np.empty((len(X_users), grid_size), dtype=np.int64)
+        users_per_call = max(1, MAX_GRID_ROWS // grid_size)
+        for first in range(0, len(X_users), users_per_call):
+            block = X_users[first:first + users_per_call]
+            X = np.repeat(block, grid_size, axis=0)
+            for name, column in columns.items():
+                X[:, column] = np.tile(grid_values[name], len(block))
+            X_scaled = serving['scaler'].transform(pd.DataFrame(X, columns=FEATURES))
+            cells[first:first + len(block)] = serving['model'].predict(X_scaled).astype(np.int64).reshape(len(block), grid_size)
+        
+        cells_per_minute = cells / grid_duration
+        k = min(top_k, grid_size)
+        best = np.argsort(-cells_per_minute, axis=1, kind='stable')[:, :k]
+        
+        plans = [None] * len(profiles)
+        for user, position in enumerate(np.flatnonzero(valid)):
+            plans[position] = [{
+                'activity': activities[grid_activity[i]],
+                'duration_minutes': float(grid_duration[i]),
+                'intensity': float(grid_intensity[i]),
+                'predicted_cells': int(cells[user, i]),
+                'cells_per_minute': round(float(cells_per_minute[user, i]), 2)
+            } for i in best[user]]
+        elapsed = time.perf_counter() - start
+        rows_scored = int(len(X_users) * grid_size)
+        
+        return {
+            'plans': plans,
+            'errors': errors,
+            'warnings': warnings,
+            'users': len(profiles),
+            'grid_size': grid_size,
+            'rows_scored': rows_scored,
+            'elapsed_ms': round(elapsed * 1000, 3),
+            'rows_per_second': int(rows_scored / elapsed) if elapsed > 0 else None,
+            'model': self.model_info()
+        }
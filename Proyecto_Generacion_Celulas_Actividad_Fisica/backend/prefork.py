@@ -0,0 +1,96 @@
+import os
+import sys
+import signal
+import time
+
+from werkzeug.serving import make_server
+
+# Espera del bucle del proceso principal entre revisiones de los procesos web
+POLL_INTERVAL = 0.5
+# Un proceso que termina antes de este tiempo se recrea con retraso (evita bucles de reinicio)
+MIN_LIFETIME = 1.0
+
+
+def serve(app, host, port, workers, on_worker_start=None, shared=None):
+    """
+    Servidor con procesos pre-creados (prefork).
+
+    El proceso principal ya tiene cargados la aplicación y el dataset; abre el
+    socket y crea `workers` procesos con fork que atienden solicitudes sobre
+    ese mismo socket. Cada proceso ejecuta `on_worker_start(slot)` tras el
+    fork (hilos y pools no sobreviven al fork) antes de arrancar ningún hilo
+    propio. Si un proceso termina, el
+    principal lo reemplaza en el mismo `slot`.
+
+    Con `shared` (SharedState) el proceso principal es el único escritor del
+    dataset: mientras vigila los procesos atiende sus escrituras, y cada
+    proceso web lee la instantánea compartida.
+    """
+    server = make_server(host, port, app, threaded=True)
+    children = {}
+    started = {}
+    delayed = {}
+    stopping = False
+
+    def spawn(slot):
+        connection = shared.open_channel(slot) if shared is not None else None
+        pid = os.fork()
+        if pid == 0:
+            # SystemExit en vez de matar el proceso: se ejecutan los atexit
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            try:
+                if shared is not None:
+                    shared.follow(connection)
+                if on_worker_start is not None:
+                    on_worker_start(slot)
+                if shared is not None:
+                    # Después de on_worker_start, que crea los pools con fork
+                    shared.start_watch()
+                server.serve_forever()
+            finally:
+                sys.exit(0)
+        if connection is not None:
+            connection.close()
+        children[pid] = slot
+        started[slot] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for slot in range(workers):
+        spawn(slot)
+    print(f"🚀 {workers} procesos atendiendo en http://{host}:{port} (principal {os.getpid()})")
+
+    while children or (delayed and not stopping):
+        if shared is not None:
+            shared.serve_writes(POLL_INTERVAL)
+        else:
+            time.sleep(POLL_INTERVAL)
+
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            slot = children.pop(pid, None)
+            if slot is None or stopping:
+                continue
+            print(f"⚠️ Proceso {pid} terminó (estado {status}), se reemplaza")
+            delayed[slot] = started[slot] + MIN_LIFETIME
+
+        for slot, due in list(delayed.items()):
+            if not stopping and time.monotonic() >= due:
+                del delayed[slot]
+                spawn(slot)
+    server.server_close()
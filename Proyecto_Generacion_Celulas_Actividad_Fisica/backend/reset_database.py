@@ -20,6 +20,11 @@ def reset_database():
         os.remove(data_file)
         print("🗑️  Archivo de datos existente eliminado")
     
+    # El diario de escrituras pendientes pertenece a los datos eliminados
+    journal_file = f"{os.path.splitext(data_file)[0]}.journal"
+    if os.path.exists(journal_file):
+        os.remove(journal_file)
+    
     try:
         # Crear nuevo procesador de datos (generará datos automáticamente)
         processor = DataProcessor(data_file)
@@ -0,0 +1,109 @@
+import time
+import threading
+from datetime import datetime
+
+
+class RetrainPolicy:
+    """
+    Reentrenamiento automático del modelo en segundo plano.
+
+    Tras cada escritura en `DataProcessor` (agrupadas durante `check_delay`
+    segundos) se revisan los registros posteriores a la marca de agua del
+    modelo en servicio:
+
+    - Deriva: con al menos `min_drift_records` registros nuevos, si el error
+      del modelo sobre ellos supera `drift_ratio` veces su MAE de entrenamiento
+      o la media de alguna característica se desplaza más de `feature_shift`
+      desviaciones típicas, se reentrena completo (escalador y categorías nuevos).
+    - Volumen: con al menos `min_new_records` registros nuevos se actualiza el
+      modelo de forma incremental.
+    """
+
+    def __init__(self, ml_processor, min_new_records=200, drift_ratio=1.5, feature_shift=0.5,
+                 min_drift_records=50, check_delay=5.0):
+        self.ml_processor = ml_processor
+        self.data_processor = ml_processor.data_processor
+        self.min_new_records = min_new_records
+        self.drift_ratio = drift_ratio
+        self.feature_shift = feature_shift
+        self.min_drift_records = min_drift_records
+        self.check_delay = check_delay
+        self._dirty = threading.Event()
+        self._started = False
+        self.last_check = None
+        self.last_action = None
+
+    def start(self):
+        """Empezar a revisar el modelo tras cada escritura"""
+        if self._started:
+            return
+        self._started = True
+        self.data_processor.subscribe(lambda version: self._dirty.set())
+        threading.Thread(target=self._loop, name='ml-retrain', daemon=True).start()
+        print(f"🤖 Reentrenamiento automático activo (cada {self.min_new_records} registros nuevos o por deriva)")
+
+    def _loop(self):
+        while True:
+            self._dirty.wait()
+            # Agrupar las ráfagas de escrituras en una sola revisión
+            time.sleep(self.check_delay)
+            self._dirty.clear()
+            try:
+                self.check()
+            except Exception as e:
+                print(f"❌ Error en el reentrenamiento automático: {e}")
+
+    def decide(self, report):
+        """('full' | 'incremental' | None, motivo) según el informe de registros nuevos"""
+        if report is None:
+            return 'full', "No hay modelo en servicio"
+        new_records = report['new_records']
+        if new_records >= self.min_drift_records:
+            if report['mae_ratio'] is not None and report['mae_ratio'] > self.drift_ratio:
+                return 'full', f"Error {report['mae_ratio']:.2f} veces el de entrenamiento"
+            if report['max_feature_shift'] > self.feature_shift:
+                return 'full', f"Desplazamiento de {report['max_feature_shift']:.2f} desviaciones típicas"
+        if new_records >= self.min_new_records:
+            return 'incremental', f"{new_records} registros nuevos"
+        return None, None
+
+    def check(self):
+        """Revisar los registros nuevos y reentrenar si corresponde"""
+        if self.ml_processor.loading:
+            # El modelo se está cargando al arrancar: se revisará en la próxima escritura
+            return None
+        report = self.ml_processor.new_records_report()
+        action, reason = self.decide(report)
+        self.last_check = {'at': datetime.now().isoformat(timespec='seconds'), 'report': report}
+        if action is None:
+            return None
+
+        print(f"🔄 Reentrenamiento automático ({action}): {reason}")
+        start = time.perf_counter()
+        if action == 'full':
+            estimator = (self.ml_processor.model_info() or {}).get('estimator', 'forest')
+            metrics = self.ml_processor.train_model(estimator)
+        else:
+            metrics = self.ml_processor.train_incremental()
+        self.last_action = {
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'action': action,
+            'reason': reason,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+            'r2_score': metrics.get('r2_score'),
+            'mae': metrics.get('mae')
+        }
+        return action
+
+    def status(self):
+        return {
+            'enabled': self._started,
+            'thresholds': {
+                'min_new_records': self.min_new_records,
+                'min_drift_records': self.min_drift_records,
+                'drift_ratio': self.drift_ratio,
+                'feature_shift': self.feature_shift
+            },
+            'last_check': self.last_check,
+            'last_action': self.last_action
+        }
@@ -0,0 +1,362 @@
+import os
+import glob
+import json
+import atexit
+import hashlib
+import mmap
+import time
+import pickle
+import tempfile
+import threading
+import multiprocessing
+from multiprocessing.connection import wait as wait_connections
+
+import numpy as np
+import pandas as pd
+
+# Alineación de cada columna dentro del archivo de una instantánea
+_ALIGNMENT = 64
+# Instantáneas anteriores que se conservan para los procesos que aún las leen
+KEEP_SNAPSHOTS = 4
+# Intervalo con que los procesos web revisan la versión compartida
+WATCH_INTERVAL = 0.2
+# Espera máxima de un proceso web hasta ver publicada su propia escritura
+PUBLISH_TIMEOUT = 30
+
+
+def snapshot_directory():
+    """Directorio de las instantáneas: memoria compartida (/dev/shm) si existe"""
+    return '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def write_snapshot(path, frame):
+    """
+    Guardar un DataFrame columnar en un archivo que se puede mapear (mmap).
+    Formato: longitud de la cabecera (8 bytes), cabecera JSON y una sección
+    alineada por columna: los arrays numéricos y los códigos de las categóricas
+    en binario; el resto (texto) con pickle. El archivo se reemplaza atómicamente.
+    """
+    columns, blocks = [], []
+    offset = 0
+    for name in frame.columns:
+        column = frame[name]
+        entry = {'name': name}
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy()
+            entry.update(kind='category', dtype=codes.dtype.str, categories=column.cat.categories.tolist())
+            data = codes.tobytes()
+        elif column.dtype.kind in 'biuf':
+            array = column.to_numpy()
+            entry.update(kind='array', dtype=array.dtype.str)
+            data = array.tobytes()
+        else:
+            entry['kind'] = 'pickle'
+            data = pickle.dumps(column.to_numpy(dtype=object), protocol=pickle.HIGHEST_PROTOCOL)
+        offset = _aligned(offset)
+        entry.update(offset=offset, size=len(data))
+        columns.append(entry)
+        blocks.append((offset, data))
+        offset += len(data)
+
+    header = json.dumps({'rows': len(frame), 'columns': columns}, ensure_ascii=False).encode('utf-8')
+    base = _aligned(8 + len(header))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for block_offset, data in blocks:
+            f.seek(base + block_offset)
+            f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """
+    DataFrame de una instantánea. Las columnas numéricas y los códigos de las
+    categóricas son vistas de solo lectura sobre el archivo mapeado: todos los
+    procesos comparten las mismas páginas de memoria.
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header_size = int.from_bytes(buffer[:8], 'little')
+    header = json.loads(buffer[8:8 + header_size])
+    base = _aligned(8 + header_size)
+    rows = header['rows']
+
+    data = {}
+    for entry in header['columns']:
+        start = base + entry['offset']
+        if entry['kind'] == 'pickle':
+            data[entry['name']] = pickle.loads(buffer[start:start + entry['size']])
+            continue
+        if rows:
+            array = np.frombuffer(buffer, dtype=entry['dtype'], count=rows, offset=start)
+        else:
+            array = np.empty(0, dtype=entry['dtype'])
+        if entry['kind'] == 'category':
+            array = pd.Categorical.from_codes(array, categories=entry['categories'])
+        data[entry['name']] = array
+    return pd.DataFrame(data, copy=False)
+
+
+class SharedState:
+    """
+    Estado compartido entre el proceso escritor y los procesos web del modo prefork.
+
+    El proceso principal es el único escritor: es dueño de `DataProcessor`
+    (diario y JSON) y ejecuta las escrituras que los procesos web le envían por
+    un pipe por proceso (`serve_writes`). Las escrituras se agrupan: la primera
+    programa una publicación a los `publish_delay` segundos y las que llegan
+    mientras tanto se publican con ella, en una sola instantánea columnar del
+    dataset en un archivo (en /dev/shm si existe); después se incrementa la
+    versión compartida. La respuesta de una escritura lleva su versión y el
+    proceso web espera a que esa versión esté publicada: cada proceso ve sus
+    propias escrituras.
+
+    Los procesos web (`follow`) mapean la instantánea de la versión actual y
+    ofrecen a su `DataProcessor` la misma interfaz de lectura que ColumnarStore
+    (`frame()`, `len()`). Un hilo (`start_watch`) revisa la versión compartida
+    y avisa a los suscriptores (caché de gráficos, reentrenamiento) cuando cambia. Una
+    segunda versión compartida, la del modelo, hace que cada proceso recargue
+    el artefacto cuando otro lo reentrena. Los gráficos renderizados por un
+    proceso se guardan junto a la instantánea de su versión (`put_chart`) para
+    que los demás no los repitan.
+    """
+
+    def __init__(self, data_processor, workers, directory=None, publish_delay=0.02):
+        self.data_processor = data_processor
+        self.publish_delay = publish_delay
+        self.directory = directory or snapshot_directory()
+        self._owner = os.getpid()
+        self._prefix = os.path.join(self.directory, f"cells-snapshot-{self._owner}-")
+        # Memoria compartida entre procesos (creada antes del fork)
+        self._version = multiprocessing.RawValue('q', 0)
+        self._model_version = multiprocessing.Value('q', 0)
+        # Avisa a los procesos web que esperan una versión (call)
+        self._published_condition = multiprocessing.Condition()
+
+        # Proceso escritor: extremo de cada pipe y archivos publicados
+        self._channels = [None] * workers
+        self._published = []
+        self._publish_due = None
+        self._handlers = {
+            'add_record': data_processor.add_record,
+            'add_records': data_processor.add_records,
+            'update_record': data_processor.update_record,
+            'delete_record': data_processor.delete_record,
+            'get_record': data_processor.get_record,
+            'data': lambda: data_processor.data
+        }
+
+        # Proceso web: pipe hacia el escritor e instantánea mapeada
+        self._connection = None
+        self._call_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._snapshot = None
+        self._seen_version = 0
+        self._watching = False
+
+        self.publish()
+        data_processor.subscribe(self._schedule_publish)
+        atexit.register(self.close)
+
+    @property
+    def version(self):
+        return self._version.value
+
+    @property
+    def model_version(self):
+        return self._model_version.value
+
+    @property
+    def model_lock(self):
+        """Lock entre procesos para reemplazar el artefacto y anunciarlo a la vez"""
+        return self._model_version.get_lock()
+
+    def bump_model_version(self):
+        """Anunciar un artefacto de modelo nuevo; devuelve la nueva versión"""
+        with self._model_version.get_lock():
+            self._model_version.value += 1
+            return self._model_version.value
+
+    def _path(self, version):
+        return f"{self._prefix}{version}.bin"
+
+    # --- Proceso escritor ---
+
+    def _schedule_publish(self, version):
+        """Tras una escritura: publicar dentro de `publish_delay` segundos junto con las siguientes"""
+        if self._publish_due is None:
+            self._publish_due = time.monotonic() + self.publish_delay
+
+    def publish(self):
+        """Publicar la instantánea de la versión actual y avisar a los procesos que la esperan"""
+        self._publish_due = None
+        version, frame = self.data_processor.snapshot()
+        path = self._path(version)
+        write_snapshot(path, frame)
+        with self._published_condition:
+            self._version.value = version
+            self._published_condition.notify_all()
+        self._published.append(path)
+        while len(self._published) > KEEP_SNAPSHOTS:
+            old_path = self._published.pop(0)
+            self._remove(old_path)
+            for chart_path in glob.glob(f"{old_path[:-len('.bin')]}-chart-*"):
+                self._remove(chart_path)
+
+    def open_channel(self, slot):
+        """Pipe nuevo para el proceso web `slot`; devuelve el extremo del proceso web"""
+        if self._channels[slot] is not None:
+            self._channels[slot].close()
+        self._channels[slot], worker_end = multiprocessing.Pipe()
+        return worker_end
+
+    def serve_writes(self, timeout):
+        """
+        Atender las operaciones pendientes de los procesos web (hasta `timeout`
+        segundos de espera) y publicar si ya toca.
+        """
+        if self._publish_due is not None:
+            timeout = max(0.0, min(timeout, self._publish_due - time.monotonic()))
+        channels = [connection for connection in self._channels if connection is not None]
+        if not channels:
+            time.sleep(timeout)
+        else:
+            self._serve(wait_connections(channels, timeout))
+        if self._publish_due is not None and time.monotonic() >= self._publish_due:
+            self.publish()
+
+    def _serve(self, connections):
+        for connection in connections:
+            try:
+                method, args = connection.recv()
+            except (EOFError, OSError):
+                # El proceso web terminó: su pipe se reemplaza al recrearlo
+                self._channels[self._channels.index(connection)] = None
+                connection.close()
+                continue
+            try:
+                # La versión de los datos tras la operación: el proceso web espera a verla publicada
+                reply = ('ok', self._handlers[method](*args), self.data_processor.version)
+            except Exception as e:
+                reply = ('error', e, 0)
+            try:
+                connection.send(reply)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                connection.send(('error', RuntimeError(str(reply[1])), 0))
+            except OSError:
+                pass
+
+    def close(self):
+        """Eliminar las instantáneas y gráficos publicados (solo en el proceso escritor)"""
+        if os.getpid() != self._owner:
+            return
+        for path in glob.glob(f"{self._prefix}*"):
+            self._remove(path)
+        self._published = []
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    # --- Procesos web ---
+
+    def follow(self, connection):
+        """Convertir el proceso actual (recién creado con fork) en lector del estado compartido"""
+        self._connection = connection
+        for channel in self._channels:
+            if channel is not None:
+                channel.close()
+        self._channels = []
+        self._published = []
+        # Solo el proceso escritor publica instantáneas
+        self.data_processor._subscribers.remove(self._schedule_publish)
+        self.data_processor.follow(self)
+        # Versión ya vista: el hilo que la vigila arranca después (start_watch)
+        self._seen_version = self.version
+        self._watching = False
+
+    def start_watch(self):
+        """
+        Arrancar el hilo que avisa a los suscriptores de las versiones nuevas.
+        Se llama tras crear los pools del proceso web: el fork de un pool debe
+        ocurrir antes de arrancar cualquier hilo.
+        """
+        if not self._watching:
+            self._watching = True
+            threading.Thread(target=self._watch, name='shared-version', daemon=True).start()
+
+    def _watch(self):
+        seen = self._seen_version
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            version = self.version
+            if version != seen:
+                seen = version
+                self.data_processor._notify(version)
+
+    def call(self, method, *args):
+        """
+        Ejecutar una operación de DataProcessor en el proceso escritor y
+        esperar a que su versión de los datos esté publicada.
+        """
+        with self._call_lock:
+            self._connection.send((method, args))
+            status, result, version = self._connection.recv()
+        if status == 'error':
+            raise result
+        if self.version < version:
+            with self._published_condition:
+                self._published_condition.wait_for(lambda: self.version >= version, PUBLISH_TIMEOUT)
+        return result
+
+    def snapshot(self):
+        """(versión, DataFrame) de la instantánea publicada más reciente"""
+        version = self.version
+        cached = self._snapshot
+        if cached is None or cached[0] != version:
+            with self._read_lock:
+                cached = self._snapshot
+                while cached is None or cached[0] != version:
+                    try:
+                        cached = (version, read_snapshot(self._path(version)))
+                    except FileNotFoundError:
+                        # Ya reemplazada por publicaciones más nuevas: leer la actual
+                        if self.version == version:
+                            raise
+                        version = self.version
+                self._snapshot = cached
+        return cached[0], cached[1].copy(deep=False)
+
+    def frame(self):
+        return self.snapshot()[1]
+
+    def _chart_path(self, version, key):
+        return f"{self._prefix}{version}-chart-{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]}"
+
+    def put_chart(self, version, key, body):
+        """Compartir el JSON de un gráfico de esa versión de los datos"""
+        path = self._chart_path(version, key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def get_chart(self, version, key):
+        """JSON de un gráfico renderizado por otro proceso, o None"""
+        try:
+            with open(self._chart_path(version, key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def __len__(self):
+        return len(self.snapshot()[1])
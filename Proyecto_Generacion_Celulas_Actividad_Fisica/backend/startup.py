@@ -0,0 +1,58 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+
+class StartupReport:
+    """
+    Desglose del tiempo de arranque de la API por fases.
+
+    Las fases síncronas (antes de atender solicitudes) se miden con `phase()`;
+    las que siguen en segundo plano (carga del modelo, precálculo de gráficos)
+    también, pero no retrasan `ready()`. Los tiempos son milisegundos desde
+    que se importó este módulo.
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._phases = []
+        self._ready_ms = None
+
+    def _now_ms(self):
+        return round((time.perf_counter() - self._origin) * 1000, 1)
+
+    @contextmanager
+    def phase(self, name, background=False):
+        """Medir una fase del arranque"""
+        start = self._now_ms()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            entry = {'phase': name, 'start_ms': start, 'elapsed_ms': round(self._now_ms() - start, 1),
+                     'background': background, 'pid': os.getpid()}
+            if error is not None:
+                entry['error'] = error
+            with self._lock:
+                self._phases.append(entry)
+
+    def ready(self):
+        """Marcar el momento en que la API puede atender solicitudes e imprimir el desglose"""
+        self._ready_ms = self._now_ms()
+        print(f"⏱️ API lista en {self._ready_ms:.0f} ms")
+        for entry in self.report()['phases']:
+            print(f"   {'↪' if entry['background'] else '•'} {entry['phase']}: {entry['elapsed_ms']:.0f} ms")
+
+    def report(self):
+        with self._lock:
+            phases = list(self._phases)
+        return {'ready_ms': self._ready_ms, 'phases': phases}
+
+
+# Instancia del proceso: se crea al importar, antes que las dependencias pesadas
+STARTUP = StartupReport()
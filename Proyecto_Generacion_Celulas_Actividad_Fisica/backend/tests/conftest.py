@@ -0,0 +1,37 @@
+import os
+import sys
+import json
+
+import pytest
+
+# Los módulos del backend se importan por su nombre, como hace app.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_record(record_id=None, **overrides):
+    """Registro válido con el esquema de generate_sample_data"""
+    record = {
+        'date': '2024-01-15',
+        'activity_type': 'Running',
+        'duration_minutes': 45.0,
+        'intensity': 0.8,
+        'age': 30,
+        'gender': 'Female',
+        'cells_produced': 1200000,
+        'heart_rate_avg': 150,
+        'calories_burned': 288,
+        'sleep_hours': 7.5,
+        'hydration_liters': 2.0
+    }
+    if record_id is not None:
+        record['id'] = record_id
+    record.update(overrides)
+    return record
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    """JSON con tres registros (ids 1-3) en un directorio temporal"""
+    path = tmp_path / 'activity_data.json'
+    path.write_text(json.dumps([make_record(i) for i in (1, 2, 3)]), encoding='utf-8')
+    return str(path)
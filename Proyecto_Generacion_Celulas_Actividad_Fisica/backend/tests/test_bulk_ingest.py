@@ -0,0 +1,88 @@
+import io
+import json
+
+import pytest
+
+from conftest import make_record
+from bulk_ingest import FIELDS, BulkIngestError, detect_format, ingest
+from data_processor import DataProcessor
+
+
+@pytest.fixture
+def processor(data_file):
+    return DataProcessor(data_file, flush_delay=3600)
+
+
+def csv_body(*rows):
+    lines = [','.join(FIELDS)] + [','.join(str(row[field]) for field in FIELDS) for row in rows]
+    return io.BytesIO('\n'.join(lines).encode('utf-8'))
+
+
+def errors_by_row(result):
+    return {(error['row'], error.get('field')): error['error'] for error in result['errors']}
+
+
+def test_csv_reports_each_invalid_row_and_saves_the_rest(processor):
+    body = csv_body(
+        make_record(),
+        make_record(age=12.5),
+        make_record(activity_type='Tennis', heart_rate_avg=400),
+        make_record(date='2024-13-40'),
+        make_record(duration_minutes=''),
+        make_record()
+    )
+    result = ingest(processor, body, 'csv')
+
+    assert result['inserted'] == 2
+    assert result['rejected'] == 4
+    assert (result['first_id'], result['last_id']) == (4, 5)
+    errors = errors_by_row(result)
+    assert set(errors) == {(2, 'age'), (3, 'activity_type'), (3, 'heart_rate_avg'), (4, 'date'),
+                           (5, 'duration_minutes')}
+    assert errors[(2, 'age')] == "Se esperaba un entero"
+    assert errors[(5, 'duration_minutes')] == "Campo requerido"
+    assert processor.count() == 5
+
+
+def test_csv_row_with_wrong_column_count(processor):
+    body = io.BytesIO(f"{','.join(FIELDS)}\n1,2,3\n".encode('utf-8'))
+    result = ingest(processor, body, 'csv')
+
+    assert result['inserted'] == 0
+    assert result['received'] == 1
+    assert result['errors'] == [{'row': 1, 'error': f"Se esperaban {len(FIELDS)} columnas y hay 3"}]
+
+
+def test_json_booleans_are_not_numbers(processor):
+    body = io.BytesIO(json.dumps([make_record(age=True), make_record(intensity=False), make_record()]).encode('utf-8'))
+    result = ingest(processor, body, 'json')
+
+    assert result['inserted'] == 1
+    assert errors_by_row(result) == {(1, 'age'): "Se esperaba un número",
+                                     (2, 'intensity'): "Se esperaba un número"}
+
+
+def test_ndjson_reports_unreadable_lines(processor):
+    lines = [json.dumps(make_record()), '{"age": ', '', json.dumps(make_record(gender='X'))]
+    result = ingest(processor, io.BytesIO('\n'.join(lines).encode('utf-8')), 'ndjson')
+
+    assert result['inserted'] == 1
+    assert [(error['row'], error.get('field')) for error in result['errors']] == [(2, None), (4, 'gender')]
+
+
+def test_valid_rows_are_saved_with_one_journal_entry(processor):
+    result = ingest(processor, csv_body(make_record(), make_record(), make_record()), 'csv')
+
+    assert result['success'] and result['inserted'] == 3
+    with open(processor.journal_file, encoding='utf-8') as f:
+        assert [json.loads(line)['op'] for line in f] == ['add_batch']
+    saved = processor.get_record(result['last_id'])
+    assert saved['age'] == 30 and isinstance(saved['age'], int)
+    assert saved['intensity'] == 0.8
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(BulkIngestError) as error:
+        detect_format('text/plain')
+    assert error.value.status == 415
+    assert detect_format('text/plain', 'NDJSON') == 'ndjson'
@@ -0,0 +1,60 @@
+import random
+
+import pandas as pd
+
+from conftest import make_record
+from columnar_store import ColumnarStore
+
+
+def rows(frame):
+    return frame.astype(object).to_dict('records')
+
+
+def test_matches_a_fresh_load_after_random_writes():
+    rng = random.Random(7)
+    records = {i: make_record(i, age=20 + i) for i in range(1, 51)}
+    store = ColumnarStore(records.values())
+    next_id = 51
+    for step in range(500):
+        action = rng.random()
+        if action < 0.4 or not records:
+            record = make_record(next_id, activity_type=rng.choice(['Yoga', 'HIIT']), age=rng.randint(18, 80))
+            records[next_id] = record
+            store.append(record)
+            next_id += 1
+        elif action < 0.7:
+            record_id = rng.choice(list(records))
+            records[record_id] = make_record(record_id, intensity=rng.random())
+            store.replace(record_id, records[record_id])
+        else:
+            record_id = rng.choice(list(records))
+            del records[record_id]
+            store.remove(record_id)
+        if step % 50 == 0:
+            # Las lecturas intermedias compactan las lápidas pendientes
+            store.frame()
+
+    assert len(store) == len(records)
+    assert rows(store.frame()) == rows(ColumnarStore(records.values()).frame())
+    for position, record_id in enumerate(records):
+        assert store.position(record_id) == position
+
+
+def test_remove_keeps_earlier_snapshots_intact():
+    store = ColumnarStore(make_record(i) for i in (1, 2, 3))
+    before = store.frame()
+    store.remove(2)
+
+    assert list(before['id']) == [1, 2, 3]
+    assert list(store.frame()['id']) == [1, 3]
+    assert store.position(2) is None
+    assert store.position(3) == 1
+
+
+def test_removed_categories_are_not_exposed():
+    store = ColumnarStore([make_record(1, gender='Male'), make_record(2, gender='Female')])
+    store.remove(1)
+    gender = store.frame()['gender']
+
+    assert isinstance(gender.dtype, pd.CategoricalDtype)
+    assert list(gender.cat.categories) == ['Female']
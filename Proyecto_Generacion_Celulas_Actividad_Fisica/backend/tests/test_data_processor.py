@@ -0,0 +1,104 @@
+import os
+import json
+
+from conftest import make_record
+from data_processor import DataProcessor
+
+
+def open_processor(data_file):
+    # Sin volcados en segundo plano: el JSON solo cambia con flush()
+    return DataProcessor(data_file, flush_delay=3600)
+
+
+def read_json(data_file):
+    with open(data_file, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_journal_replays_unflushed_writes(data_file):
+    processor = open_processor(data_file)
+    added = processor.add_record(make_record(age=41))
+    processor.add_records([make_record(), make_record()])
+    processor.update_record(2, make_record(age=55))
+    processor.delete_record(1)
+
+    # Nada volcado: el JSON sigue como al principio y todo está en el diario
+    assert [record['id'] for record in read_json(data_file)] == [1, 2, 3]
+
+    reopened = open_processor(data_file)
+    assert sorted(record['id'] for record in reopened.data) == [2, 3, added['id'], 5, 6]
+    assert reopened.get_record(2)['age'] == 55
+    assert reopened.get_record(added['id'])['age'] == 41
+    assert reopened.get_record(1) is None
+    assert reopened.count() == 5
+
+
+def test_journal_ignores_a_torn_last_line(data_file):
+    processor = open_processor(data_file)
+    processor.add_record(make_record())
+    with open(processor.journal_file, 'a', encoding='utf-8') as f:
+        f.write('{"op": "add", "record": {"id": 9')
+
+    reopened = open_processor(data_file)
+    assert sorted(record['id'] for record in reopened.data) == [1, 2, 3, 4]
+
+
+def test_flush_writes_json_and_trims_journal(data_file):
+    processor = open_processor(data_file)
+    processor.add_record(make_record())
+    processor.flush()
+
+    assert [record['id'] for record in read_json(data_file)] == [1, 2, 3, 4]
+    with open(processor.journal_file, encoding='utf-8') as f:
+        assert [json.loads(line)['op'] for line in f] == ['next_id']
+
+
+def test_ids_are_not_reused_after_restart(data_file):
+    processor = open_processor(data_file)
+    processor.add_records([make_record(), make_record()])
+    processor.delete_record(5)
+    processor.delete_record(4)
+
+    # Sin volcar: el diario conserva los ids asignados
+    assert open_processor(data_file).add_record(make_record())['id'] == 6
+
+    # Volcado: el JSON ya no tiene los ids eliminados, la cabecera del diario sí
+    processor = open_processor(data_file)
+    processor.delete_record(6)
+    processor.flush()
+    assert max(record['id'] for record in read_json(data_file)) == 3
+    assert open_processor(data_file).add_record(make_record())['id'] == 7
+
+
+def test_batch_ids_are_consecutive(data_file):
+    processor = open_processor(data_file)
+    records = processor.add_records([make_record(id=99), make_record(), make_record()])
+    # El id recibido se ignora: los ids los asigna el procesador
+    assert [record['id'] for record in records] == [4, 5, 6]
+
+
+def test_reader_does_not_flush_over_another_writer(data_file):
+    writer = open_processor(data_file)
+    writer.add_record(make_record())
+    writer.flush()
+
+    # Como el padre del recargador: carga al arrancar (diario con la cabecera next_id) y no escribe
+    reader = open_processor(data_file)
+    writer = open_processor(data_file)
+    added = writer.add_record(make_record(age=60))
+    reader.flush()
+
+    reopened = open_processor(data_file)
+    assert reopened.get_record(added['id'])['age'] == 60
+    assert reopened.count() == 5
+
+
+def test_flush_only_after_own_writes(data_file):
+    processor = open_processor(data_file)
+    processor.add_record(make_record())
+    processor.flush()
+    mtime = os.stat(data_file).st_mtime_ns
+
+    processor.flush()
+    open_processor(data_file).flush()
+    assert os.stat(data_file).st_mtime_ns == mtime
@@ -0,0 +1,56 @@
+import math
+
+import pytest
+
+import ml_models
+from data_processor import DataProcessor
+from ml_models import MLProcessor
+
+PROFILE = {'age': 30, 'gender': 'Female', 'heart_rate_avg': 140, 'sleep_hours': 7.5, 'hydration_liters': 2.0}
+
+
+@pytest.fixture(scope='module')
+def processor(tmp_path_factory):
+    # Sin archivo de datos se generan los 1000 registros de ejemplo
+    data_file = str(tmp_path_factory.mktemp('data') / 'fitness_data.json')
+    processor = MLProcessor(DataProcessor(data_file, flush_delay=3600))
+    processor.train_model('sgd')
+    return processor
+
+
+def test_plans_for_default_grid(processor):
+    result = processor.recommend_plans([PROFILE, PROFILE], top_k=3)
+
+    assert result['grid_size'] == 6 * len(ml_models.GRID_DURATIONS) * len(ml_models.GRID_INTENSITIES)
+    assert [len(plans) for plans in result['plans']] == [3, 3]
+    per_minute = [plan['cells_per_minute'] for plan in result['plans'][0]]
+    assert per_minute == sorted(per_minute, reverse=True)
+
+
+@pytest.mark.parametrize('durations, intensities', [
+    ([30, math.nan], [0.5]),
+    ([30, math.inf], [0.5]),
+    ([30], [0.5, math.nan]),
+    ([[30, 45]], [0.5]),
+    ([0], [0.5]),
+    ([30], [1.5]),
+    ([], [0.5]),
+    (30, [0.5]),
+])
+def test_invalid_grid_values_are_rejected(processor, durations, intensities):
+    with pytest.raises(ValueError):
+        processor.recommend_plans([PROFILE], durations=durations, intensities=intensities)
+
+
+def test_grid_size_is_capped_before_building_arrays(processor):
+    durations = list(range(1, 10001))
+    with pytest.raises(ValueError, match='planes por usuario'):
+        processor.recommend_plans([PROFILE], durations=durations, intensities=[0.5] * 10)
+
+
+def test_total_rows_are_capped(processor, monkeypatch):
+    monkeypatch.setattr(ml_models, 'MAX_PLAN_ROWS', 1000)
+    grid = {'durations': [30, 60], 'intensities': [0.5, 0.75]}
+    assert processor.recommend_plans([PROFILE] * 40, **grid)['rows_scored'] == 40 * 24
+    with pytest.raises(ValueError, match='Demasiadas filas'):
+        processor.recommend_plans([PROFILE] * 50, **grid)
@@ -0,0 +1,62 @@
+import time
+import threading
+import multiprocessing
+
+import pandas as pd
+
+from conftest import make_record
+from data_processor import DataProcessor
+from shared_state import SharedState, read_snapshot, write_snapshot
+
+
+def test_snapshot_round_trip(tmp_path):
+    frame = pd.DataFrame({
+        'id': [1, 2, 3],
+        'intensity': [0.5, 0.75, 1.0],
+        'gender': pd.Categorical(['Male', 'Female', 'Male']),
+        'date': ['2024-01-01', '2024-01-02', '2024-01-03']
+    })
+    path = str(tmp_path / 'snapshot.bin')
+    write_snapshot(path, frame)
+
+    pd.testing.assert_frame_equal(read_snapshot(path), frame)
+
+
+def _worker(shared, connection, results):
+    """Proceso web: escribe a través del escritor y lee en seguida su propia escritura"""
+    shared.follow(connection)
+    # Ningún hilo antes de start_watch: los pools del proceso web se crean antes con fork
+    threads_after_follow = threading.active_count()
+    shared.start_watch()
+    processor = shared.data_processor
+    observed = []
+    for age in range(20, 30):
+        record = processor.add_record(make_record(age=age))
+        observed.append((record['id'], processor.count(), int(processor.get_dataframe()['id'].max())))
+    results.send((threads_after_follow, observed))
+
+
+def test_worker_reads_its_own_writes(data_file, tmp_path):
+    processor = DataProcessor(data_file, flush_delay=3600)
+    # Un retraso de publicación largo agrupa las escrituras: la espera de call() es la que cuenta
+    shared = SharedState(processor, workers=1, directory=str(tmp_path), publish_delay=0.2)
+    context = multiprocessing.get_context('fork')
+    results, worker_results = context.Pipe(duplex=False)
+    worker = context.Process(target=_worker, args=(shared, shared.open_channel(0), worker_results))
+    worker.start()
+
+    deadline = time.monotonic() + 30
+    while not results.poll() and time.monotonic() < deadline:
+        shared.serve_writes(0.05)
+    threads_after_follow, observed = results.recv()
+    worker.join(5)
+    shared.close()
+
+    assert threads_after_follow == 1
+    assert [record_id for record_id, _, _ in observed] == list(range(4, 14))
+    # Tras cada escritura el proceso web ya ve una versión que la incluye
+    for record_id, count, last_id in observed:
+        assert count == record_id
+        assert last_id >= record_id
+    assert processor.count() == 13
+    assert shared.version == processor.version
@@ -1,8 +1,12 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, url_for
 from flask_cors import CORS
 from data_processor import DataProcessor
-from ml_analyzer import MLAnalyzer
+from chart_cache import CHARTS, ChartCache
+from model_registry import ModelRegistry
+from ml_analyzer import start_process_pool
+from scenario_engine import ScenarioEngine
 import os
+import base64
 import logging
 import json
 
@@ -15,11 +19,13 @@ CORS(app)  # Esto permite todas las origins - para desarrollo
 
 # Variables globales para los procesadores
 data_processor = None
-ml_analyzer = None
+model_registry = None
+scenario_engine = None
+chart_cache = None
 
 def initialize_processors():
     """Inicializar procesadores con manejo robusto de errores"""
-    global data_processor, ml_analyzer
+    global data_processor, model_registry, scenario_engine, chart_cache
     
     try:
         data_file = 'greenhouse_gas_data.json'
@@ -44,7 +50,19 @@ def initialize_processors():
         
         # Inicializar procesadores
         data_processor = DataProcessor(data_file)
-        ml_analyzer = MLAnalyzer(data_file)
+        # Los modelos se entrenan una vez por versión del archivo de datos,
+        # los avanzados en paralelo (ML_WORKERS procesos; por defecto uno por núcleo),
+        # y después se precalculan los intervalos bootstrap por defecto
+        ml_workers = int(os.environ.get('ML_WORKERS', 0)) or None
+        model_registry = ModelRegistry(
+            data_file,
+            workers=ml_workers,
+            bootstrap_model=os.environ.get('ML_BOOTSTRAP_MODEL', 'gradient_boosting'),
+            bootstrap_replicates=int(os.environ.get('ML_BOOTSTRAP_REPLICATES', 100))
+        )
+        scenario_engine = ScenarioEngine(model_registry)
+        # PNG de los gráficos por versión de los datos, renderizados en el pool de entrenamiento
+        chart_cache = ChartCache(data_file, model_registry.data_version)
         
         logger.info("✅ Procesadores de datos inicializados correctamente")
         return True
@@ -56,6 +74,13 @@ def initialize_processors():
 # Inicializar al importar
 initialize_processors()
 
+# Con el recargador de Flask, solo el proceso que atiende prepara modelos y gráficos.
+# El único pool de procesos (modelos y gráficos) se crea con fork antes de arrancar cualquier hilo.
+if model_registry is not None and (__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    start_process_pool(model_registry.workers)
+    model_registry.warm()
+    chart_cache.precompute()
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Endpoint de verificación de salud"""
@@ -65,7 +90,7 @@ def health_check():
         'message': 'API funcionando correctamente',
         'data_loaded': data_loaded,
         'data_file_exists': os.path.exists('greenhouse_gas_data.json'),
-        'processors_initialized': data_processor is not None and ml_analyzer is not None,
+        'processors_initialized': data_processor is not None and model_registry is not None,
         'timestamp': os.path.getmtime('greenhouse_gas_data.json') if os.path.exists('greenhouse_gas_data.json') else None
     })
 
@@ -236,38 +261,83 @@ def get_complete_data():
         return jsonify({'success': False, 'error': str(e)})
 
 # Endpoints de Gráficos
+def chart_reference(name, version, inline=False):
+    """URL de la imagen de un gráfico (o data URI en base64 con inline)"""
+    if inline:
+        body, _ = chart_cache.get(name)
+        return f"data:image/png;base64,{base64.b64encode(body).decode()}"
+    return url_for('get_chart_image', name=name, v=version, _external=True)
+
+def chart_response(name):
+    """Respuesta JSON de un gráfico individual: URL de la imagen cacheada"""
+    try:
+        if not chart_cache:
+            return jsonify({'success': False, 'error': 'Procesador de datos no disponible'})
+        version = chart_cache.get(name)[1]
+        return jsonify({
+            'success': True, 
+            'chart': chart_reference(name, version, request.args.get('inline') == '1'),
+            'type': name,
+            'description': CHARTS[name][1],
+            'data_version': version
+        })
+    except Exception as e:
+        logger.error(f"Error generando gráfico {name}: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/charts/image/<name>.png', methods=['GET'])
+def get_chart_image(name):
+    """
+    PNG de un gráfico. Con ?v=<versión actual> la URL no cambia mientras no
+    cambien los datos y se cachea sin revalidar; sin ella, revalida con ETag.
+    """
+    if name not in CHARTS:
+        return jsonify({'success': False, 'error': f'Gráfico no encontrado: {name}'}), 404
+    try:
+        if not chart_cache:
+            return jsonify({'success': False, 'error': 'Procesador de datos no disponible'}), 500
+        
+        # Si el navegador ya tiene esta versión, 304 sin leer el archivo
+        version = chart_cache.data_version()
+        etag = f"{version}-{name}"
+        if request.if_none_match.contains(etag):
+            body = b''
+        else:
+            body, version = chart_cache.get(name)
+            etag = f"{version}-{name}"
+        
+        response = Response(body, mimetype='image/png')
+        response.set_etag(etag)
+        if request.args.get('v') == version:
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    except Exception as e:
+        logger.error(f"Error en get_chart_image: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/charts/all', methods=['GET'])
 def generate_all_charts():
-    """Generar todos los gráficos al mismo tiempo"""
+    """
+    Todos los gráficos: renderiza en paralelo los que falten para la versión
+    actual y devuelve la URL de cada imagen (?inline=1: data URI en base64)
+    """
     try:
-        if not data_processor:
+        if not chart_cache:
             return jsonify({'success': False, 'error': 'Procesador de datos no disponible'})
         
-        charts = {}
-        
-        # Generar todos los gráficos
-        area_chart = data_processor.create_area_chart()
-        radar_chart = data_processor.create_radar_chart()
-        stacked_chart = data_processor.create_stacked_bar_chart()
-        pie_chart = data_processor.create_pie_chart()
-        trend_chart = data_processor.create_trend_comparison()
-        
-        if area_chart:
-            charts['area'] = f"data:image/png;base64,{area_chart}"
-        if radar_chart:
-            charts['radar'] = f"data:image/png;base64,{radar_chart}"
-        if stacked_chart:
-            charts['stacked_bar'] = f"data:image/png;base64,{stacked_chart}"
-        if pie_chart:
-            charts['pie'] = f"data:image/png;base64,{pie_chart}"
-        if trend_chart:
-            charts['trend'] = f"data:image/png;base64,{trend_chart}"
+        version = chart_cache.render_all()
+        inline = request.args.get('inline') == '1'
+        charts = {name: chart_reference(name, version, inline) for name in CHARTS}
         
         return jsonify({
             'success': True,
             'charts': charts,
             'count': len(charts),
-            'available_charts': list(charts.keys())
+            'available_charts': list(charts.keys()),
+            'data_version': version,
+            'render': chart_cache.status()
         })
     except Exception as e:
         logger.error(f"Error generando todos los gráficos: {e}")
@@ -276,126 +346,46 @@ def generate_all_charts():
 @app.route('/api/charts/area', methods=['GET'])
 def generate_area_chart():
     """Generar gráfico de área"""
-    try:
-        if not data_processor:
-            return jsonify({'success': False, 'error': 'Procesador de datos no disponible'})
-        chart_base64 = data_processor.create_area_chart()
-        if chart_base64:
-            return jsonify({
-                'success': True, 
-                'chart': f"data:image/png;base64,{chart_base64}",
-                'type': 'area',
-                'description': 'Escenarios de emisiones 2024-2100'
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Error generando gráfico de área'})
-    except Exception as e:
-        logger.error(f"Error en generate_area_chart: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+    return chart_response('area')
 
 @app.route('/api/charts/radar', methods=['GET'])
 def generate_radar_chart():
     """Generar gráfico radar"""
-    try:
-        if not data_processor:
-            return jsonify({'success': False, 'error': 'Procesador de datos no disponible'})
-        chart_base64 = data_processor.create_radar_chart()
-        if chart_base64:
-            return jsonify({
-                'success': True, 
-                'chart': f"data:image/png;base64,{chart_base64}",
-                'type': 'radar',
-                'description': 'Potencial de Calentamiento Global (GWP) comparativo'
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Error generando gráfico radar'})
-    except Exception as e:
-        logger.error(f"Error en generate_radar_chart: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+    return chart_response('radar')
 
 @app.route('/api/charts/stacked-bar', methods=['GET'])
 def generate_stacked_bar_chart():
     """Generar gráfico de barras apiladas"""
-    try:
-        if not data_processor:
-            return jsonify({'success': False, 'error': 'Procesador de datos no disponible'})
-        chart_base64 = data_processor.create_stacked_bar_chart()
-        if chart_base64:
-            return jsonify({
-                'success': True, 
-                'chart': f"data:image/png;base64,{chart_base64}",
-                'type': 'stacked_bar',
-                'description': 'Emisiones por sector económico 2024-2100'
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Error generando gráfico de barras apiladas'})
-    except Exception as e:
-        logger.error(f"Error en generate_stacked_bar_chart: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+    return chart_response('stacked_bar')
 
 @app.route('/api/charts/pie', methods=['GET'])
 def generate_pie_chart():
     """Generar gráfico de pastel"""
-    try:
-        if not data_processor:
-            return jsonify({'success': False, 'error': 'Procesador de datos no disponible'})
-        chart_base64 = data_processor.create_pie_chart()
-        if chart_base64:
-            return jsonify({
-                'success': True, 
-                'chart': f"data:image/png;base64,{chart_base64}",
-                'type': 'pie',
-                'description': 'Distribución regional de emisiones 2024'
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Error generando gráfico de pastel'})
-    except Exception as e:
-        logger.error(f"Error en generate_pie_chart: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+    return chart_response('pie')
 
 @app.route('/api/charts/trend', methods=['GET'])
 def generate_trend_chart():
     """Generar gráfico de tendencias comparativas"""
-    try:
-        if not data_processor:
-            return jsonify({'success': False, 'error': 'Procesador de datos no disponible'})
-        chart_base64 = data_processor.create_trend_comparison()
-        if chart_base64:
-            return jsonify({
-                'success': True, 
-                'chart': f"data:image/png;base64,{chart_base64}",
-                'type': 'trend',
-                'description': 'Tendencias relativas de gases 2024-2100'
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Error generando gráfico de tendencias'})
-    except Exception as e:
-        logger.error(f"Error en generate_trend_chart: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+    return chart_response('trend')
 
 # Endpoints de Machine Learning
 @app.route('/api/ml/predictions', methods=['GET'])
 def get_ml_predictions():
     """Obtener predicciones básicas de ML (para compatibilidad)"""
     try:
-        if not ml_analyzer:
+        if not model_registry:
             return jsonify({'success': False, 'error': 'Analizador ML no disponible'})
         
-        # Entrenar modelos básicos
-        linear_success = ml_analyzer.train_linear_regression()
-        rf_success = ml_analyzer.train_random_forest()
-        
-        predictions = ml_analyzer.get_predictions()
-        trends = ml_analyzer.analyze_trends()
+        # Modelos básicos entrenados una vez por versión de los datos
+        entry = model_registry.get('basic')
+        result = entry['result']
         
         return jsonify({
             'success': True,
-            'predictions': predictions,
-            'trends': trends,
-            'models_trained': {
-                'linear_regression': linear_success,
-                'random_forest': rf_success
-            },
+            'predictions': result['predictions'],
+            'trends': result['trends'],
+            'models_trained': result['models_trained'],
+            'registry': model_registry.describe(entry),
             'note': 'Usando modelos básicos. Para análisis avanzado use /api/ml/advanced_predictions'
         })
     except Exception as e:
@@ -406,44 +396,111 @@ def get_ml_predictions():
 def get_advanced_ml_predictions():
     """Obtener predicciones avanzadas de ML"""
     try:
-        if not ml_analyzer:
+        if not model_registry:
             return jsonify({'success': False, 'error': 'Analizador ML no disponible'})
         
-        # Entrenar modelos avanzados
-        advanced_success = ml_analyzer.train_advanced_models()
-        ensemble_success = ml_analyzer.train_ensemble_model()
+        # Modelos avanzados y ensemble entrenados una vez por versión de los datos
+        entry = model_registry.get('advanced')
+        result = entry['result']
         
-        predictions = ml_analyzer.get_predictions()
-        trends = ml_analyzer.analyze_trends()
-        risk_assessment = ml_analyzer.get_risk_assessment()
+        # Intervalos bootstrap precalculados; mientras se calculan, la dispersión entre modelos
+        predictions = result['predictions']
+        intervals = model_registry.peek_intervals()
+        if intervals is not None:
+            predictions = dict(predictions, confidence_intervals=intervals['result'])
+        else:
+            model_registry.prepare_intervals()
         
         return jsonify({
             'success': True,
             'predictions': predictions,
-            'trends': trends,
-            'risk_assessment': risk_assessment,
-            'models_trained': {
-                'advanced_models': advanced_success,
-                'ensemble_model': ensemble_success,
-                'total_models': len(ml_analyzer.models)
-            },
-            'dataset_info': {
-                'years_range': f"{ml_analyzer.data['years'][0]}-{ml_analyzer.data['years'][-1]}",
-                'total_years': len(ml_analyzer.data['years']),
-                'features_used': list(ml_analyzer.prepare_advanced_training_data()[0].columns) if advanced_success else []
-            }
+            'trends': result['trends'],
+            'risk_assessment': result['risk_assessment'],
+            'models_trained': result['models_trained'],
+            'dataset_info': result['dataset_info'],
+            'training_report': result['training_report'],
+            'registry': model_registry.describe(entry)
         })
     except Exception as e:
         logger.error(f"Error en get_advanced_ml_predictions: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/ml/intervals', methods=['GET'])
+def get_ml_intervals():
+    """
+    Intervalos de predicción bootstrap del ensemble. Los de la configuración
+    por defecto están precalculados; model y replicates (entre las réplicas
+    admitidas) piden otros, que se calculan en segundo plano. Mientras tanto
+    se responde 202 con los intervalos de dispersión entre modelos.
+    """
+    try:
+        if not model_registry:
+            return jsonify({'success': False, 'error': 'Analizador ML no disponible'})
+        
+        try:
+            entry = model_registry.request_intervals(request.args.get('model'),
+                                                     request.args.get('replicates', type=int))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        if entry is None:
+            advanced = model_registry.get('advanced')
+            return jsonify({
+                'success': True,
+                'ready': False,
+                'method': 'model_spread',
+                'confidence_intervals': advanced['result']['predictions'].get('confidence_intervals'),
+                'pending': model_registry.pending_intervals(),
+                'registry': model_registry.describe(advanced)
+            }), 202
+        
+        return jsonify({
+            'success': True,
+            'ready': True,
+            'method': 'bootstrap',
+            'confidence_intervals': entry['result'],
+            'registry': model_registry.describe(entry)
+        })
+    except Exception as e:
+        logger.error(f"Error en get_ml_intervals: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/ml/scenarios', methods=['GET'])
+def get_ml_scenarios():
+    """
+    Simular escenarios de emisiones y devolver bandas de percentiles.
+    Parámetros (inicio:fin:n, lista a,b,c o un valor): carbon_price_growth,
+    renewable_growth, gdp_growth; además samples, seed, model y percentiles.
+    """
+    try:
+        if not scenario_engine:
+            return jsonify({'success': False, 'error': 'Analizador ML no disponible'})
+        
+        try:
+            grid = scenario_engine.grid_from_args(request.args)
+            samples = request.args.get('samples', type=int)
+            seed = request.args.get('seed', 42, type=int)
+            model = request.args.get('model', 'ensemble')
+            percentiles = request.args.get('percentiles')
+            if percentiles:
+                percentiles = [float(value) for value in percentiles.split(',')]
+            simulation = scenario_engine.run(grid, model=model, samples=samples, seed=seed,
+                                             percentiles=percentiles)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        return jsonify({'success': True, 'simulation': simulation})
+    except Exception as e:
+        logger.error(f"Error en get_ml_scenarios: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/api/ml/trends', methods=['GET'])
 def get_ml_trends():
     """Obtener análisis de tendencias"""
     try:
-        if not ml_analyzer:
+        if not model_registry:
             return jsonify({'success': False, 'error': 'Analizador ML no disponible'})
-        trends = ml_analyzer.analyze_trends()
+        trends = model_registry.get('basic')['result']['trends']
         return jsonify({'success': True, 'trends': trends})
     except Exception as e:
         logger.error(f"Error en get_ml_trends: {e}")
@@ -453,9 +510,9 @@ def get_ml_trends():
 def get_ml_risk():
     """Obtener evaluación de riesgos"""
     try:
-        if not ml_analyzer:
+        if not model_registry:
             return jsonify({'success': False, 'error': 'Analizador ML no disponible'})
-        risk_assessment = ml_analyzer.get_risk_assessment()
+        risk_assessment = model_registry.get('advanced')['result']['risk_assessment']
         return jsonify({'success': True, 'risk_assessment': risk_assessment})
     except Exception as e:
         logger.error(f"Error en get_ml_risk: {e}")
@@ -465,18 +522,28 @@ def get_ml_risk():
 def get_ml_models():
     """Obtener información sobre los modelos ML disponibles"""
     try:
-        if not ml_analyzer:
+        if not model_registry:
             return jsonify({'success': False, 'error': 'Analizador ML no disponible'})
         
+        # Solo informa de lo ya entrenado: no provoca entrenamientos
+        status = model_registry.status()
+        available_models = []
+        for suite in status['suites'].values():
+            if suite['ready']:
+                available_models.extend(name for name in suite['models'] if name not in available_models)
+        advanced = model_registry.peek('advanced')
+        data = data_processor.data if data_processor else {}
+        
         models_info = {
-            'available_models': list(ml_analyzer.models.keys()) if ml_analyzer.models else [],
-            'feature_importance': ml_analyzer.feature_importance,
+            'available_models': available_models,
+            'feature_importance': advanced['feature_importance'] if advanced else {},
             'dataset_size': {
-                'years': len(ml_analyzer.data.get('years', [])),
-                'gases': len(ml_analyzer.data.get('gases', {})),
-                'sectors': len(ml_analyzer.data.get('sectors', {})),
-                'economic_indicators': len(ml_analyzer.data.get('economic_indicators', {}))
-            }
+                'years': len(data.get('years', [])),
+                'gases': len(data.get('gases', {})),
+                'sectors': len(data.get('sectors', {})),
+                'economic_indicators': len(data.get('economic_indicators', {}))
+            },
+            'registry': status
         }
         
         return jsonify({
@@ -511,7 +578,10 @@ def get_system_info():
                 {'path': '/api/health', 'method': 'GET', 'description': 'Verificar salud del sistema'},
                 {'path': '/api/debug/data', 'method': 'GET', 'description': 'Información de debugging de datos'},
                 {'path': '/api/charts/all', 'method': 'GET', 'description': 'Generar todos los gráficos'},
+                {'path': '/api/charts/image/<nombre>.png', 'method': 'GET', 'description': 'Imagen PNG cacheada de un gráfico'},
                 {'path': '/api/ml/advanced_predictions', 'method': 'GET', 'description': 'Predicciones ML avanzadas'},
+                {'path': '/api/ml/intervals', 'method': 'GET', 'description': 'Intervalos de predicción bootstrap'},
+                {'path': '/api/ml/scenarios', 'method': 'GET', 'description': 'Bandas de percentiles de escenarios simulados'},
                 {'path': '/api/data/complete', 'method': 'GET', 'description': 'Todos los datos disponibles'}
             ]
         })
@@ -604,7 +674,7 @@ if __name__ == '__main__':
         exit(1)
     
     # Verificar procesadores
-    if data_processor is None or ml_analyzer is None:
+    if data_processor is None or model_registry is None:
         print("❌ ERROR: No se pudieron inicializar los procesadores de datos")
         exit(1)
     
@@ -613,7 +683,9 @@ if __name__ == '__main__':
     print("\n📋 ENDPOINTS PRINCIPALES:")
     print("  🔍 /api/health              - Verificar salud del sistema")
     print("  📊 /api/charts/all          - Generar todos los gráficos")
+    print("  🖼️  /api/charts/image/<nombre>.png - Imagen PNG cacheada de un gráfico")
     print("  🤖 /api/ml/advanced_predictions - Predicciones ML avanzadas")
+    print("  🎲 /api/ml/scenarios        - Simulación de escenarios")
     print("  📈 /api/data/complete       - Todos los datos disponibles")
     print("  ℹ️  /api/system/info         - Información del sistema")
     print("  🐛 /api/debug/data          - Debugging de datos")
@@ -0,0 +1,161 @@
+import os
+import glob
+import base64
+import shutil
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from data_processor import DataProcessor
+from ml_analyzer import process_pool
+
+logger = logging.getLogger(__name__)
+
+# Gráficos disponibles: nombre -> (método de DataProcessor, descripción)
+CHARTS = OrderedDict([
+    ('area', ('create_area_chart', 'Escenarios de emisiones 2024-2100')),
+    ('radar', ('create_radar_chart', 'Potencial de Calentamiento Global (GWP) comparativo')),
+    ('stacked_bar', ('create_stacked_bar_chart', 'Emisiones por sector económico 2024-2100')),
+    ('pie', ('create_pie_chart', 'Distribución regional de emisiones 2024')),
+    ('trend', ('create_trend_comparison', 'Tendencias relativas de gases 2024-2100'))
+])
+
+# DataProcessor de cada proceso del pool: (versión, procesador)
+_processor = None
+
+
+def _render_chart(data_file, version, name):
+    """(PNG, milisegundos) de un gráfico (se ejecuta en un proceso del pool)"""
+    global _processor
+    if _processor is None or _processor[0] != version:
+        _processor = (version, DataProcessor(data_file))
+    start = time.perf_counter()
+    chart_base64 = getattr(_processor[1], CHARTS[name][0])()
+    if not chart_base64:
+        raise RuntimeError(f"Error generando gráfico {name}")
+    return base64.b64decode(chart_base64), (time.perf_counter() - start) * 1000
+
+
+class ChartCache:
+    """
+    PNG de los gráficos de DataProcessor, renderizados una vez por versión de los datos.
+
+    Los gráficos se renderizan en paralelo en el pool de procesos compartido
+    con el entrenamiento (ml_analyzer.start_process_pool; sin pool, en este
+    proceso) y se guardan en `directory/<versión>/<nombre>.png`.
+    Las solicitudes se sirven desde disco. Cada gráfico se renderiza una sola
+    vez aunque lo pidan varias solicitudes a la vez. `data_version` es la
+    función que da la versión actual del archivo de datos (la del registro de
+    modelos). Al completar una versión se borran las anteriores.
+    """
+
+    def __init__(self, data_file, data_version, directory=None):
+        self.data_file = data_file
+        self.data_version = data_version
+        self.directory = directory or os.path.join(
+            os.path.dirname(os.path.abspath(data_file)), 'chart_cache')
+        # Reentrante: sin pool, el gráfico se guarda dentro de _render
+        self._lock = threading.RLock()
+        self._inflight = {}
+        self.timings = {}
+
+    def precompute(self):
+        """Renderizar en segundo plano los gráficos de la versión actual que no estén en disco"""
+        def run():
+            try:
+                version = self.render_all()
+                logger.info(f"✅ Gráficos precalculados para la versión {version}")
+            except Exception as e:
+                logger.error(f"❌ Error precalculando gráficos: {e}")
+
+        thread = threading.Thread(target=run, name='chart-precompute', daemon=True)
+        thread.start()
+        return thread
+
+    def _path(self, version, name):
+        return os.path.join(self.directory, version, f"{name}.png")
+
+    def get(self, name):
+        """(PNG, versión) de un gráfico para la versión actual de los datos"""
+        if name not in CHARTS:
+            raise KeyError(name)
+        version = self.data_version()
+        return self._read(version, name) or self._render(version, [name])[name], version
+
+    def render_all(self):
+        """Asegurar en disco todos los gráficos de la versión actual; devuelve la versión"""
+        version = self.data_version()
+        missing = [name for name in CHARTS if not os.path.exists(self._path(version, name))]
+        if missing:
+            self._render(version, missing)
+            self._remove_old(version)
+        return version
+
+    def _read(self, version, name):
+        try:
+            with open(self._path(version, name), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _render(self, version, names):
+        """Renderizar en paralelo los gráficos indicados; {nombre: PNG}"""
+        futures = {}
+        with self._lock:
+            for name in names:
+                key = (version, name)
+                future = self._inflight.get(key)
+                if future is None:
+                    future = self._submit(version, name)
+                    if not future.done():
+                        self._inflight[key] = future
+                futures[name] = future
+        return {name: future.result()[0] for name, future in futures.items()}
+
+    def _submit(self, version, name):
+        executor, _ = process_pool()
+        if executor is not None:
+            future = executor.submit(_render_chart, self.data_file, version, name)
+        else:
+            future = Future()
+            try:
+                future.set_result(_render_chart(self.data_file, version, name))
+            except Exception as e:
+                future.set_exception(e)
+        future.add_done_callback(lambda done: self._store(version, name, done))
+        return future
+
+    def _store(self, version, name, future):
+        """Guardar en disco un gráfico recién renderizado (al terminar su tarea)"""
+        try:
+            if future.exception() is None:
+                body, elapsed_ms = future.result()
+                path = self._path(version, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(body)
+                os.replace(tmp_path, path)
+                self.timings[name] = {'render_ms': round(elapsed_ms, 1), 'bytes': len(body), 'version': version}
+            else:
+                logger.error(f"❌ Error renderizando gráfico {name}: {future.exception()}")
+        finally:
+            with self._lock:
+                self._inflight.pop((version, name), None)
+
+    def _remove_old(self, version):
+        for path in glob.glob(os.path.join(self.directory, '*')):
+            if os.path.basename(path) != version:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def status(self):
+        version = self.data_version()
+        executor, workers = process_pool()
+        return {
+            'data_version': version,
+            'workers': workers if executor is not None else 0,
+            'cached': [name for name in CHARTS if os.path.exists(self._path(version, name))],
+            'timings': self.timings
+        }
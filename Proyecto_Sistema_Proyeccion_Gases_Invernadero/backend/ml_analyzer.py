@@ -6,20 +6,168 @@ from sklearn.svm import SVR
 from sklearn.neural_network import MLPRegressor
 from sklearn.preprocessing import StandardScaler, PolynomialFeatures
 from sklearn.pipeline import Pipeline
+from sklearn.base import clone
 from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
 from sklearn.model_selection import cross_val_score, TimeSeriesSplit
+import os
 import json
+import signal
 import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Características de entrada de los modelos avanzados, en el orden de entrenamiento
+FEATURE_COLUMNS = [
+    'population', 'gdp', 'carbon_intensity', 'renewable_share', 'carbon_price',
+    'clean_investment', 'energy_efficiency', 'solar_cost', 'temperature',
+    'emissions_per_capita', 'emissions_per_gdp', 'renewable_investment_ratio',
+    'carbon_price_effectiveness', 'year_squared', 'year_cubed', 'log_population', 'log_gdp'
+]
+
+# Modelos base de train_advanced_models (el ensemble se construye sobre ellos)
+ADVANCED_MODELS = ('random_forest', 'gradient_boosting', 'svr', 'neural_network', 'ridge', 'lasso')
+
+# Supuestos de la proyección por defecto (create_future_features)
+DEFAULT_SCENARIO = {
+    'carbon_price_growth': 15.0,  # USD por tonelada y año
+    'renewable_growth': 1.2,      # puntos porcentuales por año (máximo 95 %)
+    'gdp_growth': 0.025           # crecimiento anual del PIB
+}
+
+
+# Pool de procesos compartido por los entrenamientos (ver process_pool)
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    """Inicio de un proceso del pool: Ctrl+C solo lo atiende el servidor"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def start_process_pool(workers=None):
+    """
+    Crear el pool compartido para entrenar con `workers` procesos (por
+    defecto uno por núcleo), con todos sus procesos ya arrancados.
+
+    Los procesos se crean con fork, así que se llama una sola vez al arrancar,
+    desde el hilo principal y antes de arrancar otros hilos: un fork mientras
+    otro hilo tiene tomado un lock (p. ej. el de importar un módulo) deja al
+    hijo bloqueado.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None:
+            _pool_workers = max(1, workers or os.cpu_count() or 1)
+            _pool = ProcessPoolExecutor(_pool_workers, mp_context=multiprocessing.get_context('fork'),
+                                        initializer=_init_worker)
+            # La primera tarea crea ya todos los procesos
+            _pool.submit(os.getpid).result()
+        return _pool, _pool_workers
+
+
+def process_pool():
+    """
+    (pool, procesos) del pool compartido, o (None, 1) si no se creó al
+    arrancar o se ha roto. Nunca lo crea: desde un hilo de la API el fork
+    no es seguro, así que sin pool se entrena en este proceso.
+    """
+    with _pool_lock:
+        if _pool is None or getattr(_pool, '_broken', False):
+            return None, 1
+        return _pool, _pool_workers
+
+
+def _fit_model(name, model, X_train, y_train, X_test, y_test, X, future_data):
+    """
+    Entrenar y evaluar un modelo base (se ejecuta en un proceso del pool).
+    Devuelve también sus predicciones sobre todos los años históricos y los
+    futuros, para que el ensemble no tenga que volver a calcularlas.
+    """
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    in_sample_predictions = model.predict(X)
+    future_predictions = model.predict(future_data)
+    predict_ms = (time.perf_counter() - start) * 1000
+
+    metrics = {
+        'r2': r2_score(y_test, y_pred),
+        'mse': mean_squared_error(y_test, y_pred),
+        'mae': mean_absolute_error(y_test, y_pred)
+    }
+
+    # Importancia de características (si el modelo lo soporta)
+    importances = None
+    if hasattr(model, 'named_steps'):  # Para pipelines
+        feature_model = model.named_steps[list(model.named_steps.keys())[-1]]
+        if hasattr(feature_model, 'feature_importances_'):
+            importances = feature_model.feature_importances_
+    elif hasattr(model, 'feature_importances_'):
+        importances = model.feature_importances_
+
+    return {
+        'name': name,
+        'model': model,
+        'metrics': metrics,
+        'in_sample_predictions': in_sample_predictions,
+        'future_predictions': future_predictions,
+        'importances': importances,
+        'timing': {
+            'fit_ms': round(fit_ms, 1),
+            'predict_ms': round(predict_ms, 1),
+            'pid': os.getpid()
+        }
+    }
+
+
+def _fit_reference(model, X, y, future_data):
+    """Predicciones futuras de una copia del modelo ajustada con todos los años históricos"""
+    return clone(model).fit(X, y).predict(future_data)
+
+
+def _fit_replicates(model, X, y, future_data, seeds):
+    """
+    Réplicas bootstrap de un modelo (se ejecuta en un proceso del pool).
+
+    Cada réplica remuestrea con reemplazo los años históricos con su propia
+    semilla, ajusta una copia sin entrenar del modelo y predice los años
+    futuros sumando un residuo de los años que quedaron fuera de la muestra
+    (intervalo de predicción, no solo de la media).
+    """
+    start = time.perf_counter()
+    n = len(X)
+    predictions = np.empty((len(seeds), len(future_data)))
+    for row, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        sample = rng.integers(0, n, n)
+        replicate = clone(model)
+        replicate.fit(X.iloc[sample], y.iloc[sample])
+        future = replicate.predict(future_data)
+        out_of_bag = np.setdiff1d(np.arange(n), sample)
+        if len(out_of_bag):
+            residuals = y.iloc[out_of_bag].to_numpy() - replicate.predict(X.iloc[out_of_bag])
+            future = future + rng.choice(residuals, len(future))
+        predictions[row] = future
+    return predictions, (time.perf_counter() - start) * 1000
+
+
 class MLAnalyzer:
     def __init__(self, data_file):
         self.data_file = data_file
         self.load_data()
         self.models = {}
         self.feature_importance = {}
+        self.training_report = None
         
     def load_data(self):
         """Cargar datos para análisis ML"""
@@ -134,8 +282,14 @@ class MLAnalyzer:
             logger.error(f"Error preparando datos avanzados: {e}")
             return None, None, None
     
-    def train_advanced_models(self):
-        """Entrenar múltiples modelos avanzados"""
+    def train_advanced_models(self, workers=None):
+        """
+        Entrenar múltiples modelos avanzados en paralelo.
+
+        Cada modelo base se ajusta en un proceso del pool compartido
+        (`start_process_pool`). Con `workers=1`, o si no hay pool, se
+        entrenan en este proceso.
+        """
         try:
             X, y, df = self.prepare_advanced_training_data()
             
@@ -181,48 +335,60 @@ class MLAnalyzer:
                 'lasso': Lasso(alpha=0.1)
             }
             
-            for name, model in models.items():
-                try:
-                    model.fit(X_train, y_train)
-                    y_pred = model.predict(X_test)
-                    
-                    # Métricas
-                    r2 = r2_score(y_test, y_pred)
-                    mse = mean_squared_error(y_test, y_pred)
-                    mae = mean_absolute_error(y_test, y_pred)
-                    
-                    # Predicciones futuras
-                    future_years = list(range(2024, 2101))
-                    
-                    # Crear datos futuros (extrapolando características)
-                    future_data = self.create_future_features(future_years, df)
-                    future_predictions = model.predict(future_data)
-                    
-                    self.models[name] = {
-                        'model': model,
-                        'predictions': future_predictions.tolist(),
-                        'future_years': future_years,
-                        'metrics': {
-                            'r2': r2,
-                            'mse': mse,
-                            'mae': mae
-                        }
-                    }
-                    
-                    # Importancia de características (si el modelo lo soporta)
-                    if hasattr(model, 'feature_importances_'):
-                        if hasattr(model, 'named_steps'):  # Para pipelines
-                            feature_model = model.named_steps[list(model.named_steps.keys())[-1]]
-                            if hasattr(feature_model, 'feature_importances_'):
-                                self.feature_importance[name] = dict(zip(X.columns, feature_model.feature_importances_))
-                        else:
-                            self.feature_importance[name] = dict(zip(X.columns, model.feature_importances_))
-                    
-                    logger.info(f"✅ Modelo {name} entrenado - R²: {r2:.3f}")
-                    
-                except Exception as e:
-                    logger.error(f"Error entrenando modelo {name}: {e}")
-                    continue
+            # Predicciones futuras (extrapolando características), comunes a todos los modelos
+            future_years = list(range(2024, 2101))
+            future_data = self.create_future_features(future_years, df)
+            
+            executor, pool_workers = process_pool()
+            if workers != 1 and executor is None:
+                logger.warning("⚠️ Pool de procesos no disponible: los modelos avanzados se entrenan en este proceso")
+            workers = 1 if workers == 1 or executor is None else pool_workers
+            
+            start = time.perf_counter()
+            results = []
+            if workers == 1:
+                for name, model in models.items():
+                    try:
+                        results.append(_fit_model(name, model, X_train, y_train, X_test, y_test, X, future_data))
+                    except Exception as e:
+                        logger.error(f"Error entrenando modelo {name}: {e}")
+            else:
+                futures = {
+                    name: executor.submit(_fit_model, name, model, X_train, y_train, X_test, y_test, X, future_data)
+                    for name, model in models.items()
+                }
+                for name, future in futures.items():
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        logger.error(f"Error entrenando modelo {name}: {e}")
+            wall_ms = (time.perf_counter() - start) * 1000
+            
+            timings = {}
+            for result in results:
+                name = result['name']
+                self.models[name] = {
+                    'model': result['model'],
+                    'predictions': result['future_predictions'].tolist(),
+                    'in_sample_predictions': result['in_sample_predictions'].tolist(),
+                    'future_years': future_years,
+                    'metrics': result['metrics']
+                }
+                if result['importances'] is not None:
+                    self.feature_importance[name] = dict(zip(X.columns, result['importances']))
+                timings[name] = result['timing']
+                logger.info(f"✅ Modelo {name} entrenado - R²: {result['metrics']['r2']:.3f} "
+                            f"({result['timing']['fit_ms']:.0f} ms)")
+            
+            # Informe de tiempos: la suma frente al tiempo real muestra la ganancia del pool
+            total_ms = sum(timing['fit_ms'] + timing['predict_ms'] for timing in timings.values())
+            self.training_report = {
+                'workers': workers,
+                'wall_ms': round(wall_ms, 1),
+                'models_ms': round(total_ms, 1),
+                'speedup': round(total_ms / wall_ms, 2) if wall_ms > 0 else None,
+                'models': timings
+            }
             
             return len(self.models) > 0
             
@@ -233,42 +399,80 @@ class MLAnalyzer:
     def create_future_features(self, future_years, historical_df):
         """Crear características para años futuros basándose en tendencias"""
         try:
-            # Últimos datos históricos
-            last_year = historical_df['year'].max()
-            last_data = historical_df[historical_df['year'] == last_year].iloc[0]
-            
-            future_data = []
-            for year in future_years:
-                # Extrapolar características basándose en tendencias históricas
-                years_from_last = year - last_year
-                
-                row = {
-                    'population': last_data['population'] * (1.008 ** years_from_last),
-                    'gdp': last_data['gdp'] * (1.025 ** years_from_last),
-                    'carbon_intensity': max(0.1, last_data['carbon_intensity'] * (0.98 ** years_from_last)),
-                    'renewable_share': min(95, last_data['renewable_share'] + 1.2 * years_from_last),
-                    'carbon_price': last_data['carbon_price'] + 15 * years_from_last,
-                    'clean_investment': last_data['clean_investment'] * (1.08 ** years_from_last),
-                    'energy_efficiency': last_data['energy_efficiency'] * (1.02 ** years_from_last),
-                    'solar_cost': max(10, last_data['solar_cost'] * (0.97 ** years_from_last)),
-                    'temperature': last_data['temperature'] + 0.02 * years_from_last,
-                    'emissions_per_capita': last_data['emissions_per_capita'] * (0.98 ** years_from_last),
-                    'emissions_per_gdp': last_data['emissions_per_gdp'] * (0.96 ** years_from_last),
-                    'renewable_investment_ratio': last_data['renewable_investment_ratio'] * (1.05 ** years_from_last),
-                    'carbon_price_effectiveness': last_data['carbon_price_effectiveness'] * (0.95 ** years_from_last),
-                    'year_squared': year ** 2,
-                    'year_cubed': year ** 3,
-                    'log_population': np.log(last_data['population'] * (1.008 ** years_from_last)),
-                    'log_gdp': np.log(last_data['gdp'] * (1.025 ** years_from_last))
-                }
-                future_data.append(row)
-            
-            return pd.DataFrame(future_data)
+            features = self.build_scenario_features(future_years, historical_df, **DEFAULT_SCENARIO)
+            return pd.DataFrame(features[0], columns=FEATURE_COLUMNS)
             
         except Exception as e:
             logger.error(f"Error creando características futuras: {e}")
             return None
     
+    def build_scenario_features(self, future_years, historical_df, carbon_price_growth,
+                                renewable_growth, gdp_growth, anchor_year=None):
+        """
+        Tensor de características (escenarios × años × características) para
+        años futuros, extrapolando desde `anchor_year` (por defecto, el último
+        año del dataset).
+
+        `carbon_price_growth`, `renewable_growth` y `gdp_growth` son escalares
+        o arrays de una dimensión (un valor por escenario); el resto de
+        indicadores sigue la tendencia por defecto. Todo se calcula con
+        operaciones vectorizadas de NumPy.
+        """
+        # Últimos datos históricos
+        last_year = historical_df['year'].max() if anchor_year is None else anchor_year
+        last_data = historical_df[historical_df['year'] == last_year].iloc[0]
+        
+        years = np.asarray(future_years)
+        years_from_last = years - last_year
+        carbon_price_growth = np.atleast_1d(np.asarray(carbon_price_growth, dtype=float))[:, None]
+        renewable_growth = np.atleast_1d(np.asarray(renewable_growth, dtype=float))[:, None]
+        gdp_growth = np.atleast_1d(np.asarray(gdp_growth, dtype=float))[:, None]
+        shape = np.broadcast_shapes(carbon_price_growth.shape, renewable_growth.shape,
+                                    gdp_growth.shape, (1, len(years)))
+        
+        population = last_data['population'] * (1.008 ** years_from_last)
+        gdp = last_data['gdp'] * ((1 + gdp_growth) ** years_from_last)
+        columns = {
+            'population': population,
+            'gdp': gdp,
+            'carbon_intensity': np.maximum(0.1, last_data['carbon_intensity'] * (0.98 ** years_from_last)),
+            'renewable_share': np.minimum(95, last_data['renewable_share'] + renewable_growth * years_from_last),
+            'carbon_price': last_data['carbon_price'] + carbon_price_growth * years_from_last,
+            'clean_investment': last_data['clean_investment'] * (1.08 ** years_from_last),
+            'energy_efficiency': last_data['energy_efficiency'] * (1.02 ** years_from_last),
+            'solar_cost': np.maximum(10, last_data['solar_cost'] * (0.97 ** years_from_last)),
+            'temperature': last_data['temperature'] + 0.02 * years_from_last,
+            'emissions_per_capita': last_data['emissions_per_capita'] * (0.98 ** years_from_last),
+            'emissions_per_gdp': last_data['emissions_per_gdp'] * (0.96 ** years_from_last),
+            'renewable_investment_ratio': last_data['renewable_investment_ratio'] * (1.05 ** years_from_last),
+            'carbon_price_effectiveness': last_data['carbon_price_effectiveness'] * (0.95 ** years_from_last),
+            'year_squared': years ** 2,
+            'year_cubed': years ** 3,
+            'log_population': np.log(population),
+            'log_gdp': np.log(gdp)
+        }
+        
+        features = np.empty(shape + (len(FEATURE_COLUMNS),))
+        for index, name in enumerate(FEATURE_COLUMNS):
+            features[..., index] = columns[name]
+        return features
+    
+    def predict_features(self, features, model_name='ensemble'):
+        """
+        Predicciones de un modelo entrenado para una matriz (filas ×
+        características) en una sola llamada por modelo. El ensemble apila
+        las predicciones de sus modelos base.
+        """
+        if model_name not in self.models:
+            raise ValueError(f"Modelo no disponible: {model_name}")
+        frame = pd.DataFrame(features, columns=FEATURE_COLUMNS)
+        model_data = self.models[model_name]
+        if model_name == 'ensemble':
+            base_predictions = [self.models[name]['model'].predict(frame)
+                                for name in model_data['metrics']['base_models']]
+            return model_data['model'].predict(np.column_stack(base_predictions))
+        return model_data['model'].predict(frame)
+    
     def train_ensemble_model(self):
         """Entrenar modelo ensemble que combina múltiples modelos"""
         try:
@@ -286,8 +490,10 @@ class MLAnalyzer:
             
             for name, model_data in self.models.items():
                 if 'predictions' in model_data:
-                    # Para los años históricos, usar predicciones del modelo
-                    historical_pred = model_data['model'].predict(X)
+                    # Para los años históricos, usar las predicciones guardadas al entrenar
+                    historical_pred = model_data.get('in_sample_predictions')
+                    if historical_pred is None:
+                        historical_pred = model_data['model'].predict(X)
                     base_predictions.append(historical_pred)
                     model_names.append(name)
             
@@ -361,6 +567,69 @@ class MLAnalyzer:
             logger.error(f"Error calculando intervalos de confianza: {e}")
             return None
     
+    def bootstrap_intervals(self, model_name='gradient_boosting', replicates=100, workers=None, seed=42):
+        """
+        Intervalos de predicción bootstrap alrededor del ensemble.
+
+        Se ajustan `replicates` réplicas de `model_name` sobre remuestreos de
+        los años históricos, repartidas en hasta `workers` procesos del pool
+        compartido (fuera de este proceso para no frenar a la API; sin pool,
+        en este proceso). Las desviaciones de cada réplica respecto al modelo
+        ajustado con todos los años (los mismos que se remuestrean) dan los
+        percentiles 16-84 (68 %) y 2.5-97.5 (95 %). Cada
+        réplica tiene su semilla: el resultado no depende de `workers`.
+        """
+        if model_name == 'ensemble' or model_name not in self.models:
+            raise ValueError(f"Modelo base no disponible para bootstrap: {model_name}")
+        
+        X, y, df = self.prepare_advanced_training_data()
+        model_data = self.models[model_name]
+        future_data = self.create_future_features(model_data['future_years'], df)
+        seeds = np.random.SeedSequence(seed).generate_state(replicates)
+        
+        executor, pool_workers = process_pool()
+        workers = pool_workers if workers is None else max(1, min(workers, pool_workers))
+        
+        start = time.perf_counter()
+        if executor is None:
+            logger.warning("⚠️ Pool de procesos no disponible: las réplicas bootstrap se ajustan en este proceso")
+            reference = _fit_reference(model_data['model'], X, y, future_data)
+            results = [_fit_replicates(model_data['model'], X, y, future_data, seeds)]
+        else:
+            reference = executor.submit(_fit_reference, model_data['model'], X, y, future_data)
+            futures = [executor.submit(_fit_replicates, model_data['model'], X, y, future_data, chunk)
+                       for chunk in np.array_split(seeds, min(workers, replicates))]
+            results = [future.result() for future in futures]
+            reference = reference.result()
+        wall_ms = (time.perf_counter() - start) * 1000
+        
+        replicate_predictions = np.vstack([predictions for predictions, _ in results])
+        cpu_ms = sum(elapsed for _, elapsed in results)
+        deviations = replicate_predictions - reference
+        lower_95, lower_68, upper_68, upper_95 = np.percentile(deviations, [2.5, 16, 84, 97.5], axis=0)
+        
+        center_model = 'ensemble' if 'ensemble' in self.models else model_name
+        center = np.asarray(self.models[center_model]['predictions'])
+        
+        return {
+            'future_years': model_data['future_years'],
+            'lower_68': (center + lower_68).tolist(),
+            'upper_68': (center + upper_68).tolist(),
+            'lower_95': (center + lower_95).tolist(),
+            'upper_95': (center + upper_95).tolist(),
+            'std_dev': deviations.std(axis=0).tolist(),
+            'method': 'bootstrap',
+            'model': model_name,
+            'center': center_model,
+            'replicates': replicates,
+            'cost': {
+                'workers': workers,
+                'wall_ms': round(wall_ms, 1),
+                'cpu_ms': round(cpu_ms, 1),
+                'per_replicate_ms': round(cpu_ms / replicates, 2)
+            }
+        }
+    
     def get_predictions(self):
         """Obtener predicciones de todos los modelos con análisis avanzado"""
         predictions = {}
@@ -0,0 +1,380 @@
+import os
+import glob
+import hashlib
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import joblib
+
+from ml_analyzer import ADVANCED_MODELS, MLAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Cambiar al modificar el entrenamiento o el contenido de los artefactos
+REGISTRY_FORMAT = 3
+
+
+class ModelRegistry:
+    """
+    Registro de modelos entrenados una sola vez por versión del archivo de datos.
+
+    La versión es el hash del contenido de `data_file` (se recalcula solo si
+    cambian su fecha de modificación o su tamaño). Cada conjunto de modelos
+    (`SUITES`) se entrena con un MLAnalyzer propio la primera vez que se pide
+    para esa versión, y el artefacto con los modelos ajustados y la respuesta
+    ya calculada (predicciones, tendencias, riesgos) se guarda en `directory`
+    con joblib. Las solicitudes siguientes se sirven desde memoria, y tras un
+    reinicio desde disco, sin volver a entrenar. Los modelos base avanzados
+    se entrenan en paralelo en el pool compartido de ml_analyzer, creado al
+    arrancar con `workers` procesos (None: uno por núcleo).
+
+    Los intervalos de predicción bootstrap (`intervals`) se guardan igual,
+    por versión, modelo y número de réplicas; los de la configuración por
+    defecto se precalculan tras los modelos avanzados. Bajo demanda solo se
+    admiten las réplicas de `ON_DEMAND_REPLICATES` (y las configuradas), se
+    calculan de una en una en segundo plano (`request_intervals`) y en memoria
+    se conservan las `MAX_INTERVAL_ENTRIES` configuraciones usadas más
+    recientemente, además de la configuración por defecto.
+    """
+
+    SUITES = ('basic', 'advanced')
+    ON_DEMAND_REPLICATES = (25, 50, 100)
+    MAX_INTERVAL_ENTRIES = 8
+
+    def __init__(self, data_file, directory=None, workers=None,
+                 bootstrap_model='gradient_boosting', bootstrap_replicates=100):
+        self.data_file = data_file
+        self.workers = workers
+        self.bootstrap_model = bootstrap_model
+        self.bootstrap_replicates = bootstrap_replicates
+        self.directory = directory or os.path.join(
+            os.path.dirname(os.path.abspath(data_file)), 'models')
+        self._entries = OrderedDict()
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self._pending = set()
+        self._queue = queue.Queue()
+        self._queue_thread = None
+        self._stat = None
+        self._version = None
+        self._version_lock = threading.Lock()
+
+    def data_version(self):
+        """Hash del contenido del archivo de datos (None si no existe)"""
+        try:
+            stat = os.stat(self.data_file)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._version_lock:
+            if key != self._stat:
+                with open(self.data_file, 'rb') as f:
+                    self._version = hashlib.sha1(f.read()).hexdigest()[:16]
+                self._stat = key
+            return self._version
+
+    def _path(self, suite, version):
+        return os.path.join(self.directory, f"{suite}-{version}.joblib")
+
+    def get(self, suite):
+        """Entrada del conjunto `suite` para la versión actual de los datos"""
+        if suite not in self.SUITES:
+            raise ValueError(f"Conjunto de modelos desconocido: {suite}")
+        return self._get(suite, lambda version: self._train(suite, version))
+
+    def intervals(self, model=None, replicates=None):
+        """
+        Entrada con los intervalos bootstrap de `model` y `replicates` réplicas,
+        calculándolos si hace falta (bloquea; las solicitudes HTTP usan
+        `request_intervals`)
+        """
+        model, replicates = self._intervals_config(model, replicates)
+        return self._get(self._intervals_suite(model, replicates),
+                         lambda version: self._train_intervals(model, replicates, version))
+
+    def request_intervals(self, model=None, replicates=None):
+        """
+        Intervalos bootstrap sin esperar: la entrada si ya está en memoria o en
+        disco; si no, encola su cálculo en segundo plano y devuelve None
+        """
+        model, replicates = self._intervals_config(model, replicates)
+        entry = self._get(self._intervals_suite(model, replicates), None)
+        if entry is None:
+            self._enqueue_intervals(model, replicates)
+        return entry
+
+    def peek_intervals(self):
+        """Intervalos de la configuración por defecto si ya están calculados"""
+        return self.peek(self._intervals_suite(self.bootstrap_model, self.bootstrap_replicates))
+
+    def prepare_intervals(self):
+        """Calcular en segundo plano los intervalos por defecto si aún no están"""
+        if self.peek_intervals() is None:
+            self.request_intervals()
+
+    def _intervals_config(self, model, replicates):
+        model = model or self.bootstrap_model
+        replicates = replicates or self.bootstrap_replicates
+        # Antes de tocar locks o rutas: el nombre forma parte del artefacto
+        if model not in ADVANCED_MODELS:
+            raise ValueError(f"Modelo base no disponible para bootstrap: {model}. "
+                             f"Opciones: {', '.join(ADVANCED_MODELS)}")
+        allowed = sorted(set(self.ON_DEMAND_REPLICATES) | {self.bootstrap_replicates})
+        if replicates not in allowed:
+            raise ValueError(f"replicates no admitido: {replicates}. "
+                             f"Opciones: {', '.join(map(str, allowed))}")
+        return model, replicates
+
+    def _intervals_suite(self, model, replicates):
+        return f"intervals-{model}-{replicates}"
+
+    def _default_intervals_suite(self):
+        return self._intervals_suite(self.bootstrap_model, self.bootstrap_replicates)
+
+    def _enqueue_intervals(self, model, replicates):
+        """Un solo hilo calcula los intervalos pendientes, uno tras otro"""
+        suite = self._intervals_suite(model, replicates)
+        with self._locks_lock:
+            if suite in self._pending:
+                return
+            self._pending.add(suite)
+            if self._queue_thread is None:
+                self._queue_thread = threading.Thread(target=self._run_queue,
+                                                      name='ml-registry-intervals', daemon=True)
+                self._queue_thread.start()
+        logger.info(f"⏳ Intervalos bootstrap ({model}, {replicates} réplicas) en cola")
+        self._queue.put((model, replicates))
+
+    def _run_queue(self):
+        while True:
+            model, replicates = self._queue.get()
+            try:
+                self.intervals(model, replicates)
+            except Exception as e:
+                logger.error(f"❌ Error calculando intervalos bootstrap ({model}, {replicates}): {e}")
+            finally:
+                with self._locks_lock:
+                    self._pending.discard(self._intervals_suite(model, replicates))
+
+    def pending_intervals(self):
+        """Configuraciones de intervalos en cola o calculándose"""
+        with self._locks_lock:
+            return sorted(suite for suite in self._pending if suite.startswith('intervals-'))
+
+    def _lock(self, suite):
+        with self._locks_lock:
+            return self._locks.setdefault(suite, threading.Lock())
+
+    def _get(self, suite, train):
+        """Entrada de `suite` desde memoria, disco o `train` (None: no entrenar)"""
+        version = self.data_version()
+        if version is None:
+            raise FileNotFoundError(f"Archivo de datos no encontrado: {self.data_file}")
+
+        entry = self._entries.get(suite)
+        if entry is not None and entry['data_version'] == version:
+            self._remember(suite, entry)
+            return entry
+
+        with self._lock(suite):
+            # Otro hilo pudo terminarlo mientras se esperaba el lock
+            entry = self._entries.get(suite)
+            if entry is not None and entry['data_version'] == version:
+                return entry
+            entry = self._load(suite, version)
+            if entry is None:
+                if train is None:
+                    return None
+                entry = train(version)
+                self._save(suite, entry)
+            self._remember(suite, entry)
+            return entry
+
+    def _remember(self, suite, entry):
+        """Guardar en memoria; de los intervalos, solo los usados más recientemente"""
+        with self._locks_lock:
+            self._entries[suite] = entry
+            if suite in self.SUITES or suite == self._default_intervals_suite():
+                return
+            self._entries.move_to_end(suite)
+            cached = [name for name in self._entries
+                      if name not in self.SUITES and name != self._default_intervals_suite()]
+            for name in cached[:-self.MAX_INTERVAL_ENTRIES]:
+                del self._entries[name]
+
+    def peek(self, suite):
+        """Entrada en memoria para la versión actual, sin entrenar ni leer disco"""
+        entry = self._entries.get(suite)
+        if entry is not None and entry['data_version'] == self.data_version():
+            return entry
+        return None
+
+    def warm(self, suites=None):
+        """
+        Cargar o entrenar en segundo plano para que la primera solicitud no
+        espere; después, los intervalos bootstrap por defecto. El pool de
+        procesos ya debe existir (ml_analyzer.start_process_pool al arrancar).
+        """
+        with self._locks_lock:
+            if 'warm' in self._pending:
+                return None
+            self._pending.add('warm')
+
+        def run():
+            try:
+                for suite in self.SUITES if suites is None else suites:
+                    try:
+                        self.get(suite)
+                    except Exception as e:
+                        logger.error(f"❌ Error preparando modelos '{suite}': {e}")
+                try:
+                    self.intervals()
+                except Exception as e:
+                    logger.error(f"❌ Error calculando intervalos bootstrap: {e}")
+            finally:
+                with self._locks_lock:
+                    self._pending.discard('warm')
+
+        thread = threading.Thread(target=run, name='ml-registry-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def _train(self, suite, version):
+        start = time.perf_counter()
+        analyzer = MLAnalyzer(self.data_file)
+        if suite == 'basic':
+            trained = {
+                'linear_regression': analyzer.train_linear_regression(),
+                'random_forest': analyzer.train_random_forest()
+            }
+        else:
+            advanced_success = analyzer.train_advanced_models(self.workers)
+            trained = {
+                'advanced_models': advanced_success,
+                'ensemble_model': analyzer.train_ensemble_model(),
+                'total_models': len(analyzer.models)
+            }
+
+        result = {
+            'predictions': analyzer.get_predictions(),
+            'trends': analyzer.analyze_trends(),
+            'models_trained': trained
+        }
+        if suite == 'advanced':
+            X = analyzer.prepare_advanced_training_data()[0]
+            result['risk_assessment'] = analyzer.get_risk_assessment()
+            result['training_report'] = analyzer.training_report
+            result['dataset_info'] = {
+                'years_range': f"{analyzer.data['years'][0]}-{analyzer.data['years'][-1]}",
+                'total_years': len(analyzer.data['years']),
+                'features_used': list(X.columns) if advanced_success and X is not None else []
+            }
+
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(f"✅ Modelos '{suite}' entrenados para la versión {version} en {elapsed_ms:.0f} ms")
+        return {
+            'suite': suite,
+            'data_version': version,
+            'trained_at': datetime.now().isoformat(timespec='seconds'),
+            'training_ms': elapsed_ms,
+            'models': analyzer.models,
+            'feature_importance': analyzer.feature_importance,
+            'result': result,
+            'analyzer': analyzer,
+            'source': 'trained'
+        }
+
+    def _train_intervals(self, model, replicates, version):
+        start = time.perf_counter()
+        advanced = self.get('advanced')
+        intervals = advanced['analyzer'].bootstrap_intervals(model, replicates, self.workers)
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(f"✅ Intervalos bootstrap ({model}, {replicates} réplicas) para la versión "
+                    f"{advanced['data_version']} en {elapsed_ms:.0f} ms")
+        return {
+            'suite': self._intervals_suite(model, replicates),
+            'data_version': advanced['data_version'],
+            'trained_at': datetime.now().isoformat(timespec='seconds'),
+            'training_ms': elapsed_ms,
+            'models': {},
+            'feature_importance': {},
+            'result': intervals,
+            'analyzer': None,
+            'source': 'trained'
+        }
+
+    def _save(self, suite, entry):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(suite, entry['data_version'])
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            artifact = {key: value for key, value in entry.items() if key not in ('source', 'analyzer')}
+            artifact['format'] = REGISTRY_FORMAT
+            joblib.dump(artifact, tmp_path)
+            os.replace(tmp_path, path)
+            # Los artefactos de versiones anteriores ya no se pueden servir
+            for old_path in glob.glob(os.path.join(self.directory, f"{suite}-*.joblib")):
+                if old_path != path:
+                    os.remove(old_path)
+        except Exception as e:
+            logger.error(f"❌ Error guardando modelos '{suite}': {e}")
+
+    def _load(self, suite, version):
+        path = self._path(suite, version)
+        if not os.path.exists(path):
+            return None
+        try:
+            artifact = joblib.load(path)
+        except Exception as e:
+            logger.error(f"❌ Error cargando modelos '{suite}' desde {path}: {e}")
+            return None
+        if artifact.get('format') != REGISTRY_FORMAT or artifact.get('data_version') != version:
+            return None
+        artifact.pop('format')
+        # Analizador con los modelos ya ajustados, para predecir sin reentrenar
+        analyzer = None
+        if artifact['models']:
+            analyzer = MLAnalyzer(self.data_file)
+            analyzer.models = artifact['models']
+            analyzer.feature_importance = artifact['feature_importance']
+        artifact['analyzer'] = analyzer
+        artifact['source'] = 'disk'
+        logger.info(f"✅ Modelos '{suite}' cargados desde {path}")
+        return artifact
+
+    def describe(self, entry):
+        """Metadatos de una entrada para las respuestas de la API"""
+        return {
+            'data_version': entry['data_version'],
+            'trained_at': entry['trained_at'],
+            'training_ms': entry['training_ms'],
+            'source': entry['source']
+        }
+
+    def status(self):
+        """Estado del registro sin entrenar nada"""
+        version = self.data_version()
+        suites = {}
+        with self._locks_lock:
+            cached = set(self._entries) - set(self.SUITES)
+        for suite in list(self.SUITES) + sorted(cached):
+            entry = self._entries.get(suite)
+            if entry is None:
+                suites[suite] = {'ready': False}
+            else:
+                suites[suite] = dict(self.describe(entry), ready=entry['data_version'] == version,
+                                     models=list(entry['models'].keys()))
+        return {
+            'data_version': version,
+            'directory': self.directory,
+            'workers': self.workers,
+            'bootstrap': {'model': self.bootstrap_model, 'replicates': self.bootstrap_replicates,
+                          'on_demand_replicates': sorted(set(self.ON_DEMAND_REPLICATES)
+                                                         | {self.bootstrap_replicates}),
+                          'pending': self.pending_intervals()},
+            'suites': suites
+        }
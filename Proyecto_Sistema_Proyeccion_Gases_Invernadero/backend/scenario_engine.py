@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from ml_analyzer import DEFAULT_SCENARIO, FEATURE_COLUMNS
+
+
+def parse_values(text, max_values):
+    """
+    Valores de un parámetro desde la URL: `inicio:fin:n` (n valores
+    equiespaciados), una lista `a,b,c` o un único número. Como mucho
+    `max_values`, comprobado antes de crear ningún array.
+    """
+    text = text.strip()
+    if ':' in text:
+        parts = text.split(':')
+        if len(parts) != 3:
+            raise ValueError(f"Rango inválido '{text}': use inicio:fin:n")
+        start, stop, count = float(parts[0]), float(parts[1]), int(parts[2])
+        if not 1 <= count <= max_values:
+            raise ValueError(f"Rango inválido '{text}': n debe estar entre 1 y {max_values}")
+        values = np.linspace(start, stop, count)
+    else:
+        items = text.split(',')
+        if len(items) > max_values:
+            raise ValueError(f"Demasiados valores ({len(items)}, máximo {max_values})")
+        values = np.array([float(value) for value in items if value.strip()])
+    if values.size == 0 or not np.all(np.isfinite(values)):
+        raise ValueError(f"Valores inválidos: '{text}'")
+    return values
+
+
+class ScenarioEngine:
+    """
+    Simulación de miles de escenarios de emisiones con los modelos avanzados.
+
+    Cada escenario combina una trayectoria de precio del carbono, de cuota
+    renovable y de crecimiento del PIB (`DEFAULT_SCENARIO` es la proyección
+    por defecto). En modo rejilla se evalúan todas las combinaciones de los
+    valores de cada parámetro; con `samples` se sortean escenarios uniformes
+    dentro del rango de cada uno. Los valores deben estar dentro de
+    `PARAMETER_RANGES`, fuera de los cuales las características dejan de
+    tener sentido (PIB negativo, desbordamientos). Las trayectorias parten del último año del
+    dataset anterior o igual al primer año proyectado (el dataset ya incluye
+    proyecciones hasta 2100). Las características de todos los
+    escenarios se construyen con NumPy y se puntúan en lotes de hasta
+    `batch_rows` filas, una llamada por modelo y lote. El resultado son
+    bandas de percentiles por año, cacheadas por versión de los datos.
+    """
+
+    PARAMETERS = tuple(DEFAULT_SCENARIO)
+    DEFAULT_GRID = {
+        'carbon_price_growth': np.linspace(0.0, 30.0, 11),
+        'renewable_growth': np.linspace(0.0, 2.4, 11),
+        'gdp_growth': np.linspace(0.01, 0.04, 13)
+    }
+    # Dominio admitido de cada parámetro (mínimo, máximo), ambos incluidos
+    PARAMETER_RANGES = {
+        'carbon_price_growth': (-50.0, 200.0),  # USD por tonelada y año
+        'renewable_growth': (0.0, 10.0),        # puntos porcentuales por año
+        'gdp_growth': (-0.1, 0.15)              # crecimiento anual del PIB
+    }
+    DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+    def __init__(self, registry, max_scenarios=20000, batch_rows=200000, cache_size=32):
+        self.registry = registry
+        self.max_scenarios = max_scenarios
+        self.batch_rows = batch_rows
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def grid_from_args(self, args):
+        """Rejilla de parámetros desde los argumentos de la URL (por defecto, DEFAULT_GRID)"""
+        grid = {}
+        for name in self.PARAMETERS:
+            text = args.get(name)
+            grid[name] = parse_values(text, self.max_scenarios) if text else self.DEFAULT_GRID[name]
+        self.check_grid(grid)
+        return grid
+
+    def check_grid(self, grid):
+        """Comprobar que los valores de cada parámetro están en PARAMETER_RANGES"""
+        for name in self.PARAMETERS:
+            low, high = self.PARAMETER_RANGES[name]
+            values = np.asarray(grid[name], dtype=float)
+            if values.size == 0 or not np.all(np.isfinite(values)):
+                raise ValueError(f"Valores inválidos para {name}")
+            if values.min() < low or values.max() > high:
+                raise ValueError(f"{name} debe estar entre {low:g} y {high:g} "
+                                 f"(recibido {values.min():g} a {values.max():g})")
+
+    def _scenarios(self, grid, samples, seed):
+        """Matriz (escenarios × parámetros) de la rejilla completa o de una muestra"""
+        if samples is None:
+            count = int(np.prod([len(grid[name]) for name in self.PARAMETERS]))
+            if count > self.max_scenarios:
+                raise ValueError(f"La rejilla tiene {count} escenarios (máximo {self.max_scenarios})")
+            mesh = np.meshgrid(*(grid[name] for name in self.PARAMETERS), indexing='ij')
+            return np.column_stack([values.ravel() for values in mesh])
+
+        if not 1 <= samples <= self.max_scenarios:
+            raise ValueError(f"samples debe estar entre 1 y {self.max_scenarios}")
+        rng = np.random.default_rng(seed)
+        return np.column_stack([
+            rng.uniform(grid[name].min(), grid[name].max(), samples) for name in self.PARAMETERS
+        ])
+
+    def run(self, grid=None, model='ensemble', samples=None, seed=42, percentiles=None):
+        """Bandas de percentiles de las emisiones proyectadas en todos los escenarios"""
+        grid = grid or self.DEFAULT_GRID
+        self.check_grid(grid)
+        percentiles = tuple(percentiles or self.DEFAULT_PERCENTILES)
+        if any(not 0 <= q <= 100 for q in percentiles):
+            raise ValueError("Los percentiles deben estar entre 0 y 100")
+
+        entry = self.registry.get('advanced')
+        key = (entry['data_version'], model, samples, seed if samples is not None else None, percentiles,
+               tuple(tuple(grid[name].tolist()) for name in self.PARAMETERS))
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return dict(self._cache[key], cached=True)
+
+        result = self._simulate(entry, grid, model, samples, seed, percentiles)
+        with self._cache_lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(result, cached=False)
+
+    def _simulate(self, entry, grid, model, samples, seed, percentiles):
+        analyzer = entry['analyzer']
+        if model not in analyzer.models:
+            raise ValueError(f"Modelo no disponible: {model}. Opciones: {', '.join(analyzer.models)}")
+        start = time.perf_counter()
+        df = analyzer.prepare_advanced_training_data()[2]
+        future_years = analyzer.models[model]['future_years']
+        known_years = df['year'][df['year'] <= future_years[0]]
+        anchor_year = known_years.max() if len(known_years) else df['year'].max()
+        scenarios = self._scenarios(grid, samples, seed)
+        # La proyección por defecto va al final del mismo lote
+        batch = np.vstack([scenarios, [[DEFAULT_SCENARIO[name] for name in self.PARAMETERS]]])
+
+        horizon = len(future_years)
+        per_batch = max(1, self.batch_rows // horizon)
+        predictions = np.empty((len(batch), horizon))
+        build_s = score_s = 0.0
+        for first in range(0, len(batch), per_batch):
+            chunk = batch[first:first + per_batch]
+            tick = time.perf_counter()
+            features = analyzer.build_scenario_features(future_years, df, chunk[:, 0], chunk[:, 1], chunk[:, 2],
+                                                        anchor_year=anchor_year)
+            build_s += time.perf_counter() - tick
+            tick = time.perf_counter()
+            rows = analyzer.predict_features(features.reshape(-1, len(FEATURE_COLUMNS)), model)
+            predictions[first:first + len(chunk)] = rows.reshape(len(chunk), horizon)
+            score_s += time.perf_counter() - tick
+
+        baseline = predictions[-1]
+        predictions = predictions[:-1]
+        bands = np.percentile(predictions, percentiles, axis=0)
+        final = predictions[:, -1]
+
+        def describe(index):
+            params = {name: float(scenarios[index, column]) for column, name in enumerate(self.PARAMETERS)}
+            return dict(params, emissions_final=float(final[index]))
+
+        return {
+            'model': model,
+            'data_version': entry['data_version'],
+            'mode': 'grid' if samples is None else 'sample',
+            'anchor_year': int(anchor_year),
+            'scenarios': len(scenarios),
+            'future_years': future_years,
+            'parameters': {
+                name: {
+                    'min': float(grid[name].min()),
+                    'max': float(grid[name].max()),
+                    'values': grid[name].tolist() if samples is None else None
+                }
+                for name in self.PARAMETERS
+            },
+            'percentiles': {f"p{q:g}": band.tolist() for q, band in zip(percentiles, bands)},
+            'mean': predictions.mean(axis=0).tolist(),
+            'baseline': dict(DEFAULT_SCENARIO, predictions=baseline.tolist()),
+            'extremes': {
+                'lowest': describe(int(np.argmin(final))),
+                'highest': describe(int(np.argmax(final)))
+            },
+            'timing': {
+                'rows_scored': int(len(batch) * horizon),
+                'batches': -(-len(batch) // per_batch),
+                'build_ms': round(build_s * 1000, 1),
+                'score_ms': round(score_s * 1000, 1),
+                'total_ms': round((time.perf_counter() - start) * 1000, 1)
+            }
+        }
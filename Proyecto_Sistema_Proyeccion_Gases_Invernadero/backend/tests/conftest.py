@@ -0,0 +1,29 @@
+import os
+import sys
+import json
+import shutil
+
+import pytest
+
+# Los módulos del backend se importan por su nombre, como hace app.py
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SAMPLE_DATA = os.path.join(BACKEND_DIR, 'greenhouse_gas_data.json')
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    """Copia del dataset del proyecto en un directorio temporal"""
+    path = tmp_path / 'data.json'
+    shutil.copy(SAMPLE_DATA, path)
+    return str(path)
+
+
+def bump_emissions(path, delta=100):
+    """Modificar el dataset (emisiones de CO2 del último año) para crear una versión nueva"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    data['gases']['CO2'][-1] += delta
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
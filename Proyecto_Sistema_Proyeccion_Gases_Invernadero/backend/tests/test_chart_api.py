@@ -0,0 +1,57 @@
+import pytest
+
+from chart_cache import ChartCache
+from conftest import bump_emissions
+from model_registry import ModelRegistry
+
+
+@pytest.fixture
+def api(data_file, tmp_path, monkeypatch):
+    """
+    Cliente de la API con la caché de gráficos sobre `data_file`. app.py se
+    importa desde un directorio sin greenhouse_gas_data.json, así que no
+    arranca el pool ni los hilos de precálculo; los gráficos se renderizan
+    en este proceso.
+    """
+    monkeypatch.chdir(tmp_path)
+    import app
+    registry = ModelRegistry(data_file, directory=str(tmp_path / 'models'))
+    cache = ChartCache(data_file, registry.data_version, directory=str(tmp_path / 'chart_cache'))
+    monkeypatch.setattr(app, 'chart_cache', cache)
+    return app.app.test_client(), registry
+
+
+def test_versioned_chart_url_is_immutable(api):
+    client, registry = api
+    version = registry.data_version()
+
+    response = client.get(f'/api/charts/image/area.png?v={version}')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert response.data.startswith(b'\x89PNG')
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert response.headers['ETag'] == f'"{version}-area"'
+
+    unversioned = client.get('/api/charts/image/area.png')
+    assert unversioned.headers['Cache-Control'] == 'no-cache'
+    assert unversioned.data == response.data
+
+
+def test_chart_revalidates_with_etag(api):
+    client, registry = api
+    etag = client.get('/api/charts/image/pie.png').headers['ETag']
+
+    not_modified = client.get('/api/charts/image/pie.png', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+    # Con datos nuevos cambia la versión y la imagen se vuelve a enviar
+    bump_emissions(registry.data_file)
+    modified = client.get('/api/charts/image/pie.png', headers={'If-None-Match': etag})
+    assert modified.status_code == 200
+    assert modified.headers['ETag'] == f'"{registry.data_version()}-pie"'
+
+
+def test_unknown_chart_is_404(api):
+    client, _ = api
+    assert client.get('/api/charts/image/nope.png').status_code == 404
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ml_analyzer
+from conftest import SAMPLE_DATA
+from ml_analyzer import DEFAULT_SCENARIO, FEATURE_COLUMNS, MLAnalyzer
+from scenario_engine import ScenarioEngine
+
+FUTURE_YEARS = list(range(2024, 2101))
+
+
+def legacy_future_features(future_years, historical_df):
+    """Características futuras tal como las calculaba create_future_features fila a fila"""
+    last_year = historical_df['year'].max()
+    last_data = historical_df[historical_df['year'] == last_year].iloc[0]
+    rows = []
+    for year in future_years:
+        years_from_last = year - last_year
+        rows.append({
+            'population': last_data['population'] * (1.008 ** years_from_last),
+            'gdp': last_data['gdp'] * (1.025 ** years_from_last),
+            'carbon_intensity': max(0.1, last_data['carbon_intensity'] * (0.98 ** years_from_last)),
+            'renewable_share': min(95, last_data['renewable_share'] + 1.2 * years_from_last),
+            'carbon_price': last_data['carbon_price'] + 15 * years_from_last,
+            'clean_investment': last_data['clean_investment'] * (1.08 ** years_from_last),
+            'energy_efficiency': last_data['energy_efficiency'] * (1.02 ** years_from_last),
+            'solar_cost': max(10, last_data['solar_cost'] * (0.97 ** years_from_last)),
+            'temperature': last_data['temperature'] + 0.02 * years_from_last,
+            'emissions_per_capita': last_data['emissions_per_capita'] * (0.98 ** years_from_last),
+            'emissions_per_gdp': last_data['emissions_per_gdp'] * (0.96 ** years_from_last),
+            'renewable_investment_ratio': last_data['renewable_investment_ratio'] * (1.05 ** years_from_last),
+            'carbon_price_effectiveness': last_data['carbon_price_effectiveness'] * (0.95 ** years_from_last),
+            'year_squared': year ** 2,
+            'year_cubed': year ** 3,
+            'log_population': np.log(last_data['population'] * (1.008 ** years_from_last)),
+            'log_gdp': np.log(last_data['gdp'] * (1.025 ** years_from_last))
+        })
+    return pd.DataFrame(rows)[FEATURE_COLUMNS]
+
+
+@pytest.fixture(scope='module')
+def trained_analyzer():
+    """Analizador con los modelos avanzados entrenados en este proceso (sin pool)"""
+    analyzer = MLAnalyzer(SAMPLE_DATA)
+    assert ml_analyzer.process_pool() == (None, 1)
+    assert analyzer.train_advanced_models()
+    assert analyzer.train_ensemble_model()
+    return analyzer
+
+
+def test_default_scenario_matches_legacy_features(data_file):
+    analyzer = MLAnalyzer(data_file)
+    df = analyzer.prepare_advanced_training_data()[2]
+    expected = legacy_future_features(FUTURE_YEARS, df)
+
+    features = analyzer.build_scenario_features(FUTURE_YEARS, df, **DEFAULT_SCENARIO)
+    assert features.shape == (1, len(FUTURE_YEARS), len(FEATURE_COLUMNS))
+    np.testing.assert_allclose(features[0], expected.to_numpy(), rtol=1e-12)
+    # Los años al cuadrado y al cubo pasan de enteros a float
+    pd.testing.assert_frame_equal(analyzer.create_future_features(FUTURE_YEARS, df), expected,
+                                  check_dtype=False)
+
+
+def test_scenario_rows_match_single_scenarios(data_file):
+    analyzer = MLAnalyzer(data_file)
+    df = analyzer.prepare_advanced_training_data()[2]
+    carbon = np.array([0.0, 15.0, 30.0])
+    features = analyzer.build_scenario_features(FUTURE_YEARS, df, carbon, 1.2, 0.025)
+
+    for row, value in enumerate(carbon):
+        single = analyzer.build_scenario_features(FUTURE_YEARS, df, value, 1.2, 0.025)[0]
+        np.testing.assert_array_equal(features[row], single)
+
+
+def test_scenario_parameters_outside_their_domain_are_rejected():
+    engine = ScenarioEngine(registry=None)
+    for args in ({'gdp_growth': '-2'}, {'gdp_growth': '1e308'}, {'renewable_growth': '-1,2'}):
+        with pytest.raises(ValueError, match='debe estar entre'):
+            engine.grid_from_args(args)
+    assert len(engine.grid_from_args({'gdp_growth': '0.01:0.03:5'})['gdp_growth']) == 5
+
+
+def test_bootstrap_does_not_depend_on_workers(trained_analyzer):
+    in_process = trained_analyzer.bootstrap_intervals('ridge', replicates=12, seed=7)
+    assert in_process['cost']['workers'] == 1
+
+    # El pool compartido se crea como en app.py, antes de cualquier otro hilo
+    pool, _ = ml_analyzer.start_process_pool(2)
+    try:
+        results = [trained_analyzer.bootstrap_intervals('ridge', replicates=12, workers=workers, seed=7)
+                   for workers in (1, 2)]
+    finally:
+        pool.shutdown()
+        ml_analyzer._pool = None
+
+    assert [result['cost']['workers'] for result in results] == [1, 2]
+    for result in results:
+        for key in ('lower_68', 'upper_68', 'lower_95', 'upper_95', 'std_dev'):
+            np.testing.assert_allclose(result[key], in_process[key], rtol=1e-9)
+
+
+def test_bootstrap_rejects_unknown_models(trained_analyzer):
+    with pytest.raises(ValueError):
+        trained_analyzer.bootstrap_intervals('ensemble', replicates=4)
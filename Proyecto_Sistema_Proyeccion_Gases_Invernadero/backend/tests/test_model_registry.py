@@ -0,0 +1,57 @@
+import os
+import glob
+
+import pytest
+
+from conftest import bump_emissions
+from model_registry import ModelRegistry
+
+
+def test_models_are_trained_once_per_version(data_file, tmp_path):
+    registry = ModelRegistry(data_file, directory=str(tmp_path / 'models'))
+    first = registry.get('basic')
+    assert first['source'] == 'trained'
+    assert registry.get('basic') is first
+
+    bump_emissions(data_file)
+    second = registry.get('basic')
+    assert second['source'] == 'trained'
+    assert second['data_version'] != first['data_version']
+    # Solo queda en disco el artefacto de la versión actual
+    assert glob.glob(str(tmp_path / 'models' / 'basic-*.joblib')) == [
+        str(tmp_path / 'models' / f"basic-{second['data_version']}.joblib")]
+
+
+def test_models_reload_from_disk_after_restart(data_file, tmp_path):
+    directory = str(tmp_path / 'models')
+    trained = ModelRegistry(data_file, directory=directory).get('basic')
+
+    reloaded = ModelRegistry(data_file, directory=directory).get('basic')
+    assert reloaded['source'] == 'disk'
+    assert reloaded['data_version'] == trained['data_version']
+    assert reloaded['result']['predictions'] == trained['result']['predictions']
+    # El analizador se reconstruye con los modelos ya ajustados
+    assert set(reloaded['analyzer'].models) == set(trained['models'])
+
+
+def test_artifacts_of_old_versions_are_not_served(data_file, tmp_path):
+    directory = str(tmp_path / 'models')
+    old = ModelRegistry(data_file, directory=directory).get('basic')
+    old_path = os.path.join(directory, f"basic-{old['data_version']}.joblib")
+    kept = str(tmp_path / 'old.joblib')
+    os.replace(old_path, kept)
+
+    bump_emissions(data_file)
+    os.replace(kept, old_path)
+    entry = ModelRegistry(data_file, directory=directory).get('basic')
+    assert entry['source'] == 'trained'
+    assert entry['data_version'] != old['data_version']
+
+
+def test_on_demand_intervals_only_accept_allowed_replicates(data_file, tmp_path):
+    registry = ModelRegistry(data_file, directory=str(tmp_path / 'models'))
+    with pytest.raises(ValueError):
+        registry.request_intervals('ridge', 2000)
+    with pytest.raises(ValueError):
+        registry.request_intervals('ensemble', 50)
+    assert registry.pending_intervals() == []
@@ -0,0 +1,243 @@
+import os
+import json
+import bisect
+import threading
+
+from instrumentacion import fase
+
+
+def estado_por_desgaste(desgaste):
+    """Clasificar el estado de un disco según su porcentaje de desgaste"""
+    if desgaste < 20:
+        return 'Excelente'
+    elif desgaste < 40:
+        return 'Bueno'
+    elif desgaste < 60:
+        return 'Moderado'
+    elif desgaste < 80:
+        return 'Alto'
+    else:
+        return 'Crítico'
+
+
+class AlmacenDiscos:
+    """
+    Almacenamiento del inventario de discos duros.
+
+    El archivo JSON original es la instantánea compactada. Cada alta, cambio o
+    baja se anexa como una línea al diario (journal) junto al JSON, de modo que
+    una escritura cuesta O(1) en lugar de reescribir el archivo completo. Cada
+    `umbral_compactacion` operaciones el diario se vuelca en una nueva
+    instantánea y se vacía. En memoria se mantiene un índice por `id`. Los IDs
+    no se reutilizan: si se eliminaron los últimos, el diario compactado
+    conserva el contador en una operación `siguiente_id`.
+
+    Las escrituras se serializan con un lock, por lo que es seguro frente a
+    solicitudes concurrentes dentro del mismo proceso.
+    """
+
+    def __init__(self, data_path, umbral_compactacion=500):
+        self.data_path = data_path
+        self.journal_path = f"{os.path.splitext(data_path)[0]}.journal"
+        self.umbral_compactacion = umbral_compactacion
+        self._lock = threading.RLock()
+        self._discos = {}
+        self._ids = []
+        self._extra = {}
+        self._siguiente_id = 1
+        self._operaciones_journal = 0
+        self._suscriptores = []
+        self.version = 0
+        self._cargar()
+
+    def _cargar(self):
+        """Cargar la instantánea JSON y reproducir el diario encima"""
+        with self._lock:
+            datos = {"discos_duros": []}
+            if os.path.exists(self.data_path):
+                with fase('carga_json'), open(self.data_path, 'r', encoding='utf-8') as f:
+                    datos = json.load(f)
+
+            self._extra = {k: v for k, v in datos.items() if k != 'discos_duros'}
+            self._discos = {disco['id']: disco for disco in datos.get('discos_duros', [])}
+            self._siguiente_id = max(self._discos, default=0) + 1
+            self._operaciones_journal = 0
+
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'r', encoding='utf-8') as f:
+                    for linea in f:
+                        try:
+                            operacion = json.loads(linea)
+                        except ValueError:
+                            # Línea incompleta por una caída durante la escritura
+                            print("⚠️ Línea inválida en el diario de discos, se ignora")
+                            continue
+                        self._aplicar(operacion)
+                        if operacion.get('op') != 'siguiente_id':
+                            self._operaciones_journal += 1
+
+            self._ids = sorted(self._discos)
+            self.version += 1
+            print(f"📁 Almacén de discos cargado: {len(self._discos)} discos, "
+                  f"{self._operaciones_journal} operaciones en el diario")
+
+    def _aplicar(self, operacion):
+        """Aplicar una operación del diario al índice en memoria"""
+        tipo = operacion.get('op')
+        if tipo in ('agregar', 'actualizar'):
+            disco = operacion['disco']
+            if disco['id'] not in self._discos:
+                self._insertar_id(disco['id'])
+            self._discos[disco['id']] = disco
+            self._siguiente_id = max(self._siguiente_id, disco['id'] + 1)
+        elif tipo == 'eliminar':
+            if self._discos.pop(operacion['id'], None) is not None:
+                posicion = bisect.bisect_left(self._ids, operacion['id'])
+                if posicion < len(self._ids) and self._ids[posicion] == operacion['id']:
+                    del self._ids[posicion]
+        elif tipo == 'siguiente_id':
+            self._siguiente_id = max(self._siguiente_id, operacion['valor'])
+
+    def _insertar_id(self, disco_id):
+        """Mantener la lista ordenada de IDs (los IDs nuevos van al final)"""
+        if not self._ids or disco_id > self._ids[-1]:
+            self._ids.append(disco_id)
+        else:
+            bisect.insort(self._ids, disco_id)
+
+    def _registrar(self, operacion):
+        """Anexar una operación al diario y compactar si corresponde"""
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(operacion, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._aplicar(operacion)
+        self._operaciones_journal += 1
+        self.version += 1
+        for suscriptor in self._suscriptores:
+            suscriptor(operacion)
+
+        if self._operaciones_journal >= self.umbral_compactacion:
+            self.compactar()
+
+    def suscribir(self, funcion):
+        """Registrar una función que recibe cada operación escrita en el diario"""
+        self._suscriptores.append(funcion)
+
+    def compactar(self):
+        """Escribir una nueva instantánea JSON y vaciar el diario (salvo el contador de IDs)"""
+        with self._lock:
+            ruta_tmp = f"{self.data_path}.tmp"
+            with open(ruta_tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.datos(), f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(ruta_tmp, self.data_path)
+
+            if self._siguiente_id > max(self._discos, default=0) + 1:
+                # Los últimos IDs se eliminaron: el JSON ya no permite deducir el contador
+                ruta_tmp = f"{self.journal_path}.tmp"
+                with open(ruta_tmp, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps({"op": "siguiente_id", "valor": self._siguiente_id}) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(ruta_tmp, self.journal_path)
+            elif os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._operaciones_journal = 0
+            print(f"🗜️ Diario de discos compactado: {len(self._discos)} discos")
+
+    def datos(self):
+        """Instantánea con la misma estructura que el archivo JSON"""
+        with self._lock:
+            return {**self._extra, 'discos_duros': list(self._discos.values())}
+
+    def metadatos(self):
+        """Secciones del JSON distintas de la lista de discos (p. ej. metricas_por_tipo)"""
+        with self._lock:
+            return dict(self._extra)
+
+    def total(self):
+        return len(self._discos)
+
+    def obtener(self, disco_id):
+        return self._discos.get(disco_id)
+
+    def pagina(self, cursor=None, limite=100, filtro=None):
+        """
+        Página de discos ordenados por ID a partir del cursor (último ID visto).
+        Solo recorre los discos necesarios para llenar la página.
+        Devuelve (discos, siguiente_cursor); el cursor es None en la última página.
+        """
+        with self._lock:
+            posicion = 0 if cursor is None else bisect.bisect_right(self._ids, cursor)
+            discos = []
+            while posicion < len(self._ids) and len(discos) < limite:
+                disco = self._discos[self._ids[posicion]]
+                if filtro is None or filtro(disco):
+                    discos.append(disco)
+                posicion += 1
+
+            hay_mas = posicion < len(self._ids)
+            siguiente = discos[-1]['id'] if discos and hay_mas else None
+            return discos, siguiente
+
+    def iterar(self, filtro=None, bloque=1000):
+        """
+        Recorrer el inventario por bloques sin copiar la lista completa.
+        El lock se toma solo mientras se lee cada bloque.
+        """
+        cursor = None
+        while True:
+            with self._lock:
+                posicion = 0 if cursor is None else bisect.bisect_right(self._ids, cursor)
+                ids = self._ids[posicion:posicion + bloque]
+                discos = [self._discos[disco_id] for disco_id in ids]
+
+            if not ids:
+                return
+            cursor = ids[-1]
+
+            for disco in discos:
+                if filtro is None or filtro(disco):
+                    yield disco
+
+    def agregar(self, disco):
+        """Agregar un disco asignándole el siguiente ID"""
+        with self._lock:
+            disco_completo = {"id": self._siguiente_id, **disco}
+            self._siguiente_id += 1
+            self._registrar({"op": "agregar", "disco": disco_completo})
+            return disco_completo
+
+    def actualizar(self, disco_id, cambios):
+        """
+        Actualizar los campos existentes de un disco.
+        Recalcula el estado si cambia el desgaste. Devuelve None si no existe.
+        """
+        with self._lock:
+            actual = self._discos.get(disco_id)
+            if actual is None:
+                return None
+
+            disco = dict(actual)
+            for key, value in cambios.items():
+                if key in disco and key != 'id':
+                    disco[key] = value
+
+            if 'porcentaje_desgaste' in cambios:
+                disco['estado'] = estado_por_desgaste(disco['porcentaje_desgaste'])
+
+            self._registrar({"op": "actualizar", "disco": disco})
+            return disco
+
+    def eliminar(self, disco_id):
+        """Eliminar un disco. Devuelve el disco eliminado o None si no existe"""
+        with self._lock:
+            disco = self._discos.get(disco_id)
+            if disco is None:
+                return None
+
+            self._registrar({"op": "eliminar", "id": disco_id})
+            return disco
@@ -1,7 +1,7 @@
 import os
 import sys
 import json
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import base64
 from io import BytesIO
@@ -13,16 +13,35 @@ sys.path.append(current_dir)
 
 from graficos import GeneradorGraficos
 from ml_processor import MLProcessor
+from almacen_discos import AlmacenDiscos, estado_por_desgaste
+from inventario_columnar import InventarioColumnar
+from entrenador import PlanificadorEntrenamiento
+from instrumentacion import instrumentacion, fase
 
 app = Flask(__name__)
 CORS(app)
 
 # Configuración
 DATA_PATH = os.path.join(os.path.dirname(current_dir), 'data', 'discos_duros.json')
+CACHE_GRAFICOS_MAX_MB = int(os.environ.get('CACHE_GRAFICOS_MAX_MB', 64))
+WORKERS_GRAFICOS = int(os.environ.get('WORKERS_GRAFICOS', 4))
+# Fracción de solicitudes perfiladas con cProfile (0 = solo las que piden ?perfil=1)
+instrumentacion.muestreo_perfil = float(os.environ.get('PERFIL_MUESTREO', 0))
 
-# Inicializar procesadores
-generador_graficos = GeneradorGraficos(DATA_PATH)
-ml_processor = MLProcessor(DATA_PATH)
+# Inicializar almacenamiento y procesadores
+almacen = AlmacenDiscos(DATA_PATH)
+inventario = InventarioColumnar(almacen)
+generador_graficos = GeneradorGraficos(DATA_PATH, almacen=almacen,
+                                       cache_max_bytes=CACHE_GRAFICOS_MAX_MB * 1024 * 1024,
+                                       workers=WORKERS_GRAFICOS)
+ml_processor = MLProcessor(DATA_PATH, almacen=almacen, inventario=inventario)
+planificador = PlanificadorEntrenamiento(ml_processor, almacen)
+
+# El pool de renderizado se crea antes de arrancar cualquier hilo (ver iniciar_pool)
+generador_graficos.iniciar_pool()
+
+# Entrenar en segundo plano desde el arranque si no hay artefacto para estos datos
+planificador.solicitar()
 
 def limpiar_datos_json(data):
     """
@@ -52,16 +71,93 @@ def health_check():
         "version": "1.0.0"
     })
 
+def construir_filtro_discos(args):
+    """
+    Filtro de discos a partir de los parámetros de la consulta:
+    tipo, marca, desgaste_min y desgaste_max. Devuelve None si no hay filtros.
+    """
+    tipo = args.get('tipo')
+    marca = args.get('marca')
+    desgaste_min = args.get('desgaste_min', type=float)
+    desgaste_max = args.get('desgaste_max', type=float)
+    
+    if tipo is None and marca is None and desgaste_min is None and desgaste_max is None:
+        return None
+    
+    tipo = tipo.lower() if tipo else None
+    marca = marca.lower() if marca else None
+    
+    def filtro(disco):
+        if tipo is not None and str(disco.get('tipo', '')).lower() != tipo:
+            return False
+        if marca is not None and str(disco.get('marca', '')).lower() != marca:
+            return False
+        if desgaste_min is not None or desgaste_max is not None:
+            try:
+                desgaste = float(disco.get('porcentaje_desgaste'))
+            except (TypeError, ValueError):
+                return False
+            if desgaste_min is not None and desgaste < desgaste_min:
+                return False
+            if desgaste_max is not None and desgaste > desgaste_max:
+                return False
+        return True
+    
+    return filtro
+
 @app.route('/api/discos', methods=['GET'])
 def get_discos():
-    """Obtener lista de discos duros"""
+    """
+    Obtener lista de discos duros.
+    - Filtros: ?tipo=SSD&marca=Samsung&desgaste_min=20&desgaste_max=80
+    - Paginación por cursor: ?limite=100&cursor=<último id recibido>
+    - Exportación NDJSON en streaming: ?formato=ndjson
+    Sin paginación, la respuesta completa también se genera por bloques.
+    """
     try:
-        datos = generador_graficos.cargar_datos()
-        return jsonify({
-            "success": True, 
-            "discos": datos.get('discos_duros', []),
-            "total": len(datos.get('discos_duros', []))
-        })
+        filtro = construir_filtro_discos(request.args)
+        
+        # El try/except de fuera no ve los errores de los generadores: el estado
+        # 200 ya se envió, así que el error se indica al final del documento
+        if request.args.get('formato') == 'ndjson':
+            def exportar():
+                try:
+                    for disco in almacen.iterar(filtro):
+                        yield json.dumps(disco, ensure_ascii=False) + "\n"
+                except Exception as e:
+                    print(f"❌ Error exportando discos: {str(e)}")
+                    yield json.dumps({"success": False, "error": f"Error exportando datos: {str(e)}"}) + "\n"
+            
+            return Response(stream_with_context(exportar()), mimetype='application/x-ndjson')
+        
+        if 'limite' in request.args or 'cursor' in request.args:
+            limite = max(1, min(request.args.get('limite', 100, type=int), 1000))
+            cursor = request.args.get('cursor', type=int)
+            discos, siguiente_cursor = almacen.pagina(cursor, limite, filtro)
+            return jsonify({
+                "success": True, 
+                "discos": discos,
+                "total": len(discos),
+                "siguiente_cursor": siguiente_cursor
+            })
+        
+        def listar():
+            # Mismo formato que antes, pero sin construir la lista completa en memoria;
+            # "success" va al final para poder indicar un error a mitad de la lista
+            yield '{"discos": ['
+            total = 0
+            try:
+                for disco in almacen.iterar(filtro):
+                    yield (", " if total else "") + json.dumps(disco, ensure_ascii=False)
+                    total += 1
+            except Exception as e:
+                print(f"❌ Error obteniendo discos: {str(e)}")
+                error = json.dumps(f"Error obteniendo datos: {str(e)}", ensure_ascii=False)
+                yield f'], "total": {total}, "success": false, "error": {error}}}'
+                return
+            yield f'], "total": {total}, "success": true}}'
+        
+        return Response(stream_with_context(listar()), mimetype='application/json')
     except Exception as e:
         print(f"❌ Error obteniendo discos: {str(e)}")
         return jsonify({
@@ -74,8 +170,7 @@ def generar_grafico_area():
     """Generar gráfico de área de desgaste"""
     try:
         print("🖼️ Generando gráfico de área...")
-        img_buffer = generador_graficos.grafico_area()
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
+        img_base64 = generador_graficos.grafico_base64('area')
         print("✅ Gráfico de área generado exitosamente")
         return jsonify({
             "success": True, 
@@ -94,8 +189,7 @@ def generar_grafico_radar():
     """Generar gráfico radar de métricas"""
     try:
         print("🖼️ Generando gráfico radar...")
-        img_buffer = generador_graficos.grafico_radar()
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
+        img_base64 = generador_graficos.grafico_base64('radar')
         print("✅ Gráfico radar generado exitosamente")
         return jsonify({
             "success": True, 
@@ -114,8 +208,7 @@ def generar_grafico_barras():
     """Generar gráfico de barras apiladas"""
     try:
         print("🖼️ Generando gráfico de barras...")
-        img_buffer = generador_graficos.grafico_barras_apiladas()
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
+        img_base64 = generador_graficos.grafico_base64('barras')
         print("✅ Gráfico de barras generado exitosamente")
         return jsonify({
             "success": True, 
@@ -134,8 +227,7 @@ def generar_grafico_pastel():
     """Generar gráfico de pastel"""
     try:
         print("🖼️ Generando gráfico de pastel...")
-        img_buffer = generador_graficos.grafico_pastel()
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
+        img_base64 = generador_graficos.grafico_base64('pastel')
         print("✅ Gráfico de pastel generado exitosamente")
         return jsonify({
             "success": True, 
@@ -149,27 +241,74 @@ def generar_grafico_pastel():
             "error": f"Error generando gráfico de pastel: {str(e)}"
         })
 
+@app.route('/api/graficos/todos', methods=['GET'])
+def generar_graficos_todos():
+    """
+    Generar todos los gráficos del dashboard en paralelo.
+    Por defecto transmite una línea NDJSON por gráfico en cuanto está listo;
+    con ?formato=json devuelve todos juntos en una sola respuesta.
+    """
+    print("🖼️ Generando todos los gráficos en paralelo...")
+    
+    if request.args.get('formato') == 'json':
+        try:
+            imagenes = dict(generador_graficos.graficos_todos())
+            print("✅ Todos los gráficos generados exitosamente")
+            return jsonify({
+                "success": True, 
+                "images": imagenes
+            })
+        except Exception as e:
+            print(f"❌ Error generando gráficos: {str(e)}")
+            return jsonify({
+                "success": False, 
+                "error": f"Error generando gráficos: {str(e)}"
+            })
+    
+    def generar():
+        try:
+            for tipo, img_base64 in generador_graficos.graficos_todos():
+                print(f"✅ Gráfico {tipo} listo")
+                yield json.dumps({"success": True, "tipo": tipo, "image": img_base64}) + "\n"
+        except Exception as e:
+            print(f"❌ Error generando gráficos: {str(e)}")
+            yield json.dumps({"success": False, "error": f"Error generando gráficos: {str(e)}"}) + "\n"
+    
+    return Response(stream_with_context(generar()), mimetype='application/x-ndjson')
+
 @app.route('/api/ml/entrenar', methods=['GET'])
 def entrenar_modelo():
-    """Entrenar modelo de machine learning"""
+    """
+    Solicitar el entrenamiento del modelo. Se ejecuta en segundo plano y solo
+    si los datos cambiaron (?forzar=1 reentrena igualmente). Devuelve las
+    métricas del último modelo publicado.
+    """
     try:
-        print("🤖 Iniciando entrenamiento del modelo...")
-        resultado = ml_processor.entrenar_modelo_prediccion()
+        forzar = request.args.get('forzar') == '1'
+        solicitud = planificador.solicitar(forzar=forzar)
+        estado_entrenamiento = planificador.estado_actual()
+        print(f"🤖 Solicitud de entrenamiento: {solicitud}")
         
-        # Limpiar datos para JSON
-        resultado_limpio = limpiar_datos_json(resultado)
-        
-        if "error" in resultado_limpio:
-            print(f"❌ Error en entrenamiento: {resultado_limpio['error']}")
+        if ml_processor.resultado_entrenamiento is None:
+            if estado_entrenamiento["estado"] == "error" and not estado_entrenamiento["en_curso"]:
+                return jsonify({
+                    "success": False, 
+                    "error": estado_entrenamiento["ultimo_error"],
+                    "entrenamiento": estado_entrenamiento
+                })
+            
             return jsonify({
                 "success": False, 
-                "error": resultado_limpio["error"]
+                "en_curso": True,
+                "error": "El modelo se está entrenando en segundo plano",
+                "entrenamiento": estado_entrenamiento
             })
         
-        print("✅ Modelo entrenado exitosamente")
         return jsonify({
             "success": True, 
-            "result": resultado_limpio
+            "result": limpiar_datos_json(ml_processor.resultado_entrenamiento),
+            "solicitud": solicitud,
+            "entrenamiento": estado_entrenamiento
         })
         
     except Exception as e:
@@ -219,6 +358,89 @@ def predecir_desgaste():
             "error": f"Error realizando predicción: {str(e)}"
         })
 
+def leer_discos_lote():
+    """
+    Leer los discos de una solicitud por lote.
+    Acepta un arreglo JSON, un objeto {"discos": [...]} o un flujo NDJSON
+    (una línea JSON por disco). Devuelve (discos, errores por línea).
+    """
+    discos = []
+    errores = []
+    
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson', 'application/jsonlines'):
+        for numero, linea in enumerate(request.stream, start=1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                disco = json.loads(linea)
+            except ValueError as e:
+                errores.append({"linea": numero, "error": f"JSON inválido: {str(e)}"})
+                continue
+            if isinstance(disco, dict):
+                discos.append(disco)
+            else:
+                errores.append({"linea": numero, "error": "Se esperaba un objeto JSON por línea"})
+        return discos, errores
+    
+    contenido = request.get_json(silent=True)
+    if isinstance(contenido, dict):
+        contenido = contenido.get('discos')
+    if not isinstance(contenido, list):
+        return None, [{"error": "Se esperaba un arreglo JSON de discos o un flujo NDJSON"}]
+    
+    for posicion, disco in enumerate(contenido):
+        if isinstance(disco, dict):
+            discos.append(disco)
+        else:
+            errores.append({"indice": posicion, "error": "Se esperaba un objeto JSON por disco"})
+    return discos, errores
+
+@app.route('/api/ml/prediccion/lote', methods=['POST'])
+def predecir_desgaste_lote():
+    """Predecir desgaste de muchos discos en una sola solicitud"""
+    try:
+        print("🔮 Recibiendo solicitud de predicción por lote...")
+        
+        discos, errores = leer_discos_lote()
+        
+        if discos is None:
+            return jsonify({
+                "success": False, 
+                "error": errores[0]["error"]
+            })
+        
+        if not discos:
+            return jsonify({
+                "success": False, 
+                "error": "No se recibieron discos válidos en la solicitud",
+                "errores": errores
+            })
+        
+        resultado = ml_processor.predecir_desgaste_lote(discos)
+        
+        if "error" in resultado:
+            print(f"❌ Error en predicción por lote: {resultado['error']}")
+            return jsonify({
+                "success": False, 
+                "error": resultado["error"]
+            })
+        
+        print(f"✅ Predicción por lote completada: {resultado['total']} discos")
+        return jsonify({
+            "success": True, 
+            "total": resultado["total"],
+            "predicciones": resultado["predicciones"],
+            "errores": errores
+        })
+        
+    except Exception as e:
+        print(f"💥 Error en predicción por lote: {traceback.format_exc()}")
+        return jsonify({
+            "success": False, 
+            "error": f"Error realizando predicción por lote: {str(e)}"
+        })
+
 @app.route('/api/ml/analisis', methods=['GET'])
 def analizar_tendencias():
     """Analizar tendencias de desgaste - VERSIÓN CORREGIDA"""
@@ -286,8 +508,10 @@ def generar_grafico_prediccion():
             })
         
         datos_prediccion = request.json
-        img_buffer = generador_graficos.grafico_prediccion_desgaste(datos_prediccion)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
+        with fase('renderizado'):
+            img_buffer = generador_graficos.grafico_prediccion_desgaste(datos_prediccion)
+        with fase('base64'):
+            img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
         
         print("✅ Gráfico de predicción generado exitosamente")
         return jsonify({
@@ -308,13 +532,21 @@ def get_metricas_tipo():
     """Obtener métricas por tipo de disco"""
     try:
         print("📋 Obteniendo métricas por tipo...")
-        datos = generador_graficos.cargar_datos()
-        metricas = datos.get('metricas_por_tipo', {})
+        metricas = almacen.metadatos().get('metricas_por_tipo', {})
+        
+        # Agregados calculados sobre el inventario columnar (memorizados por versión)
+        metricas_calculadas = {
+            "por_tipo": inventario.resumen_por('tipo'),
+            "por_marca": inventario.resumen_por('marca'),
+            "por_banda": inventario.distribucion_por_banda(),
+            "generales": inventario.estadisticas_generales()
+        }
         
         print("✅ Métricas obtenidas exitosamente")
         return jsonify({
             "success": True, 
-            "metricas": metricas
+            "metricas": metricas,
+            "metricas_calculadas": metricas_calculadas
         })
         
     except Exception as e:
@@ -329,8 +561,7 @@ def get_estado_sistema():
     """Obtener estado completo del sistema"""
     try:
         # Verificar conexión con datos
-        datos = generador_graficos.cargar_datos()
-        total_discos = len(datos.get('discos_duros', []))
+        total_discos = almacen.total()
         
         # Verificar modelo
         modelo_entrenado = ml_processor.is_trained
@@ -340,6 +571,8 @@ def get_estado_sistema():
             "base_datos": "conectada" if total_discos > 0 else "vacía",
             "total_discos": total_discos,
             "modelo_ml": "entrenado" if modelo_entrenado else "no entrenado",
+            "entrenamiento": planificador.estado_actual(),
+            "cache_graficos": generador_graficos.cache.estadisticas(),
             "endpoints_disponibles": [
                 "/api/health",
                 "/api/discos", 
@@ -347,10 +580,13 @@ def get_estado_sistema():
                 "/api/grafico/radar", 
                 "/api/grafico/barras",
                 "/api/grafico/pastel",
+                "/api/graficos/todos",
                 "/api/ml/entrenar",
                 "/api/ml/prediccion",
+                "/api/ml/prediccion/lote",
                 "/api/ml/analisis",
                 "/api/metricas",
+                "/api/metricas/rendimiento",
                 "/api/estado"
             ]
         }
@@ -390,19 +626,8 @@ def agregar_disco():
                     "error": f"Campo requerido faltante: {campo}"
                 })
         
-        # Cargar datos actuales
-        with open(DATA_PATH, 'r', encoding='utf-8') as f:
-            datos = json.load(f)
-        
-        # Generar nuevo ID
-        if datos['discos_duros']:
-            nuevo_id = max(disco['id'] for disco in datos['discos_duros']) + 1
-        else:
-            nuevo_id = 1
-        
-        # Preparar disco completo
+        # Preparar disco completo (el ID lo asigna el almacén)
         disco_completo = {
-            "id": nuevo_id,
             "tipo": nuevo_disco['tipo'],
             "marca": nuevo_disco['marca'],
             "modelo": nuevo_disco['modelo'],
@@ -419,24 +644,14 @@ def agregar_disco():
         
         # Calcular estado automáticamente si no se proporciona
         if 'estado' not in nuevo_disco:
-            desgaste = disco_completo['porcentaje_desgaste']
-            if desgaste < 20:
-                disco_completo['estado'] = 'Excelente'
-            elif desgaste < 40:
-                disco_completo['estado'] = 'Bueno'
-            elif desgaste < 60:
-                disco_completo['estado'] = 'Moderado'
-            elif desgaste < 80:
-                disco_completo['estado'] = 'Alto'
-            else:
-                disco_completo['estado'] = 'Crítico'
+            disco_completo['estado'] = estado_por_desgaste(disco_completo['porcentaje_desgaste'])
         
-        # Agregar disco
-        datos['discos_duros'].append(disco_completo)
+        # Agregar disco (se anexa al diario del almacén)
+        disco_completo = almacen.agregar(disco_completo)
+        nuevo_id = disco_completo['id']
         
-        # Guardar datos
-        with open(DATA_PATH, 'w', encoding='utf-8') as f:
-            json.dump(datos, f, indent=2, ensure_ascii=False)
+        # Los gráficos cacheados ya no reflejan los datos
+        generador_graficos.cache.invalidar()
         
         print(f"✅ Disco agregado exitosamente: ID {nuevo_id}")
         
@@ -468,52 +683,24 @@ def actualizar_disco(disco_id):
         
         datos_actualizados = request.json
         
-        # Cargar datos actuales
-        with open(DATA_PATH, 'r', encoding='utf-8') as f:
-            datos = json.load(f)
+        # Actualizar disco (recalcula el estado si cambia el desgaste)
+        disco = almacen.actualizar(disco_id, datos_actualizados)
         
-        # Buscar disco
-        disco_index = None
-        for i, disco in enumerate(datos['discos_duros']):
-            if disco['id'] == disco_id:
-                disco_index = i
-                break
-        
-        if disco_index is None:
+        if disco is None:
             return jsonify({
                 "success": False,
                 "error": f"Disco con ID {disco_id} no encontrado"
             })
         
-        # Actualizar disco
-        for key, value in datos_actualizados.items():
-            if key in datos['discos_duros'][disco_index]:
-                datos['discos_duros'][disco_index][key] = value
-        
-        # Recalcular estado si se actualizó el desgaste
-        if 'porcentaje_desgaste' in datos_actualizados:
-            desgaste = datos['discos_duros'][disco_index]['porcentaje_desgaste']
-            if desgaste < 20:
-                datos['discos_duros'][disco_index]['estado'] = 'Excelente'
-            elif desgaste < 40:
-                datos['discos_duros'][disco_index]['estado'] = 'Bueno'
-            elif desgaste < 60:
-                datos['discos_duros'][disco_index]['estado'] = 'Moderado'
-            elif desgaste < 80:
-                datos['discos_duros'][disco_index]['estado'] = 'Alto'
-            else:
-                datos['discos_duros'][disco_index]['estado'] = 'Crítico'
-        
-        # Guardar datos
-        with open(DATA_PATH, 'w', encoding='utf-8') as f:
-            json.dump(datos, f, indent=2, ensure_ascii=False)
+        # Los gráficos cacheados ya no reflejan los datos
+        generador_graficos.cache.invalidar()
         
         print(f"✅ Disco {disco_id} actualizado exitosamente")
         
         return jsonify({
             "success": True,
             "mensaje": f"Disco {disco_id} actualizado exitosamente",
-            "disco": datos['discos_duros'][disco_index]
+            "disco": disco
         })
         
     except Exception as e:
@@ -529,29 +716,17 @@ def eliminar_disco(disco_id):
     try:
         print(f"🗑️ Eliminando disco ID: {disco_id}")
         
-        # Cargar datos actuales
-        with open(DATA_PATH, 'r', encoding='utf-8') as f:
-            datos = json.load(f)
-        
-        # Buscar disco
-        disco_index = None
-        for i, disco in enumerate(datos['discos_duros']):
-            if disco['id'] == disco_id:
-                disco_index = i
-                break
+        # Eliminar disco
+        disco_eliminado = almacen.eliminar(disco_id)
         
-        if disco_index is None:
+        if disco_eliminado is None:
             return jsonify({
                 "success": False,
                 "error": f"Disco con ID {disco_id} no encontrado"
             })
         
-        # Eliminar disco
-        disco_eliminado = datos['discos_duros'].pop(disco_index)
-        
-        # Guardar datos
-        with open(DATA_PATH, 'w', encoding='utf-8') as f:
-            json.dump(datos, f, indent=2, ensure_ascii=False)
+        # Los gráficos cacheados ya no reflejan los datos
+        generador_graficos.cache.invalidar()
         
         print(f"✅ Disco {disco_id} eliminado exitosamente")
         
@@ -593,18 +768,65 @@ def internal_server_error(error):
         "message": "Ocurrió un error inesperado en el servidor"
     }), 500
 
-# Middleware para logging de requests
+# Middleware de instrumentación: latencia por endpoint, fases y perfilado opcional
 @app.before_request
 def log_request_info():
-    if request.method != 'OPTIONS':  # Ignorar preflight requests de CORS
-        print(f"📍 [{request.method}] {request.path} - IP: {request.remote_addr}")
+    if request.method == 'OPTIONS':  # Ignorar preflight requests de CORS
+        return
+    print(f"📍 [{request.method}] {request.path} - IP: {request.remote_addr}")
+    instrumentacion.iniciar_solicitud(perfilar=request.args.get('perfil') == '1')
 
 @app.after_request
 def log_response_info(response):
-    if request.method != 'OPTIONS':
-        print(f"📍 Response: {response.status_code} - {request.path}")
+    if request.method == 'OPTIONS':
+        return response
+    
+    # Ruta de Flask (no la URL) para no crear una serie por cada ID
+    endpoint = request.url_rule.rule if request.url_rule else 'sin_ruta'
+    metodo = request.method
+    estado = response.status_code
+    
+    fases = instrumentacion.fases_actuales()
+    if fases:
+        response.headers['Server-Timing'] = ", ".join(
+            f"{nombre};dur={duracion * 1000:.2f}" for nombre, duracion in fases.items())
+    
+    def finalizar():
+        # Al cerrar la respuesta, para incluir el cuerpo de las respuestas en streaming
+        duracion, id_perfil = instrumentacion.finalizar_solicitud(endpoint, metodo, estado)
+        if duracion is not None:
+            perfil = f" - perfil {id_perfil}" if id_perfil else ""
+            print(f"📍 Response: {estado} - {request_path} ({duracion * 1000:.1f} ms){perfil}")
+    
+    request_path = request.path
+    response.call_on_close(finalizar)
     return response
 
+@app.route('/api/metricas/rendimiento', methods=['GET'])
+def metricas_rendimiento():
+    """Métricas de rendimiento en formato de texto de Prometheus"""
+    return Response(instrumentacion.prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/metricas/rendimiento/perfiles', methods=['GET'])
+def listar_perfiles():
+    """Perfiles de cProfile guardados (solicitudes con ?perfil=1 o muestreadas)"""
+    return jsonify({
+        "success": True,
+        "perfiles": instrumentacion.perfiles(),
+        "muestreo": instrumentacion.muestreo_perfil
+    })
+
+@app.route('/api/metricas/rendimiento/perfiles/<int:id_perfil>', methods=['GET'])
+def obtener_perfil(id_perfil):
+    """Informe de un perfil (pstats ordenado por tiempo acumulado)"""
+    perfil = instrumentacion.perfil(id_perfil)
+    if perfil is None:
+        return jsonify({
+            "success": False, 
+            "error": f"Perfil {id_perfil} no encontrado"
+        }), 404
+    return Response(perfil["informe"], mimetype='text/plain')
+
 # Ruta de información de la API
 @app.route('/api', methods=['GET'])
 def api_info():
@@ -625,16 +847,20 @@ def api_info():
                 "/api/grafico/area - Gráfico de área de desgaste",
                 "/api/grafico/radar - Gráfico radar de métricas", 
                 "/api/grafico/barras - Gráfico de barras apiladas",
-                "/api/grafico/pastel - Gráfico de pastel de distribución"
+                "/api/grafico/pastel - Gráfico de pastel de distribución",
+                "/api/graficos/todos - Todos los gráficos en paralelo (NDJSON, ?formato=json)"
             ],
             "machine_learning": [
-                "/api/ml/entrenar - Entrenar modelo predictivo",
+                "/api/ml/entrenar - Entrenar modelo predictivo en segundo plano (?forzar=1)",
                 "/api/ml/prediccion - Predecir desgaste (POST)",
+                "/api/ml/prediccion/lote - Predecir desgaste por lote, JSON o NDJSON (POST)",
                 "/api/ml/analisis - Análisis de tendencias"
             ],
             "datos": [
-                "/api/discos - Lista de discos",
+                "/api/discos - Lista de discos (filtros tipo/marca/desgaste_min/desgaste_max, ?limite=&cursor=, ?formato=ndjson)",
                 "/api/metricas - Métricas por tipo de disco",
+                "/api/metricas/rendimiento - Latencias y tiempo por fase (Prometheus); ?perfil=1 en cualquier endpoint para perfilarlo",
+                "/api/metricas/rendimiento/perfiles - Perfiles de cProfile guardados",
                 "/api/estado - Estado del sistema"
             ],
             "gestion": [
@@ -0,0 +1,114 @@
+import time
+import threading
+from datetime import datetime
+
+from ml_processor import MLProcessor
+
+
+class PlanificadorEntrenamiento:
+    """
+    Entrenamiento del modelo de desgaste en segundo plano.
+
+    Reentrena solo cuando cambia la versión de los datos del almacén, en un
+    hilo trabajador, y publica el modelo nuevo en el MLProcessor que atiende
+    las solicitudes cuando el entrenamiento termina. Las solicitudes que llegan
+    mientras hay un entrenamiento en curso no lanzan otro: al terminar, el hilo
+    vuelve a comprobar la versión y reentrena una sola vez si cambió.
+    """
+
+    def __init__(self, ml_processor, almacen):
+        self.ml_processor = ml_processor
+        self.almacen = almacen
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._forzar = False
+        self.version_entrenada = None
+        self.version_en_curso = None
+        self.estado = "sin entrenar"
+        self.ultimo_error = None
+        self.ultima_duracion_s = None
+        self.ultimo_entrenamiento = None
+        self.entrenamientos = 0
+
+        # Un artefacto guardado para estos mismos datos evita el primer entrenamiento
+        if ml_processor.is_trained or ml_processor.cargar_artefacto():
+            self.version_entrenada = almacen.version
+            self.estado = "entrenado"
+
+        ml_processor.planificador = self
+        almacen.suscribir(lambda operacion: self.solicitar())
+
+    def solicitar(self, forzar=False):
+        """Programar un reentrenamiento si los datos cambiaron (no bloquea)"""
+        with self._lock:
+            if self._hilo is not None:
+                self._forzar = self._forzar or forzar
+                return "en_curso"
+
+            if not forzar and self.almacen.version == self.version_entrenada:
+                return "actualizado"
+
+            self._forzar = forzar
+            self._hilo = threading.Thread(target=self._entrenar, name="entrenamiento-desgaste", daemon=True)
+            self._hilo.start()
+            return "programado"
+
+    def _entrenar(self):
+        """Hilo trabajador: entrenar hasta que el modelo corresponda a la última versión"""
+        while True:
+            with self._lock:
+                version = self.almacen.version
+                if version == self.version_entrenada and not self._forzar:
+                    self._hilo = None
+                    self.version_en_curso = None
+                    return
+                self._forzar = False
+                self.version_en_curso = version
+                self.estado = "entrenando"
+
+            print(f"🤖 Entrenamiento en segundo plano (versión de datos {version})...")
+            inicio = time.perf_counter()
+            try:
+                # Se entrena un procesador nuevo para no tocar el que atiende solicitudes
+                candidato = MLProcessor(self.ml_processor.data_path, almacen=self.almacen)
+                resultado = candidato.entrenar_modelo_prediccion()
+            except Exception as e:
+                candidato = None
+                resultado = {"error": f"Error entrenando modelo: {str(e)}"}
+            duracion = time.perf_counter() - inicio
+
+            if "error" not in resultado:
+                self.ml_processor.publicar(candidato)
+
+            with self._lock:
+                # Aunque falle, no se reintenta la misma versión en bucle
+                self.version_entrenada = version
+                self.ultima_duracion_s = round(duracion, 3)
+                self.ultimo_entrenamiento = datetime.now().isoformat(timespec='seconds')
+                self.entrenamientos += 1
+                if "error" in resultado:
+                    self.estado = "error"
+                    self.ultimo_error = resultado["error"]
+                    print(f"❌ Entrenamiento en segundo plano fallido: {resultado['error']}")
+                else:
+                    self.estado = "entrenado"
+                    self.ultimo_error = None
+                    print(f"✅ Modelo publicado ({duracion:.2f}s)")
+
+    def en_curso(self):
+        with self._lock:
+            return self._hilo is not None
+
+    def estado_actual(self):
+        """Estado del entrenamiento para /api/estado"""
+        with self._lock:
+            return {
+                "estado": self.estado,
+                "en_curso": self._hilo is not None,
+                "version_datos": self.almacen.version,
+                "version_entrenada": self.version_entrenada,
+                "entrenamientos": self.entrenamientos,
+                "ultima_duracion_s": self.ultima_duracion_s,
+                "ultimo_entrenamiento": self.ultimo_entrenamiento,
+                "ultimo_error": self.ultimo_error
+            }
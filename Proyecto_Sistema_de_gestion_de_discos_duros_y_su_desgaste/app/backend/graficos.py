@@ -1,15 +1,85 @@
 import os
 import json
+import pickle
+import base64
+import tempfile
+import time
+import signal
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 import numpy as np
 from io import BytesIO
 from math import pi
 
+from instrumentacion import instrumentacion, fase
+
+class CacheGraficos:
+    """Caché LRU de gráficos renderizados (PNG en base64) con límite de memoria"""
+    
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+    
+    def obtener(self, clave):
+        with self._lock:
+            valor = self._entradas.get(clave)
+            if valor is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+    
+    def guardar(self, clave, valor):
+        tamano = len(valor)
+        if tamano > self.max_bytes:
+            return
+        
+        with self._lock:
+            if clave in self._entradas:
+                self._bytes -= len(self._entradas.pop(clave))
+            self._entradas[clave] = valor
+            self._bytes += tamano
+            
+            # Expulsar los gráficos usados hace más tiempo hasta respetar el límite
+            while self._bytes > self.max_bytes:
+                _, expulsado = self._entradas.popitem(last=False)
+                self._bytes -= len(expulsado)
+    
+    def invalidar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+    
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos
+            }
+
 class GeneradorGraficos:
-    def __init__(self, data_path):
+    def __init__(self, data_path, almacen=None, cache_max_bytes=64 * 1024 * 1024, workers=4):
         self.data_path = data_path
+        self.almacen = almacen
+        self.dpi = 100
+        self.cache = CacheGraficos(cache_max_bytes)
+        self.workers = workers
+        self._pool_procesos = None
+        self._lock_pool = threading.Lock()
         self.configurar_estilos()
     
     def configurar_estilos(self):
@@ -29,14 +99,142 @@ class GeneradorGraficos:
         sns.set_palette(sns.color_palette(self.colors))
     
     def cargar_datos(self):
-        """Cargar datos desde el archivo JSON"""
+        """Cargar datos desde el almacén o, si no hay, desde el archivo JSON"""
         try:
-            with open(self.data_path, 'r', encoding='utf-8') as f:
+            if self.almacen is not None:
+                return self.almacen.datos()
+            with fase('carga_json'), open(self.data_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
             print(f"Error cargando datos: {e}")
             return self._generar_datos_ejemplo()
     
+    def version_datos(self):
+        """Versión de los datos: contador del almacén o mtime/tamaño del JSON"""
+        if self.almacen is not None:
+            return self.almacen.version
+        try:
+            stat = os.stat(self.data_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def _parametros_estilo(self):
+        """Parámetros de estilo que afectan a la imagen renderizada"""
+        return (self.dpi, tuple(self.colors), self.colors_ssd, self.colors_hdd,
+                self.colors_nvme, self.colors_otros)
+    
+    def generadores(self):
+        """Gráficos del dashboard por tipo"""
+        return {
+            'area': self.grafico_area,
+            'radar': self.grafico_radar,
+            'barras': self.grafico_barras_apiladas,
+            'pastel': self.grafico_pastel
+        }
+    
+    def _clave_cache(self, tipo):
+        return (tipo, self.version_datos(), self._parametros_estilo())
+    
+    def grafico_base64(self, tipo):
+        """Obtener un gráfico en base64, desde la caché si los datos no cambiaron"""
+        generadores = self.generadores()
+        if tipo not in generadores:
+            raise ValueError(f"Tipo de gráfico desconocido: {tipo}")
+        
+        clave = self._clave_cache(tipo)
+        img_base64 = self.cache.obtener(clave)
+        if img_base64 is not None:
+            print(f"⚡ Gráfico {tipo} servido desde caché")
+            return img_base64
+        
+        with fase('renderizado'):
+            img_buffer = generadores[tipo]()
+        with fase('base64'):
+            img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
+        self.cache.guardar(clave, img_base64)
+        return img_base64
+    
+    def iniciar_pool(self):
+        """
+        Crear el pool de procesos de renderizado con todos sus procesos.
+        Los procesos se crean con fork, así que hay que llamarlo desde el hilo
+        principal antes de arrancar otros hilos (entrenamiento, servidor):
+        un fork mientras otro hilo tiene tomado un lock (p. ej. el de importar
+        un módulo) deja al proceso hijo bloqueado para siempre.
+        """
+        with self._lock_pool:
+            if self._pool_procesos is None and self.workers > 0:
+                self._pool_procesos = ProcessPoolExecutor(max_workers=self.workers,
+                                                          mp_context=multiprocessing.get_context('fork'),
+                                                          initializer=_iniciar_proceso)
+                # La primera tarea crea ya todos los procesos
+                self._pool_procesos.submit(os.getpid).result()
+            return self._pool_procesos
+    
+    def _pool(self):
+        """Pool de procesos creado en el arranque (None: renderizar en este proceso)"""
+        with self._lock_pool:
+            if self._pool_procesos is not None and getattr(self._pool_procesos, '_broken', False):
+                # Nunca se vuelve a hacer fork fuera del arranque
+                print("⚠️ Pool de renderizado roto: los gráficos se renderizan en este proceso")
+                self._pool_procesos = None
+            return self._pool_procesos
+    
+    def graficos_todos(self):
+        """
+        Renderizar todos los gráficos del dashboard en paralelo.
+        Genera pares (tipo, imagen_base64) a medida que cada uno termina;
+        los que ya están en caché se entregan de inmediato. Los datos se
+        serializan una sola vez en un archivo temporal que leen los procesos
+        del pool, en lugar de enviarlos con cada gráfico.
+        """
+        pendientes = {}
+        datos = None
+        ruta_datos = None
+        
+        for tipo in self.generadores():
+            clave = self._clave_cache(tipo)
+            img_base64 = self.cache.obtener(clave)
+            if img_base64 is not None:
+                yield tipo, img_base64
+                continue
+            
+            if datos is None:
+                datos = self.cargar_datos()
+            pool = self._pool()
+            if pool is None:
+                with fase('renderizado'):
+                    img_buffer = self.generadores()[tipo](datos)
+                with fase('base64'):
+                    img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
+                self.cache.guardar(clave, img_base64)
+                yield tipo, img_base64
+                continue
+            if ruta_datos is None:
+                ruta_datos = _escribir_datos_temporales(datos)
+            futuro = pool.submit(_renderizar_en_proceso, self.data_path, tipo, ruta_datos)
+            pendientes[futuro] = (tipo, clave)
+        
+        try:
+            for futuro in as_completed(pendientes):
+                tipo, clave = pendientes[futuro]
+                img_base64, duracion_render, duracion_base64 = futuro.result()
+                # Los tiempos se miden en el proceso trabajador y se registran aquí
+                instrumentacion.registrar_fase('renderizado', duracion_render)
+                instrumentacion.registrar_fase('base64', duracion_base64)
+                self.cache.guardar(clave, img_base64)
+                yield tipo, img_base64
+        finally:
+            if ruta_datos is not None:
+                # Si el cliente se desconecta, los gráficos en cola ya no hacen falta
+                for futuro in pendientes:
+                    futuro.cancel()
+                for futuro in pendientes:
+                    if not futuro.cancelled():
+                        futuro.exception()
+                os.remove(ruta_datos)
+    
     def _generar_datos_ejemplo(self):
         """Generar datos de ejemplo si no existe el archivo"""
         datos_ejemplo = {
@@ -88,9 +286,10 @@ class GeneradorGraficos:
                 colores.append(self.colors_otros)
         return colores
     
-    def grafico_area(self):
+    def grafico_area(self, datos=None):
         """Generar gráfico de área de desgaste por tipo de disco - CORREGIDO"""
-        datos = self.cargar_datos()
+        if datos is None:
+            datos = self.cargar_datos()
         df = pd.DataFrame(datos['discos_duros'])
         
         # Verificar que hay datos
@@ -100,7 +299,8 @@ class GeneradorGraficos:
         
         print(f"📊 Tipos de disco en datos: {df['tipo'].unique()}")
         
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig = Figure(figsize=(12, 6))
+        ax = fig.subplots()
         
         try:
             # Agrupar por tipo y tiempo de uso
@@ -153,12 +353,13 @@ class GeneradorGraficos:
                    horizontalalignment='center', verticalalignment='center',
                    transform=ax.transAxes, fontsize=12, color='red')
         
-        plt.tight_layout()
+        fig.tight_layout()
         return self._fig_a_buffer(fig)
     
-    def grafico_radar(self):
+    def grafico_radar(self, datos=None):
         """Generar gráfico radar de métricas de salud del disco - CORREGIDO"""
-        datos = self.cargar_datos()
+        if datos is None:
+            datos = self.cargar_datos()
         df = pd.DataFrame(datos['discos_duros'])
         
         if df.empty:
@@ -167,7 +368,7 @@ class GeneradorGraficos:
         
         print(f"📊 Tipos de disco para radar: {df['tipo'].unique()}")
         
-        fig = plt.figure(figsize=(10, 10))
+        fig = Figure(figsize=(10, 10))
         ax = fig.add_subplot(111, polar=True)
         
         try:
@@ -236,9 +437,10 @@ class GeneradorGraficos:
         
         return self._fig_a_buffer(fig)
     
-    def grafico_barras_apiladas(self):
+    def grafico_barras_apiladas(self, datos=None):
         """Generar gráfico de barras apiladas de estado de discos por tipo - CORREGIDO"""
-        datos = self.cargar_datos()
+        if datos is None:
+            datos = self.cargar_datos()
         df = pd.DataFrame(datos['discos_duros'])
         
         if df.empty:
@@ -247,7 +449,8 @@ class GeneradorGraficos:
         
         print(f"📊 Tipos de disco para barras: {df['tipo'].unique()}")
         
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig = Figure(figsize=(12, 6))
+        ax = fig.subplots()
         
         try:
             # Clasificar discos por estado
@@ -313,12 +516,13 @@ class GeneradorGraficos:
                    horizontalalignment='center', verticalalignment='center',
                    transform=ax.transAxes, fontsize=12, color='red')
         
-        plt.tight_layout()
+        fig.tight_layout()
         return self._fig_a_buffer(fig)
     
-    def grafico_pastel(self):
+    def grafico_pastel(self, datos=None):
         """Generar gráfico de pastel de distribución por tipo y estado - CORREGIDO"""
-        datos = self.cargar_datos()
+        if datos is None:
+            datos = self.cargar_datos()
         df = pd.DataFrame(datos['discos_duros'])
         
         if df.empty:
@@ -327,7 +531,8 @@ class GeneradorGraficos:
         
         print(f"📊 Tipos de disco para pastel: {df['tipo'].unique()}")
         
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 7))
+        fig = Figure(figsize=(15, 7))
+        ax1, ax2 = fig.subplots(1, 2)
         
         try:
             # Gráfico 1: Distribución por tipo
@@ -393,12 +598,13 @@ class GeneradorGraficos:
                        horizontalalignment='center', verticalalignment='center',
                        transform=ax.transAxes, fontsize=12, color='red')
         
-        plt.tight_layout()
+        fig.tight_layout()
         return self._fig_a_buffer(fig)
     
     def grafico_prediccion_desgaste(self, datos_prediccion):
         """Generar gráfico de predicción de desgaste futuro"""
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig = Figure(figsize=(12, 6))
+        ax = fig.subplots()
         
         try:
             # Datos actuales
@@ -438,12 +644,13 @@ class GeneradorGraficos:
                    horizontalalignment='center', verticalalignment='center',
                    transform=ax.transAxes, fontsize=12, color='red')
         
-        plt.tight_layout()
+        fig.tight_layout()
         return self._fig_a_buffer(fig)
     
     def _generar_grafico_vacio(self, mensaje):
         """Generar un gráfico vacío con mensaje de error"""
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig = Figure(figsize=(10, 6))
+        ax = fig.subplots()
         ax.text(0.5, 0.5, mensaje, 
                horizontalalignment='center', verticalalignment='center',
                transform=ax.transAxes, fontsize=14, color='white',
@@ -460,8 +667,47 @@ class GeneradorGraficos:
     def _fig_a_buffer(self, fig):
         """Convertir figura matplotlib a buffer de bytes"""
         buffer = BytesIO()
-        fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight', 
+        fig.savefig(buffer, format='png', dpi=self.dpi, bbox_inches='tight', 
                    facecolor='#1a1a1a', edgecolor='none')
         buffer.seek(0)
-        plt.close(fig)
-        return buffer
\ No newline at end of file
+        return buffer
+
+
+# Instancia por proceso trabajador del pool de renderizado
+_generador_proceso = None
+# Últimos datos leídos por el proceso trabajador: (ruta, datos)
+_datos_proceso = (None, None)
+
+def _escribir_datos_temporales(datos):
+    """Serializar los datos una vez para los procesos del pool; devuelve la ruta"""
+    directorio = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    # Nombre único aunque se reutilice uno borrado: los procesos cachean por ruta
+    descriptor, ruta = tempfile.mkstemp(prefix=f'discos-graficos-{os.getpid()}-{time.monotonic_ns()}-',
+                                        suffix='.pkl', dir=directorio)
+    with os.fdopen(descriptor, 'wb') as f:
+        pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return ruta
+
+def _iniciar_proceso():
+    """Inicio de un proceso del pool: Ctrl+C solo lo atiende el servidor"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _renderizar_en_proceso(data_path, tipo, ruta_datos):
+    """
+    Renderizar un gráfico dentro de un proceso trabajador con los datos del
+    archivo `ruta_datos` (se leen una vez por proceso y archivo).
+    Devuelve (imagen_base64, segundos de renderizado, segundos de codificación).
+    """
+    global _generador_proceso, _datos_proceso
+    if _generador_proceso is None:
+        _generador_proceso = GeneradorGraficos(data_path)
+    if _datos_proceso[0] != ruta_datos:
+        with open(ruta_datos, 'rb') as f:
+            _datos_proceso = (ruta_datos, pickle.load(f))
+    datos = _datos_proceso[1]
+    
+    inicio = time.perf_counter()
+    img_buffer = _generador_proceso.generadores()[tipo](datos)
+    fin_render = time.perf_counter()
+    img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
+    return img_base64, fin_render - inicio, time.perf_counter() - fin_render
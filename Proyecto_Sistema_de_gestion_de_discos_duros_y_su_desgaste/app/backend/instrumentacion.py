@@ -0,0 +1,221 @@
+import io
+import time
+import random
+import pstats
+import cProfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Límites de los buckets de los histogramas (segundos), como los de Prometheus
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histograma:
+    """Histograma acumulativo con buckets fijos (sin dependencias externas)"""
+
+    def __init__(self, buckets=BUCKETS_SEGUNDOS):
+        self.buckets = buckets
+        self.conteos = [0] * len(buckets)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.suma += valor
+        self.total += 1
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.conteos[i] += 1
+                break
+
+    def lineas_prometheus(self, nombre, etiquetas):
+        """Líneas _bucket/_sum/_count en formato de texto de Prometheus"""
+        base = ",".join(f'{clave}="{_escapar(valor)}"' for clave, valor in etiquetas.items())
+        separador = "," if base else ""
+        lineas = []
+        acumulado = 0
+        for limite, conteo in zip(self.buckets, self.conteos):
+            acumulado += conteo
+            lineas.append(f'{nombre}_bucket{{{base}{separador}le="{limite}"}} {acumulado}')
+        lineas.append(f'{nombre}_bucket{{{base}{separador}le="+Inf"}} {self.total}')
+        lineas.append(f'{nombre}_sum{{{base}}} {self.suma:.6f}')
+        lineas.append(f'{nombre}_count{{{base}}} {self.total}')
+        return lineas
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Instrumentacion:
+    """
+    Métricas de rendimiento de la API.
+
+    - Latencia por endpoint (histograma por ruta, método y código de estado).
+    - Tiempo por fase (carga_json, limpieza, entrenamiento, prediccion,
+      renderizado, base64), medido con `fase()` desde cualquier módulo. Las
+      fases de una solicitud se acumulan también por solicitud para la
+      cabecera Server-Timing.
+    - Perfilado con cProfile de solicitudes concretas (?perfil=1) o de una
+      fracción aleatoria de ellas (muestreo). Solo se perfila una solicitud a
+      la vez; los informes recientes se guardan en memoria.
+    """
+
+    def __init__(self, muestreo_perfil=0.0, max_perfiles=20):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._solicitudes = {}
+        self._fases = {}
+        self.muestreo_perfil = muestreo_perfil
+        self._lock_perfil = threading.Lock()
+        self._perfiles = OrderedDict()
+        self.max_perfiles = max_perfiles
+        self._siguiente_perfil = 1
+
+    # --- Fases ---
+
+    def registrar_fase(self, nombre, duracion):
+        """Registrar la duración (s) de una fase ya medida"""
+        with self._lock:
+            histograma = self._fases.get(nombre)
+            if histograma is None:
+                histograma = self._fases[nombre] = Histograma()
+            histograma.observar(duracion)
+
+        fases_solicitud = getattr(self._local, 'fases', None)
+        if fases_solicitud is not None:
+            fases_solicitud[nombre] = fases_solicitud.get(nombre, 0.0) + duracion
+
+    @contextmanager
+    def fase(self, nombre):
+        """Medir un bloque de código como una fase"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_fase(nombre, time.perf_counter() - inicio)
+
+    # --- Solicitudes ---
+
+    def iniciar_solicitud(self, perfilar=False):
+        """Marcar el inicio de una solicitud en el hilo actual"""
+        perfil_anterior = getattr(self._local, 'perfil', None)
+        if perfil_anterior is not None:
+            # La respuesta anterior no llegó a cerrarse: liberar su perfil
+            perfil_anterior.disable()
+            self._lock_perfil.release()
+
+        self._local.inicio = time.perf_counter()
+        self._local.fases = {}
+        self._local.perfil = None
+
+        if perfilar or (self.muestreo_perfil > 0 and random.random() < self.muestreo_perfil):
+            # cProfile no admite perfiles simultáneos fiables: si hay uno activo, se omite
+            if self._lock_perfil.acquire(blocking=False):
+                perfil = cProfile.Profile()
+                try:
+                    perfil.enable()
+                    self._local.perfil = perfil
+                except ValueError:
+                    self._lock_perfil.release()
+
+    def fases_actuales(self):
+        """Tiempo por fase (s) acumulado hasta ahora en la solicitud del hilo actual"""
+        return dict(getattr(self._local, 'fases', None) or {})
+
+    def finalizar_solicitud(self, endpoint, metodo, estado):
+        """
+        Registrar la latencia de la solicitud del hilo actual.
+        Devuelve (duración en segundos, id del perfil o None).
+        """
+        inicio = getattr(self._local, 'inicio', None)
+        if inicio is None:
+            return None, None
+        duracion = time.perf_counter() - inicio
+        self._local.inicio = None
+        self._local.fases = None
+
+        id_perfil = None
+        perfil = getattr(self._local, 'perfil', None)
+        if perfil is not None:
+            perfil.disable()
+            self._local.perfil = None
+            self._lock_perfil.release()
+            id_perfil = self._guardar_perfil(perfil, endpoint, metodo, duracion)
+
+        clave = (endpoint, metodo, str(estado))
+        with self._lock:
+            histograma = self._solicitudes.get(clave)
+            if histograma is None:
+                histograma = self._solicitudes[clave] = Histograma()
+            histograma.observar(duracion)
+
+        return duracion, id_perfil
+
+    # --- Perfiles ---
+
+    def _guardar_perfil(self, perfil, endpoint, metodo, duracion, limite=40):
+        salida = io.StringIO()
+        estadisticas = pstats.Stats(perfil, stream=salida)
+        estadisticas.sort_stats('cumulative').print_stats(limite)
+
+        with self._lock:
+            id_perfil = self._siguiente_perfil
+            self._siguiente_perfil += 1
+            self._perfiles[id_perfil] = {
+                "id": id_perfil,
+                "endpoint": endpoint,
+                "metodo": metodo,
+                "duracion_s": round(duracion, 6),
+                "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "informe": salida.getvalue()
+            }
+            while len(self._perfiles) > self.max_perfiles:
+                self._perfiles.popitem(last=False)
+        return id_perfil
+
+    def perfiles(self):
+        """Resumen de los perfiles guardados (sin el informe)"""
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != 'informe'} for p in self._perfiles.values()]
+
+    def perfil(self, id_perfil):
+        with self._lock:
+            return self._perfiles.get(id_perfil)
+
+    # --- Exportación ---
+
+    def prometheus(self):
+        """Todas las métricas en formato de texto de Prometheus"""
+        with self._lock:
+            solicitudes = sorted(self._solicitudes.items())
+            fases = sorted(self._fases.items())
+
+            lineas = [
+                "# HELP discos_api_solicitud_duracion_segundos Latencia de las solicitudes por endpoint",
+                "# TYPE discos_api_solicitud_duracion_segundos histogram"
+            ]
+            for (endpoint, metodo, estado), histograma in solicitudes:
+                lineas.extend(histograma.lineas_prometheus(
+                    "discos_api_solicitud_duracion_segundos",
+                    {"endpoint": endpoint, "metodo": metodo, "estado": estado}))
+
+            lineas += [
+                "# HELP discos_api_fase_duracion_segundos Tiempo por fase (carga, limpieza, entrenamiento, renderizado...)",
+                "# TYPE discos_api_fase_duracion_segundos histogram"
+            ]
+            for nombre, histograma in fases:
+                lineas.extend(histograma.lineas_prometheus(
+                    "discos_api_fase_duracion_segundos", {"fase": nombre}))
+
+            lineas += [
+                "# HELP discos_api_perfiles_guardados Perfiles de cProfile disponibles",
+                "# TYPE discos_api_perfiles_guardados gauge",
+                f"discos_api_perfiles_guardados {len(self._perfiles)}"
+            ]
+        return "\n".join(lineas) + "\n"
+
+
+# Instancia compartida por todos los módulos del backend
+instrumentacion = Instrumentacion()
+fase = instrumentacion.fase
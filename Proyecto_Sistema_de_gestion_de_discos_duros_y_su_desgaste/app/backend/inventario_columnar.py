@@ -0,0 +1,269 @@
+import threading
+import numpy as np
+import pandas as pd
+
+from instrumentacion import fase
+
+# Columnas numéricas y su valor por defecto cuando faltan o no son válidas
+COLUMNAS_NUMERICAS = {
+    'capacidad_gb': 1000,
+    'tiempo_uso_meses': 12,
+    'horas_encendido': 0,
+    'ciclos_escritura': 0,
+    'temperatura_promedio': 0,
+    'bad_sectors': 0,
+    'porcentaje_desgaste': 50.0
+}
+
+COLUMNAS_CORRELACION = ['capacidad_gb', 'tiempo_uso_meses', 'horas_encendido',
+                        'ciclos_escritura', 'temperatura_promedio', 'bad_sectors']
+
+# Bandas de desgaste (mismos cortes que el estado de un disco)
+BANDAS_DESGASTE = [0, 20, 40, 60, 80, np.inf]
+ETIQUETAS_BANDAS = ['Excelente', 'Bueno', 'Moderado', 'Alto', 'Crítico']
+
+
+def limpiar_discos(df):
+    """Limpiar un DataFrame de discos: columnas numéricas y desgaste válido (0-100%)"""
+    if df.empty:
+        return df
+
+    with fase('limpieza'):
+        return _limpiar_discos(df)
+
+
+def _limpiar_discos(df):
+    df_clean = df.copy()
+    for col, defecto in COLUMNAS_NUMERICAS.items():
+        if col in df_clean.columns:
+            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(defecto)
+
+    if 'porcentaje_desgaste' not in df_clean.columns:
+        return df_clean.iloc[0:0]
+
+    for col in ('tipo', 'marca'):
+        if col in df_clean.columns:
+            df_clean[col] = df_clean[col].fillna('Desconocido').astype(str)
+
+    return df_clean[df_clean['porcentaje_desgaste'].between(0, 100)]
+
+
+class InventarioColumnar:
+    """
+    Representación columnar del inventario compartida por los endpoints.
+
+    El DataFrame limpio se construye una sola vez a partir del almacén y luego
+    se actualiza con los cambios que el almacén notifica: en la siguiente
+    lectura solo se limpian las filas modificadas. Las actualizaciones se
+    escriben en su sitio (`.loc` sobre el índice de ids), sin copiar el resto
+    del DataFrame; solo las altas y las bajas crean un DataFrame nuevo. Los
+    agregados derivados se memorizan por versión de datos y se recalculan
+    tras cada cambio sobre el DataFrame ya limpio.
+    """
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+        self._lock = threading.Lock()
+        self._df = None
+        self._pendientes = {}
+        self._agregados = {}
+        self.version = 0
+        almacen.suscribir(self._registrar_cambio)
+
+    def _registrar_cambio(self, operacion):
+        """Recibir una operación del almacén (se aplica en la siguiente lectura)"""
+        with self._lock:
+            if operacion.get('op') == 'eliminar':
+                self._pendientes[operacion['id']] = None
+            else:
+                disco = operacion['disco']
+                self._pendientes[disco['id']] = disco
+            self._agregados = {}
+            self.version += 1
+
+    def dataframe(self):
+        """
+        DataFrame limpio indexado por id (no debe modificarse). Las
+        actualizaciones posteriores lo modifican en su sitio: quien necesite
+        una copia estable entre escrituras debe hacer `.copy()`.
+        """
+        if self._df is None:
+            with self._lock:
+                self._pendientes = {}
+            # Fuera del lock: el almacén puede estar notificando un cambio
+            discos = self.almacen.datos().get('discos_duros', [])
+            df = limpiar_discos(pd.DataFrame(discos))
+            if not df.empty:
+                df = df.set_index(df['id'].rename(None))
+            with self._lock:
+                if self._df is None:
+                    self._df = df
+
+        with self._lock:
+            if self._pendientes:
+                with fase('actualizacion_columnar'):
+                    self._df = _aplicar_cambios(self._df, self._pendientes)
+                self._pendientes = {}
+            return self._df
+
+    def total(self):
+        return int(len(self.dataframe()))
+
+    def _memo(self, nombre, calcular):
+        """Calcular un agregado una sola vez por versión de datos"""
+        with self._lock:
+            version = self.version
+            if nombre in self._agregados:
+                return self._agregados[nombre]
+
+        resultado = calcular(self.dataframe())
+
+        with self._lock:
+            if self.version == version:
+                self._agregados[nombre] = resultado
+        return resultado
+
+    def resumen_por(self, columna):
+        """Estadísticas de desgaste agrupadas por una columna (tipo, marca, ...)"""
+        return self._memo(f"resumen_{columna}", lambda df: resumen_desgaste(df, columna))
+
+    def distribucion_por_banda(self):
+        """Cantidad de discos por tipo y banda de desgaste"""
+        return self._memo("bandas", distribucion_bandas)
+
+    def correlaciones(self):
+        return self._memo("correlaciones", correlaciones_desgaste)
+
+    def estadisticas_generales(self):
+        return self._memo("generales", estadisticas_generales)
+
+    def discos_criticos(self):
+        return self._memo("criticos", discos_criticos)
+
+
+def _conserva_tipo(actual, nuevo):
+    """True si los valores de tipo `nuevo` caben en una columna de tipo `actual`"""
+    if actual == nuevo:
+        return True
+    try:
+        return np.result_type(actual, nuevo) == actual
+    except TypeError:
+        return False
+
+
+def _aplicar_cambios(df, cambios):
+    """
+    Aplicar a `df` los cambios {id: disco o None si se eliminó}.
+    Aplicar dos veces los mismos cambios es idempotente.
+    """
+    nuevos = [d for d in cambios.values() if d is not None]
+    df_nuevos = limpiar_discos(pd.DataFrame(nuevos)) if nuevos else pd.DataFrame()
+    if not df_nuevos.empty:
+        df_nuevos = df_nuevos.set_index(df_nuevos['id'].rename(None))
+
+    if df.empty:
+        return df_nuevos if not df_nuevos.empty else df
+    if not df_nuevos.empty and not df_nuevos.columns.isin(df.columns).all():
+        # Columnas nuevas: reemplazar las filas modificadas copiando el DataFrame
+        df = df.drop(index=list(cambios), errors='ignore')
+        return pd.concat([df, df_nuevos])
+
+    # Eliminados, o que dejaron de ser válidos al limpiarlos (desgaste fuera de 0-100%)
+    bajas = df.index.intersection(pd.Index(list(cambios)).difference(df_nuevos.index))
+    if len(bajas):
+        df = df.drop(index=bajas)
+
+    actualizados = df_nuevos.index.intersection(df.index)
+    if len(actualizados):
+        filas = df_nuevos.loc[actualizados].reindex(columns=df.columns)
+        # Columnas cuyo tipo cambia (p. ej. enteros -> decimales): se reconstruyen enteras
+        cambian = [col for col in df.columns if not _conserva_tipo(df[col].dtype, filas[col].dtype)]
+        for col in cambian:
+            df[col] = pd.concat([df[col].drop(index=actualizados), filas[col]]).reindex(df.index)
+        iguales = df.columns.difference(cambian, sort=False)
+        if len(iguales):
+            df.loc[actualizados, iguales] = filas[iguales]
+
+    altas = df_nuevos.index.difference(df.index)
+    if len(altas):
+        df = pd.concat([df, df_nuevos.loc[altas]])
+    return df
+
+
+def resumen_desgaste(df, columna):
+    """mean/std/count/max del desgaste por grupo en una sola pasada groupby"""
+    if df.empty or columna not in df.columns:
+        return {}
+
+    grupos = df.groupby(columna, sort=True)['porcentaje_desgaste'].agg(['mean', 'std', 'count', 'max'])
+    grupos['std'] = grupos['std'].fillna(0.0)
+    return {
+        str(nombre): {
+            'mean': float(fila['mean']),
+            'std': float(fila['std']),
+            'count': int(fila['count']),
+            'max': float(fila['max'])
+        }
+        for nombre, fila in grupos.iterrows()
+    }
+
+
+def distribucion_bandas(df):
+    """Tabla tipo x banda de desgaste calculada con binning vectorizado"""
+    if df.empty:
+        return {}
+
+    bandas = pd.cut(df['porcentaje_desgaste'], bins=BANDAS_DESGASTE,
+                    labels=ETIQUETAS_BANDAS, right=False)
+    tabla = pd.crosstab(df['tipo'], bandas).reindex(columns=ETIQUETAS_BANDAS, fill_value=0)
+    return {
+        str(tipo): {banda: int(valor) for banda, valor in fila.items()}
+        for tipo, fila in tabla.iterrows()
+    }
+
+
+def correlaciones_desgaste(df):
+    """Correlación de cada métrica numérica con el desgaste"""
+    columnas = [col for col in COLUMNAS_CORRELACION if col in df.columns]
+    if df.empty or not columnas:
+        return {}
+
+    corr = df[columnas].astype(float).corrwith(df['porcentaje_desgaste'].astype(float))
+    corr = corr.replace([np.inf, -np.inf], np.nan).fillna(0.0).round(3)
+    return {col: float(valor) for col, valor in corr.items()}
+
+
+def estadisticas_generales(df):
+    if df.empty:
+        return {"total_discos": 0, "desgaste_promedio": 0.0, "discos_en_riesgo": 0}
+
+    desgaste = df['porcentaje_desgaste']
+    return {
+        "total_discos": int(len(df)),
+        "desgaste_promedio": float(desgaste.mean()),
+        "discos_en_riesgo": int((desgaste > 60).sum())
+    }
+
+
+def discos_criticos(df, umbral=70):
+    """Discos con desgaste por encima del umbral, sin iterar fila a fila con iterrows"""
+    if df.empty:
+        return []
+
+    criticos = df[df['porcentaje_desgaste'] > umbral]
+    n = len(criticos)
+
+    def columna(nombre, defecto):
+        if nombre not in criticos.columns:
+            return [defecto] * n
+        return criticos[nombre].fillna(defecto).tolist()
+
+    ids = [int(valor) for valor in columna('id', 0)]
+    desgastes = criticos['porcentaje_desgaste'].astype(float).tolist()
+    claves = ('id', 'tipo', 'marca', 'modelo', 'porcentaje_desgaste', 'estado')
+    return [
+        dict(zip(claves, (i, str(tipo), str(marca), str(modelo), desgaste, str(estado))))
+        for i, tipo, marca, modelo, desgaste, estado in zip(
+            ids, columna('tipo', 'Desconocido'), columna('marca', 'Desconocida'),
+            columna('modelo', 'Desconocido'), desgastes, columna('estado', 'Crítico'))
+    ]
@@ -1,4 +1,9 @@
+import os
 import json
+import time
+import hashlib
+import threading
+import joblib
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
@@ -6,12 +11,38 @@ from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
+from inventario_columnar import (resumen_desgaste, distribucion_bandas, correlaciones_desgaste,
+                                 estadisticas_generales, discos_criticos)
+from instrumentacion import instrumentacion, fase
 import warnings
 warnings.filterwarnings('ignore')
 
+
+def modelos_candidatos():
+    """Modelos que se comparan en cada entrenamiento (también los usa el benchmark)"""
+    return {
+        'RandomForest': RandomForestRegressor(
+            n_estimators=30, 
+            max_depth=5, 
+            random_state=42,
+            min_samples_split=2,
+            min_samples_leaf=1
+        ),
+        'GradientBoosting': GradientBoostingRegressor(
+            n_estimators=30,
+            max_depth=3,
+            random_state=42,
+            learning_rate=0.1
+        ),
+        'LinearRegression': LinearRegression()
+    }
+
+
 class MLProcessor:
-    def __init__(self, data_path):
+    def __init__(self, data_path, almacen=None, inventario=None):
         self.data_path = data_path
+        self.almacen = almacen
+        self.inventario = inventario
         self.scaler = StandardScaler()
         self.label_encoder = LabelEncoder()
         self.model = None
@@ -21,12 +52,28 @@ class MLProcessor:
             'horas_encendido', 'ciclos_escritura', 'temperatura_promedio',
             'bad_sectors', 'marca_encoded'
         ]
+        
+        # Artefacto del modelo (modelo + escalador + codificadores + esquema)
+        self.model_dir = os.path.join(os.path.dirname(data_path), 'modelos')
+        self.marca_encoder = LabelEncoder()
+        self.tipos_conocidos = []
+        self.marcas_conocidas = []
+        self.metricas_por_tipo = {}
+        self.version_datos = None
+        self.resultado_entrenamiento = None
+        
+        # Publicación del modelo desde el entrenamiento en segundo plano
+        self._lock_modelo = threading.RLock()
+        self.planificador = None
     
     def cargar_y_limpiar_datos(self):
         """Cargar y limpiar datos de discos duros - VERSIÓN MEJORADA"""
         try:
-            with open(self.data_path, 'r', encoding='utf-8') as f:
-                datos = json.load(f)
+            if self.almacen is not None:
+                datos = self.almacen.datos()
+            else:
+                with fase('carga_json'), open(self.data_path, 'r', encoding='utf-8') as f:
+                    datos = json.load(f)
             
             df = pd.DataFrame(datos['discos_duros'])
             
@@ -38,6 +85,7 @@ class MLProcessor:
             print(f"📁 Datos crudos cargados: {len(df)} registros")
             
             # Limpiar datos - reemplazar NaN y valores problemáticos
+            inicio_limpieza = time.perf_counter()
             df_clean = df.copy()
             
             # Columnas numéricas con valores por defecto
@@ -72,6 +120,7 @@ class MLProcessor:
                 print("❌ No hay registros con desgaste válido (0-100%)")
                 return pd.DataFrame(), datos
             
+            instrumentacion.registrar_fase('limpieza', time.perf_counter() - inicio_limpieza)
             print(f"✅ Datos limpios: {len(df_clean)} registros válidos")
             
             # Preparar características para ML
@@ -84,8 +133,7 @@ class MLProcessor:
                     df_clean['tipo_encoded'] = 0
                 
                 # Codificar marca
-                marca_encoder = LabelEncoder()
-                df_clean['marca_encoded'] = marca_encoder.fit_transform(df_clean['marca'])
+                df_clean['marca_encoded'] = self.marca_encoder.fit_transform(df_clean['marca'])
                 
             except Exception as e:
                 print(f"⚠️ Error en codificación: {e}")
@@ -137,7 +185,8 @@ class MLProcessor:
     def entrenar_modelo_prediccion(self):
         """Entrenar modelo para predecir desgaste de discos - VERSIÓN ROBUSTA"""
         try:
-            df, _ = self.cargar_y_limpiar_datos()
+            version = self._version_archivo_datos()
+            df, datos = self.cargar_y_limpiar_datos()
             
             if df.empty:
                 error_msg = "No hay datos válidos para entrenar el modelo"
@@ -198,22 +247,7 @@ class MLProcessor:
                 X_test_scaled = X_test.values
             
             # Entrenar múltiples modelos con configuración robusta
-            models = {
-                'RandomForest': RandomForestRegressor(
-                    n_estimators=30, 
-                    max_depth=5, 
-                    random_state=42,
-                    min_samples_split=2,
-                    min_samples_leaf=1
-                ),
-                'GradientBoosting': GradientBoostingRegressor(
-                    n_estimators=30,
-                    max_depth=3,
-                    random_state=42,
-                    learning_rate=0.1
-                ),
-                'LinearRegression': LinearRegression()
-            }
+            models = modelos_candidatos()
             
             best_score = -np.inf
             best_model = None
@@ -223,7 +257,8 @@ class MLProcessor:
             for name, model in models.items():
                 try:
                     print(f"🔧 Entrenando {name}...")
-                    model.fit(X_train_scaled, y_train)
+                    with fase('entrenamiento'):
+                        model.fit(X_train_scaled, y_train)
                     
                     # Predecir y calcular métricas
                     y_pred = model.predict(X_test_scaled)
@@ -284,6 +319,15 @@ class MLProcessor:
             self.model = best_model
             self.is_trained = True
             
+            # Esquema necesario para predecir sin volver a leer el JSON
+            if df['tipo'].nunique() > 1:
+                self.tipos_conocidos = [str(t) for t in getattr(self.label_encoder, 'classes_', [])]
+            else:
+                self.tipos_conocidos = []
+            self.marcas_conocidas = [str(m) for m in getattr(self.marca_encoder, 'classes_', [])]
+            self.metricas_por_tipo = datos.get('metricas_por_tipo', {}) if isinstance(datos, dict) else {}
+            self.version_datos = version
+            
             # Métricas finales
             y_pred_best = best_model.predict(X_test_scaled)
             mae_final = mean_absolute_error(y_test, y_pred_best)
@@ -299,6 +343,9 @@ class MLProcessor:
                 "rango_desgaste": f"{y.min():.1f}% - {y.max():.1f}%"
             }
             
+            self.resultado_entrenamiento = resultado
+            self.guardar_artefacto()
+            
             print(f"✅ Modelo {best_model_name} entrenado exitosamente")
             print(f"   R²: {best_score:.3f}, MAE: {mae_final:.2f}%")
             print(f"   Muestras: {len(X_train)} entrenamiento, {len(X_test)} prueba")
@@ -312,6 +359,91 @@ class MLProcessor:
             print(f"📋 Traceback: {traceback.format_exc()}")
             return {"error": error_msg}
     
+    def _version_archivo_datos(self):
+        """Hash SHA-256 del archivo JSON (y su diario), identifica la versión de los datos"""
+        sha = hashlib.sha256()
+        rutas = [self.data_path]
+        if self.almacen is not None and os.path.exists(self.almacen.journal_path):
+            rutas.append(self.almacen.journal_path)
+        for ruta in rutas:
+            with open(ruta, 'rb') as f:
+                for bloque in iter(lambda: f.read(1024 * 1024), b''):
+                    sha.update(bloque)
+        return sha.hexdigest()
+    
+    def _ruta_artefacto(self, version):
+        """Ruta del artefacto del modelo para una versión de datos"""
+        return os.path.join(self.model_dir, f"modelo_desgaste_{version[:16]}.joblib")
+    
+    def guardar_artefacto(self):
+        """Guardar modelo, escalador, codificadores y esquema en disco"""
+        if self.model is None or self.version_datos is None:
+            return False
+        
+        try:
+            os.makedirs(self.model_dir, exist_ok=True)
+            ruta = self._ruta_artefacto(self.version_datos)
+            ruta_tmp = f"{ruta}.tmp"
+            joblib.dump({
+                'version_datos': self.version_datos,
+                'model': self.model,
+                'scaler': self.scaler,
+                'label_encoder': self.label_encoder,
+                'marca_encoder': self.marca_encoder,
+                'features': self.features,
+                'tipos_conocidos': self.tipos_conocidos,
+                'marcas_conocidas': self.marcas_conocidas,
+                'metricas_por_tipo': self.metricas_por_tipo,
+                'resultado_entrenamiento': self.resultado_entrenamiento
+            }, ruta_tmp)
+            os.replace(ruta_tmp, ruta)
+            
+            # Eliminar artefactos de versiones anteriores de los datos
+            for nombre in os.listdir(self.model_dir):
+                anterior = os.path.join(self.model_dir, nombre)
+                if nombre.startswith('modelo_desgaste_') and nombre.endswith('.joblib') and anterior != ruta:
+                    os.remove(anterior)
+            
+            print(f"💾 Artefacto del modelo guardado en {ruta}")
+            return True
+        
+        except Exception as e:
+            print(f"⚠️ Error guardando artefacto del modelo: {e}")
+            return False
+    
+    def cargar_artefacto(self):
+        """Cargar el artefacto que corresponde a la versión actual de los datos"""
+        try:
+            version = self._version_archivo_datos()
+            ruta = self._ruta_artefacto(version)
+            
+            if not os.path.exists(ruta):
+                return False
+            
+            artefacto = joblib.load(ruta)
+            if artefacto.get('version_datos') != version:
+                return False
+            
+            with self._lock_modelo:
+                self.model = artefacto['model']
+                self.scaler = artefacto['scaler']
+                self.label_encoder = artefacto['label_encoder']
+                self.marca_encoder = artefacto['marca_encoder']
+                self.features = artefacto['features']
+                self.tipos_conocidos = artefacto['tipos_conocidos']
+                self.marcas_conocidas = artefacto['marcas_conocidas']
+                self.metricas_por_tipo = artefacto['metricas_por_tipo']
+                self.resultado_entrenamiento = artefacto.get('resultado_entrenamiento')
+                self.version_datos = version
+                self.is_trained = True
+            
+            print(f"📦 Artefacto del modelo cargado desde {ruta}")
+            return True
+        
+        except Exception as e:
+            print(f"⚠️ Error cargando artefacto del modelo: {e}")
+            return False
+    
     def _obtener_importancias(self, model):
         """Obtener importancia de características del modelo"""
         try:
@@ -335,71 +467,89 @@ class MLProcessor:
         except Exception as e:
             return {"error_importancias": str(e)}
     
-    def predecir_desgaste(self, datos_disco):
-        """Predecir porcentaje de desgaste para un disco nuevo"""
-        try:
-            print("🔮 Iniciando predicción...")
-            
-            # Si el modelo no está entrenado, entrenarlo primero
-            if not self.is_trained or self.model is None:
+    def publicar(self, otro):
+        """Reemplazar el modelo en uso por el de otro procesador ya entrenado"""
+        with self._lock_modelo:
+            self.model = otro.model
+            self.scaler = otro.scaler
+            self.label_encoder = otro.label_encoder
+            self.marca_encoder = otro.marca_encoder
+            self.features = otro.features
+            self.tipos_conocidos = otro.tipos_conocidos
+            self.marcas_conocidas = otro.marcas_conocidas
+            self.metricas_por_tipo = otro.metricas_por_tipo
+            self.resultado_entrenamiento = otro.resultado_entrenamiento
+            self.version_datos = otro.version_datos
+            self.is_trained = True
+    
+    def _asegurar_modelo(self):
+        """Cargar el artefacto o entrenar si el modelo no está listo"""
+        if not self.is_trained or self.model is None:
+            if not self.cargar_artefacto():
+                if self.planificador is not None:
+                    # Nunca entrenar dentro de una solicitud: delegar al hilo de entrenamiento
+                    self.planificador.solicitar()
+                    return {"error": "El modelo se está entrenando en segundo plano, intente de nuevo en unos segundos"}
+                
                 print("🔄 Modelo no entrenado, entrenando ahora...")
                 entrenamiento = self.entrenar_modelo_prediccion()
                 
                 if "error" in entrenamiento:
                     return {"error": f"No se pudo entrenar el modelo: {entrenamiento['error']}"}
+        return None
+    
+    def predecir_desgaste(self, datos_disco):
+        """Predecir porcentaje de desgaste para un disco nuevo"""
+        try:
+            print("🔮 Iniciando predicción...")
+            
+            error_modelo = self._asegurar_modelo()
+            if error_modelo:
+                return error_modelo
             
             print("✅ Modelo listo para predicción")
             
-            # Preparar datos de entrada
-            df_input = pd.DataFrame([datos_disco])
+            # Leer el modelo publicado de forma consistente (puede reemplazarse en segundo plano)
+            with self._lock_modelo:
+                # Preparar datos de entrada
+                df_input = pd.DataFrame([datos_disco])
             
-            # Codificar tipo
-            try:
-                df_original, _ = self.cargar_y_limpiar_datos()
-                if not df_original.empty:
-                    tipos_unicos = df_original['tipo'].unique()
-                    if datos_disco['tipo'] in tipos_unicos:
+                # Codificar tipo
+                try:
+                    if datos_disco['tipo'] in self.tipos_conocidos:
                         df_input['tipo_encoded'] = self.label_encoder.transform([datos_disco['tipo']])[0]
                     else:
                         df_input['tipo_encoded'] = 0
-                else:
+                except:
                     df_input['tipo_encoded'] = 0
-            except:
-                df_input['tipo_encoded'] = 0
             
-            # Codificar marca
-            try:
-                df_original, _ = self.cargar_y_limpiar_datos()
-                if not df_original.empty:
-                    marca_encoder = LabelEncoder()
-                    marcas_unicas = df_original['marca'].unique()
-                    marca_encoder.fit(marcas_unicas)
-                    if datos_disco['marca'] in marcas_unicas:
-                        df_input['marca_encoded'] = marca_encoder.transform([datos_disco['marca']])[0]
+                # Codificar marca
+                try:
+                    if datos_disco['marca'] in self.marcas_conocidas:
+                        df_input['marca_encoded'] = self.marca_encoder.transform([datos_disco['marca']])[0]
                     else:
                         df_input['marca_encoded'] = 0
-                else:
+                except:
                     df_input['marca_encoded'] = 0
-            except:
-                df_input['marca_encoded'] = 0
             
-            # Asegurar todas las características
-            for feature in self.features:
-                if feature not in df_input.columns:
-                    df_input[feature] = 0
-                else:
-                    df_input[feature] = pd.to_numeric(df_input[feature], errors='coerce').fillna(0)
+                # Asegurar todas las características
+                for feature in self.features:
+                    if feature not in df_input.columns:
+                        df_input[feature] = 0
+                    else:
+                        df_input[feature] = pd.to_numeric(df_input[feature], errors='coerce').fillna(0)
             
-            # Preparar para predicción
-            X_input = df_input[self.features]
+                # Preparar para predicción
+                X_input = df_input[self.features]
             
-            try:
-                X_input_scaled = self.scaler.transform(X_input)
-            except:
-                X_input_scaled = X_input.values
+                try:
+                    X_input_scaled = self.scaler.transform(X_input)
+                except:
+                    X_input_scaled = X_input.values
             
-            # Realizar predicción
-            prediccion = self.model.predict(X_input_scaled)[0]
+                # Realizar predicción
+                with fase('prediccion'):
+                    prediccion = self.model.predict(X_input_scaled)[0]
             
             # Validar predicción
             if np.isnan(prediccion) or np.isinf(prediccion):
@@ -438,17 +588,112 @@ class MLProcessor:
             print(f"❌ {error_msg}")
             return {"error": error_msg}
     
+    def predecir_desgaste_lote(self, discos):
+        """Predecir desgaste de muchos discos en una sola pasada vectorizada"""
+        try:
+            if not discos:
+                return {"error": "No se recibieron discos para predecir"}
+            
+            print(f"🔮 Iniciando predicción por lote de {len(discos)} discos...")
+            
+            error_modelo = self._asegurar_modelo()
+            if error_modelo:
+                return error_modelo
+            
+            # Leer el modelo publicado de forma consistente (puede reemplazarse en segundo plano)
+            with self._lock_modelo:
+                df_input = pd.DataFrame(discos)
+                n = len(df_input)
+            
+                tipos = df_input['tipo'].astype(str) if 'tipo' in df_input.columns else pd.Series(['Desconocido'] * n)
+                marcas = df_input['marca'].astype(str) if 'marca' in df_input.columns else pd.Series([''] * n)
+            
+                # Codificar categorías con un mapeo en lugar de transform fila a fila
+                codigos_tipo = {t: i for i, t in enumerate(getattr(self.label_encoder, 'classes_', []))
+                                if t in self.tipos_conocidos}
+                codigos_marca = {m: i for i, m in enumerate(getattr(self.marca_encoder, 'classes_', []))
+                                 if m in self.marcas_conocidas}
+                df_input['tipo_encoded'] = tipos.map(codigos_tipo).fillna(0).to_numpy()
+                df_input['marca_encoded'] = marcas.map(codigos_marca).fillna(0).to_numpy()
+            
+                # Asegurar todas las características
+                for feature in self.features:
+                    if feature not in df_input.columns:
+                        df_input[feature] = 0
+                    else:
+                        df_input[feature] = pd.to_numeric(df_input[feature], errors='coerce').fillna(0)
+            
+                X_input = df_input[self.features]
+            
+                try:
+                    X_input_scaled = self.scaler.transform(X_input)
+                except:
+                    X_input_scaled = X_input.values
+            
+                with fase('prediccion'):
+                    predicciones = np.asarray(self.model.predict(X_input_scaled), dtype=float)
+            
+            # Reemplazar predicciones inválidas por la estimación basada en tiempo de uso
+            if 'tiempo_uso_meses' in df_input.columns:
+                tiempo_uso = pd.to_numeric(df_input['tiempo_uso_meses'], errors='coerce').fillna(12).to_numpy(dtype=float)
+            else:
+                tiempo_uso = np.full(n, 12.0)
+            invalidas = ~np.isfinite(predicciones)
+            if invalidas.any():
+                print(f"⚠️ {int(invalidas.sum())} predicciones inválidas, usando valor por defecto")
+                predicciones[invalidas] = np.clip(tiempo_uso[invalidas] * 2, 5, 95)
+            
+            predicciones = np.clip(predicciones, 0, 100)
+            
+            # Determinar estado
+            estados = np.select(
+                [predicciones < 20, predicciones < 40, predicciones < 60, predicciones < 80],
+                ["Excelente", "Bueno", "Moderado", "Alto"],
+                default="Crítico"
+            )
+            
+            vida_util = self._calcular_vida_util_lote(tipos, df_input['tiempo_uso_meses'], predicciones)
+            
+            ids = df_input['id'].tolist() if 'id' in df_input.columns else [None] * n
+            desgastes = np.round(predicciones, 1).tolist()
+            estados = estados.tolist()
+            meses = vida_util['meses_restantes'].tolist()
+            riesgos = vida_util['riesgo'].tolist()
+            recomendaciones = vida_util['recomendacion'].tolist()
+            
+            resultados = []
+            for i in range(n):
+                resultado = {
+                    "porcentaje_desgaste_predicho": desgastes[i],
+                    "estado_predicho": estados[i],
+                    "vida_util_restante": {
+                        "meses_restantes": meses[i],
+                        "riesgo": riesgos[i],
+                        "recomendacion": recomendaciones[i]
+                    }
+                }
+                # Solo se devuelven ids escalares (una lista o un dict no identifica la fila)
+                if pd.api.types.is_scalar(ids[i]) and not pd.isna(ids[i]):
+                    resultado["id"] = ids[i]
+                resultados.append(resultado)
+            
+            print(f"✅ Predicción por lote completada: {n} discos")
+            return {"predicciones": resultados, "total": n}
+            
+        except Exception as e:
+            error_msg = f"Error en predicción por lote: {str(e)}"
+            print(f"❌ {error_msg}")
+            return {"error": error_msg}
+    
     def _calcular_vida_util(self, datos_disco, desgaste_predicho):
         """Calcular vida útil restante estimada"""
         try:
-            with open(self.data_path, 'r', encoding='utf-8') as f:
-                datos = json.load(f)
-            
             tipo_disco = datos_disco['tipo']
             vida_util_total = 60.0  # Valor por defecto
             
-            if tipo_disco in datos.get('metricas_por_tipo', {}):
-                vida_util_total = float(datos['metricas_por_tipo'][tipo_disco]['vida_util_meses'])
+            # Métricas por tipo cacheadas en el artefacto del modelo
+            if tipo_disco in self.metricas_por_tipo:
+                vida_util_total = float(self.metricas_por_tipo[tipo_disco]['vida_util_meses'])
             
             tiempo_uso_actual = float(datos_disco.get('tiempo_uso_meses', 0))
             
@@ -492,6 +737,51 @@ class MLProcessor:
                 "recomendacion": "Monitorear estado del disco regularmente"
             }
     
+    def _calcular_vida_util_lote(self, tipos, tiempos_uso, desgastes):
+        """Versión por columnas de _calcular_vida_util para predicciones por lote"""
+        tipos = pd.Series(tipos).astype(str).reset_index(drop=True)
+        tiempo_uso = pd.to_numeric(pd.Series(tiempos_uso), errors='coerce').fillna(0).to_numpy(dtype=float)
+        desgastes = np.asarray(desgastes, dtype=float)
+        
+        vida_por_tipo = {
+            tipo: float(metricas.get('vida_util_meses', 60.0))
+            for tipo, metricas in self.metricas_por_tipo.items()
+        }
+        vida_util_total = tipos.map(vida_por_tipo).fillna(60.0).to_numpy(dtype=float)
+        
+        con_tasa = (desgastes > 0) & (tiempo_uso > 0)
+        tasa = np.divide(desgastes, tiempo_uso, out=np.ones_like(desgastes), where=con_tasa)
+        meses_restantes = np.where(
+            con_tasa,
+            (100.0 - desgastes) / tasa,
+            vida_util_total - tiempo_uso
+        )
+        meses_restantes = np.maximum(0.0, np.round(meses_restantes, 1))
+        
+        riesgo = np.select(
+            [meses_restantes > 24, meses_restantes > 12, meses_restantes > 6],
+            ["Bajo", "Moderado", "Alto"],
+            default="Crítico"
+        ).astype(object)
+        
+        # Generar cada recomendación una sola vez por combinación (riesgo, tipo)
+        combinaciones = pd.Series(list(zip(riesgo, tipos)))
+        recomendacion = combinaciones.map({
+            combinacion: self._generar_recomendacion(*combinacion)
+            for combinacion in set(combinaciones)
+        }).to_numpy(dtype=object)
+        
+        inminente = desgastes >= 100
+        meses_restantes[inminente] = 0.0
+        riesgo[inminente] = "Inminente"
+        recomendacion[inminente] = "Reemplazar inmediatamente"
+        
+        return pd.DataFrame({
+            "meses_restantes": meses_restantes,
+            "riesgo": riesgo,
+            "recomendacion": recomendacion
+        })
+    
     def _generar_recomendacion(self, riesgo, tipo_disco):
         """Generar recomendación basada en el riesgo"""
         recomendaciones = {
@@ -504,89 +794,44 @@ class MLProcessor:
         return recomendaciones.get(riesgo, "Monitorear estado del disco.")
     
     def analizar_tendencias_desgaste(self):
-        """Analizar tendencias de desgaste por tipo de disco - VERSIÓN SEGURA"""
+        """Analizar tendencias de desgaste por tipo, marca y banda de desgaste"""
         try:
             print("📊 Iniciando análisis de tendencias...")
-            df, datos = self.cargar_y_limpiar_datos()
-            
-            if df.empty:
-                return {"error": "No hay datos disponibles para análisis"}
-            
-            print(f"📈 Dataset para análisis: {len(df)} registros")
-            
-            # 1. Desgaste por tipo - con manejo de errores
-            desgaste_por_tipo = {}
-            for tipo in df['tipo'].unique():
-                try:
-                    tipo_str = str(tipo)
-                    tipo_data = df[df['tipo'] == tipo]['porcentaje_desgaste']
-                    
-                    if len(tipo_data) > 0:
-                        desgaste_por_tipo[tipo_str] = {
-                            'mean': float(tipo_data.mean()),
-                            'std': float(tipo_data.std() if len(tipo_data) > 1 else 0),
-                            'count': int(tipo_data.count()),
-                            'max': float(tipo_data.max())
-                        }
-                except Exception as e:
-                    print(f"⚠️ Error procesando tipo {tipo}: {e}")
-                    continue
-            
-            # 2. Correlaciones - con valores por defecto
-            correlaciones = {}
-            numeric_cols = ['capacidad_gb', 'tiempo_uso_meses', 'horas_encendido', 
-                           'ciclos_escritura', 'temperatura_promedio', 'bad_sectors']
-            
-            for col in numeric_cols:
-                if col in df.columns:
-                    try:
-                        corr_val = df[col].corr(df['porcentaje_desgaste'])
-                        if pd.isna(corr_val) or np.isinf(corr_val):
-                            correlaciones[col] = 0.0
-                        else:
-                            correlaciones[col] = float(round(corr_val, 3))
-                    except:
-                        correlaciones[col] = 0.0
-            
-            # 3. Discos críticos
-            discos_criticos = []
-            try:
-                criticos_df = df[df['porcentaje_desgaste'] > 70]
-                for _, disco in criticos_df.iterrows():
-                    discos_criticos.append({
-                        'id': int(disco.get('id', 0)),
-                        'tipo': str(disco.get('tipo', 'Desconocido')),
-                        'marca': str(disco.get('marca', 'Desconocida')),
-                        'modelo': str(disco.get('modelo', 'Desconocido')),
-                        'porcentaje_desgaste': float(disco['porcentaje_desgaste']),
-                        'estado': str(disco.get('estado', 'Crítico'))
-                    })
-            except Exception as e:
-                print(f"⚠️ Error en discos críticos: {e}")
             
-            # 4. Estadísticas generales
-            try:
-                desgaste_promedio = float(df['porcentaje_desgaste'].mean())
-                discos_riesgo = int(len(df[df['porcentaje_desgaste'] > 60]))
-            except:
-                desgaste_promedio = 0.0
-                discos_riesgo = 0
-            
-            analisis = {
-                "desgaste_por_tipo": desgaste_por_tipo,
-                "correlaciones": correlaciones,
-                "discos_criticos": discos_criticos,
-                "estadisticas_generales": {
-                    "total_discos": int(len(df)),
-                    "desgaste_promedio": desgaste_promedio,
-                    "discos_en_riesgo": discos_riesgo
+            if self.inventario is not None:
+                # Agregados memorizados sobre el inventario columnar compartido
+                inventario = self.inventario
+                if inventario.total() == 0:
+                    return {"error": "No hay datos disponibles para análisis"}
+                
+                analisis = {
+                    "desgaste_por_tipo": inventario.resumen_por('tipo'),
+                    "desgaste_por_marca": inventario.resumen_por('marca'),
+                    "distribucion_por_banda": inventario.distribucion_por_banda(),
+                    "correlaciones": inventario.correlaciones(),
+                    "discos_criticos": inventario.discos_criticos(),
+                    "estadisticas_generales": inventario.estadisticas_generales()
+                }
+            else:
+                df, _ = self.cargar_y_limpiar_datos()
+                
+                if df.empty:
+                    return {"error": "No hay datos disponibles para análisis"}
+                
+                analisis = {
+                    "desgaste_por_tipo": resumen_desgaste(df, 'tipo'),
+                    "desgaste_por_marca": resumen_desgaste(df, 'marca'),
+                    "distribucion_por_banda": distribucion_bandas(df),
+                    "correlaciones": correlaciones_desgaste(df),
+                    "discos_criticos": discos_criticos(df),
+                    "estadisticas_generales": estadisticas_generales(df)
                 }
-            }
             
+            print(f"📈 Dataset para análisis: {analisis['estadisticas_generales']['total_discos']} registros")
             print("✅ Análisis de tendencias completado exitosamente")
             return analisis
             
         except Exception as e:
             error_msg = f"Error en análisis: {str(e)}"
             print(f"❌ {error_msg}")
-            return {"error": error_msg}
\ No newline at end of file
+            return {"error": error_msg}
@@ -0,0 +1,34 @@
+import os
+import sys
+import json
+
+import pytest
+
+# Los módulos del backend se importan por su nombre, como hace api.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def nuevo_disco(**cambios):
+    """Disco válido con los campos de discos_duros.json (sin ID)"""
+    disco = {
+        "marca": "Seagate",
+        "modelo": "Barracuda",
+        "tipo": "HDD",
+        "capacidad_gb": 2000,
+        "horas_uso": 12000,
+        "ciclos_escritura": 3500,
+        "temperatura_promedio": 38,
+        "porcentaje_desgaste": 25,
+        "estado": "Bueno"
+    }
+    disco.update(cambios)
+    return disco
+
+
+@pytest.fixture
+def ruta_datos(tmp_path):
+    """discos_duros.json con tres discos (IDs 1-3) y una sección adicional"""
+    ruta = tmp_path / 'discos_duros.json'
+    discos = [{"id": disco_id, **nuevo_disco()} for disco_id in (1, 2, 3)]
+    ruta.write_text(json.dumps({"discos_duros": discos, "metricas_por_tipo": {"HDD": {}}}), encoding='utf-8')
+    return str(ruta)
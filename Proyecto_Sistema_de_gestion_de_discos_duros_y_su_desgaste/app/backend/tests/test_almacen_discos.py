@@ -0,0 +1,75 @@
+import json
+
+from conftest import nuevo_disco
+from almacen_discos import AlmacenDiscos
+
+
+def leer_json(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_el_diario_se_reproduce_al_reabrir(ruta_datos):
+    almacen = AlmacenDiscos(ruta_datos)
+    agregado = almacen.agregar(nuevo_disco(marca="WD"))
+    almacen.actualizar(2, {"porcentaje_desgaste": 85, "id": 99})
+    almacen.eliminar(1)
+
+    # Sin compactar: el JSON no cambia, las operaciones están en el diario
+    assert [disco['id'] for disco in leer_json(ruta_datos)['discos_duros']] == [1, 2, 3]
+
+    reabierto = AlmacenDiscos(ruta_datos)
+    assert [disco['id'] for disco in reabierto.iterar()] == [2, 3, agregado['id']]
+    assert reabierto.obtener(agregado['id'])['marca'] == "WD"
+    assert reabierto.obtener(2)['porcentaje_desgaste'] == 85
+    assert reabierto.obtener(2)['estado'] == "Crítico"
+    assert reabierto.obtener(1) is None
+    assert reabierto.metadatos() == {"metricas_por_tipo": {"HDD": {}}}
+
+
+def test_linea_incompleta_del_diario_se_ignora(ruta_datos):
+    almacen = AlmacenDiscos(ruta_datos)
+    almacen.agregar(nuevo_disco())
+    with open(almacen.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "agregar", "disco": {"id": 9')
+
+    assert AlmacenDiscos(ruta_datos).total() == 4
+
+
+def test_compacta_al_llegar_al_umbral(ruta_datos):
+    almacen = AlmacenDiscos(ruta_datos, umbral_compactacion=3)
+    for _ in range(3):
+        almacen.agregar(nuevo_disco())
+
+    assert len(leer_json(ruta_datos)['discos_duros']) == 6
+    assert leer_json(ruta_datos)['metricas_por_tipo'] == {"HDD": {}}
+    assert AlmacenDiscos(ruta_datos).total() == 6
+
+
+def test_ids_no_se_reutilizan_tras_reiniciar(ruta_datos):
+    almacen = AlmacenDiscos(ruta_datos)
+    almacen.agregar(nuevo_disco())
+    almacen.eliminar(4)
+    almacen.eliminar(3)
+    # Solo con el diario
+    assert AlmacenDiscos(ruta_datos).agregar(nuevo_disco())['id'] == 5
+
+    # Tras compactar, el diario conserva solo el contador
+    almacen = AlmacenDiscos(ruta_datos)
+    almacen.eliminar(5)
+    almacen.compactar()
+    with open(almacen.journal_path, encoding='utf-8') as f:
+        assert [json.loads(linea) for linea in f] == [{"op": "siguiente_id", "valor": 6}]
+    assert AlmacenDiscos(ruta_datos).agregar(nuevo_disco())['id'] == 6
+
+
+def test_pagina_por_cursor(ruta_datos):
+    almacen = AlmacenDiscos(ruta_datos)
+    almacen.agregar(nuevo_disco(tipo="SSD"))
+    almacen.eliminar(2)
+
+    discos, cursor = almacen.pagina(limite=2)
+    assert [disco['id'] for disco in discos] == [1, 3]
+    discos, cursor = almacen.pagina(cursor, limite=2)
+    assert ([disco['id'] for disco in discos], cursor) == ([4], None)
+    assert [disco['id'] for disco in almacen.pagina(filtro=lambda d: d['tipo'] == "SSD")[0]] == [4]
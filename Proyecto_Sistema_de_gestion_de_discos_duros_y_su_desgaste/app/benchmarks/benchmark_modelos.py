@@ -0,0 +1,212 @@
+"""
+Benchmark de los modelos candidatos para predecir el desgaste.
+
+Para inventarios sintéticos de 1k a 1M de discos mide, por cada modelo de
+`modelos_candidatos()` (los mismos que compara `entrenar_modelo_prediccion`):
+  - tiempo de entrenamiento y memoria residente (RSS) pico del fit, medida en
+    un proceso nuevo por modelo para incluir los buffers de numpy/sklearn
+  - tamaño del modelo serializado con joblib
+  - latencia de predicción de un disco (p50/p95/p99) y de un lote
+  - R² y MAE sobre un conjunto de prueba
+
+Con --slo-p99-ms se marca qué modelos cumplen el SLO de latencia y se
+recomienda el de mejor R² entre ellos (no solo el de mejor R²). Los
+resultados se guardan siempre en JSON (por defecto en
+benchmarks/resultados_modelos.json).
+
+Uso:
+    python benchmarks/benchmark_modelos.py
+    python benchmarks/benchmark_modelos.py --tamanos 1000 100000 --slo-p99-ms 5 --salida modelos.json
+"""
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_absolute_error, r2_score
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+sys.path.append(os.path.join(os.path.dirname(current_dir), 'backend'))
+
+from inventario_sintetico import generar_datos
+from ml_processor import MLProcessor, modelos_candidatos
+
+TAMANOS = [1_000, 10_000, 100_000, 1_000_000]
+SALIDA = os.path.join(current_dir, 'resultados_modelos.json')
+
+
+def preparar_datos(n, directorio):
+    """Características y objetivo con la misma limpieza y codificación que la API"""
+    data_path = os.path.join(directorio, f"discos_{n}.json")
+    with open(data_path, 'w', encoding='utf-8') as f:
+        json.dump(generar_datos(n), f, ensure_ascii=False)
+
+    procesador = MLProcessor(data_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df, _ = procesador.cargar_y_limpiar_datos()
+    os.remove(data_path)
+
+    X = df[procesador.features].fillna(0).to_numpy(dtype=float)
+    y = df['porcentaje_desgaste'].to_numpy(dtype=float)
+    return X, y
+
+
+def percentiles_ms(tiempos):
+    tiempos = np.asarray(tiempos) * 1000
+    return {
+        "p50": round(float(np.percentile(tiempos, 50)), 4),
+        "p95": round(float(np.percentile(tiempos, 95)), 4),
+        "p99": round(float(np.percentile(tiempos, 99)), 4)
+    }
+
+
+def rss_pico_mb():
+    """Memoria residente pico del proceso en MB (ru_maxrss: KB en Linux, bytes en macOS)"""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 ** 2 if sys.platform == 'darwin' else pico / 1024
+
+
+def medir_modelo(nombre, modelo, datos, muestras_individuales, tamano_lote):
+    X_train, X_test, y_train, y_test = datos
+
+    # El escalador forma parte del camino de predicción igual que en la API
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+
+    # Pico de RSS: incluye los buffers de numpy/sklearn fuera del heap de Python
+    rss_antes = rss_pico_mb()
+    inicio = time.perf_counter()
+    modelo.fit(X_train_scaled, y_train)
+    fit_s = time.perf_counter() - inicio
+    rss_despues = rss_pico_mb()
+
+    y_pred = modelo.predict(scaler.transform(X_test))
+
+    buffer = io.BytesIO()
+    joblib.dump(modelo, buffer)
+
+    # Latencia de un disco: una fila por llamada, como /api/ml/prediccion
+    filas = X_test[:muestras_individuales]
+    modelo.predict(scaler.transform(filas[:1]))
+    tiempos = []
+    for i in range(len(filas)):
+        inicio = time.perf_counter()
+        modelo.predict(scaler.transform(filas[i:i + 1]))
+        tiempos.append(time.perf_counter() - inicio)
+
+    # Lote: una llamada vectorizada, como /api/ml/prediccion/lote
+    lote = np.resize(X_test, (tamano_lote, X_test.shape[1]))
+    tiempos_lote = []
+    for _ in range(5):
+        inicio = time.perf_counter()
+        modelo.predict(scaler.transform(lote))
+        tiempos_lote.append(time.perf_counter() - inicio)
+    lote_s = float(np.median(tiempos_lote))
+
+    return {
+        "modelo": nombre,
+        "fit_s": round(fit_s, 4),
+        "memoria_pico_fit_mb": round(rss_despues - rss_antes, 2),
+        "rss_pico_mb": round(rss_despues, 2),
+        "tamano_modelo_kb": round(len(buffer.getvalue()) / 1024, 2),
+        "prediccion_individual_ms": percentiles_ms(tiempos),
+        "prediccion_lote_ms": round(lote_s * 1000, 3),
+        "tamano_lote": tamano_lote,
+        "predicciones_por_segundo_lote": int(tamano_lote / lote_s) if lote_s > 0 else None,
+        "r2": round(float(r2_score(y_test, y_pred)), 4),
+        "mae": round(float(mean_absolute_error(y_test, y_pred)), 3)
+    }
+
+
+def ejecutar(n, directorio, args):
+    X, y = preparar_datos(n, directorio)
+    datos = train_test_split(X, y, test_size=0.2, random_state=42, shuffle=True)
+
+    resultados = []
+    for nombre, modelo in modelos_candidatos().items():
+        # Un proceso nuevo por modelo: el pico de RSS de uno no oculta el del siguiente
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('fork')) as pool:
+            r = pool.submit(medir_modelo, nombre, modelo, datos, args.muestras, args.lote).result()
+        r["discos"] = n
+        if args.slo_p99_ms is not None:
+            r["cumple_slo"] = r["prediccion_individual_ms"]["p99"] <= args.slo_p99_ms
+        resultados.append(r)
+    return resultados
+
+
+def recomendar(resultados):
+    """Mejor R² entre los modelos que cumplen el SLO, por tamaño de inventario"""
+    recomendaciones = {}
+    for n in sorted({r["discos"] for r in resultados}):
+        candidatos = [r for r in resultados if r["discos"] == n and r.get("cumple_slo", True)]
+        if candidatos:
+            recomendaciones[str(n)] = max(candidatos, key=lambda r: r["r2"])["modelo"]
+        else:
+            recomendaciones[str(n)] = None
+    return recomendaciones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los modelos de predicción de desgaste")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=TAMANOS,
+                        help="Tamaños de inventario a medir")
+    parser.add_argument('--muestras', type=int, default=500,
+                        help="Predicciones individuales para calcular percentiles")
+    parser.add_argument('--lote', type=int, default=1000,
+                        help="Tamaño del lote de predicción")
+    parser.add_argument('--slo-p99-ms', type=float, default=None,
+                        help="SLO de latencia p99 de una predicción individual (ms)")
+    parser.add_argument('--salida', default=SALIDA, help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    resultados = []
+    print(f"{'discos':>9} {'modelo':>17} {'fit s':>8} {'mem MB':>8} {'KB':>9} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'lote ms':>8} {'R²':>7} {'MAE':>7}")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in args.tamanos:
+            for r in ejecutar(n, directorio, args):
+                resultados.append(r)
+                individual = r["prediccion_individual_ms"]
+                marca_slo = "" if "cumple_slo" not in r else ("  ✅" if r["cumple_slo"] else "  ❌ SLO")
+                print(f"{n:>9} {r['modelo']:>17} {r['fit_s']:>8.3f} {r['memoria_pico_fit_mb']:>8.1f} "
+                      f"{r['tamano_modelo_kb']:>9.1f} {individual['p50']:>8.3f} {individual['p99']:>8.3f} "
+                      f"{r['prediccion_lote_ms']:>8.2f} {r['r2']:>7.3f} {r['mae']:>7.2f}{marca_slo}")
+
+    recomendaciones = recomendar(resultados)
+    for n, modelo in recomendaciones.items():
+        print(f"🎯 {n} discos: {modelo or 'ningún modelo cumple el SLO'}")
+
+    informe = {
+        "entorno": {
+            "python": platform.python_version(),
+            "sklearn": sklearn.__version__,
+            "numpy": np.__version__,
+            "cpus": os.cpu_count(),
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "slo_p99_ms": args.slo_p99_ms,
+        "resultados": resultados,
+        "recomendacion": recomendaciones
+    }
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+    print(f"💾 Resultados guardados en {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
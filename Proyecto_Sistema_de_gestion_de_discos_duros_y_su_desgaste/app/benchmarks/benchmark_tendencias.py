@@ -0,0 +1,103 @@
+"""
+Benchmark del análisis de tendencias de desgaste.
+
+Compara, para inventarios sintéticos de 100 a 1M de discos:
+  - json_por_solicitud: leer y limpiar el JSON en cada solicitud (sin almacén)
+  - columnar_frio:      construir el inventario columnar y calcular los agregados
+  - columnar_caliente:  agregados memorizados ya calculados
+  - tras_escritura:     una escritura + actualización incremental + agregados
+
+Uso:
+    python benchmarks/benchmark_tendencias.py
+    python benchmarks/benchmark_tendencias.py --tamanos 100 10000 --salida resultados.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import io
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+sys.path.append(os.path.join(os.path.dirname(current_dir), 'backend'))
+
+from inventario_sintetico import generar_datos
+from almacen_discos import AlmacenDiscos
+from inventario_columnar import InventarioColumnar
+from ml_processor import MLProcessor
+
+TAMANOS = [100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def medir(funcion, repeticiones=1):
+    """Tiempo medio en milisegundos de `repeticiones` ejecuciones"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        with contextlib.redirect_stdout(io.StringIO()):
+            funcion()
+    return (time.perf_counter() - inicio) * 1000 / repeticiones
+
+
+def analizar_inventario(inventario):
+    inventario.resumen_por('tipo')
+    inventario.resumen_por('marca')
+    inventario.distribucion_por_banda()
+    inventario.correlaciones()
+    inventario.discos_criticos()
+    inventario.estadisticas_generales()
+
+
+def ejecutar(n, directorio):
+    data_path = os.path.join(directorio, f"discos_{n}.json")
+    with open(data_path, 'w', encoding='utf-8') as f:
+        json.dump(generar_datos(n), f, ensure_ascii=False)
+
+    repeticiones = 5 if n <= 10_000 else 1
+    resultado = {"discos": n}
+
+    procesador = MLProcessor(data_path)
+    resultado["json_por_solicitud_ms"] = medir(procesador.analizar_tendencias_desgaste, repeticiones)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        almacen = AlmacenDiscos(data_path, umbral_compactacion=10 ** 9)
+    inventario = InventarioColumnar(almacen)
+    resultado["columnar_frio_ms"] = medir(lambda: analizar_inventario(inventario))
+    resultado["columnar_caliente_ms"] = medir(lambda: analizar_inventario(inventario), repeticiones)
+
+    def escribir_y_analizar():
+        almacen.actualizar(1, {"porcentaje_desgaste": 50})
+        analizar_inventario(inventario)
+
+    resultado["tras_escritura_ms"] = medir(escribir_y_analizar, repeticiones)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del análisis de tendencias de desgaste")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=TAMANOS,
+                        help="Tamaños de inventario a medir")
+    parser.add_argument('--salida', help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    resultados = []
+    print(f"{'discos':>10} {'json/solicitud':>15} {'columnar frío':>14} "
+          f"{'caliente':>10} {'tras escritura':>15}  (ms)")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in args.tamanos:
+            r = ejecutar(n, directorio)
+            resultados.append(r)
+            print(f"{n:>10} {r['json_por_solicitud_ms']:>15.2f} {r['columnar_frio_ms']:>14.2f} "
+                  f"{r['columnar_caliente_ms']:>10.3f} {r['tras_escritura_ms']:>15.2f}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"💾 Resultados guardados en {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Generación de inventarios sintéticos de discos duros para los benchmarks"""
+import numpy as np
+
+TIPOS = np.array(['SSD', 'HDD', 'NVMe'])
+MARCAS = np.array(['Samsung', 'Western Digital', 'Seagate', 'Crucial', 'Kingston',
+                   'Toshiba', 'WD Black', 'Sabrent', 'ADATA', 'Intel'])
+CAPACIDADES = np.array([250, 500, 1000, 2000, 4000, 8000])
+VIDA_UTIL_MESES = {'SSD': 60, 'HDD': 48, 'NVMe': 72}
+
+
+def generar_discos(n, semilla=42):
+    """Generar `n` discos con la misma estructura que discos_duros.json"""
+    rng = np.random.default_rng(semilla)
+
+    tipos = rng.choice(TIPOS, n)
+    marcas = rng.choice(MARCAS, n)
+    capacidad = rng.choice(CAPACIDADES, n)
+    meses = rng.integers(1, 72, n)
+    horas = (meses * 720 * rng.uniform(0.6, 1.0, n)).astype(int)
+    ciclos = (meses * rng.uniform(200, 1200, n)).astype(int)
+    temperatura = rng.integers(30, 65, n)
+    bad_sectors = rng.poisson(meses / 12.0)
+
+    vida_util = np.vectorize(VIDA_UTIL_MESES.get)(tipos)
+    desgaste = np.clip(meses / vida_util * 100 + bad_sectors * 0.5 + rng.normal(0, 5, n), 0, 100).round()
+
+    estados = np.select(
+        [desgaste < 20, desgaste < 40, desgaste < 60, desgaste < 80],
+        ['Excelente', 'Bueno', 'Moderado', 'Alto'],
+        default='Crítico'
+    )
+
+    columnas = zip(tipos.tolist(), marcas.tolist(), capacidad.tolist(), meses.tolist(),
+                   horas.tolist(), ciclos.tolist(), temperatura.tolist(),
+                   bad_sectors.tolist(), desgaste.astype(int).tolist(), estados.tolist())
+    return [
+        {
+            "id": i + 1, "tipo": tipo, "marca": marca, "modelo": f"M{i % 97}",
+            "capacidad_gb": cap, "tiempo_uso_meses": mes, "horas_encendido": hor,
+            "ciclos_escritura": cic, "temperatura_promedio": tem, "bad_sectors": bad,
+            "porcentaje_desgaste": des, "estado": est, "fecha_instalacion": "2023-01-01"
+        }
+        for i, (tipo, marca, cap, mes, hor, cic, tem, bad, des, est) in enumerate(columnas)
+    ]
+
+
+def generar_datos(n, semilla=42):
+    """Estructura completa del JSON del inventario con `n` discos"""
+    return {
+        "discos_duros": generar_discos(n, semilla),
+        "metricas_por_tipo": {
+            tipo: {"vida_util_meses": meses} for tipo, meses in VIDA_UTIL_MESES.items()
+        }
+    }
@@ -165,6 +165,81 @@ async function cargarGrafico(tipo) {
     }
 }
 
+// Cargar todos los gráficos en paralelo (respuesta NDJSON en streaming)
+async function cargarTodosLosGraficos() {
+    const tipos = ['area', 'radar', 'barras', 'pastel'];
+    
+    tipos.forEach(tipo => {
+        const placeholder = document.getElementById(`${tipo}-chart`);
+        placeholder.innerHTML = `
+            <i class="fas fa-spinner"></i>
+            <p>Generando gráfico...</p>
+        `;
+        placeholder.classList.add('loading');
+    });
+    
+    const mostrarGrafico = (data) => {
+        if (!data.success) {
+            throw new Error(data.error || 'Error desconocido del servidor');
+        }
+        
+        const placeholder = document.getElementById(`${data.tipo}-chart`);
+        const img = document.createElement('img');
+        img.src = `data:image/png;base64,${data.image}`;
+        img.alt = `Gráfico de ${data.tipo}`;
+        img.className = 'graphic-image';
+        img.onclick = () => openModal(img.src);
+        
+        placeholder.innerHTML = '';
+        placeholder.appendChild(img);
+        placeholder.classList.remove('loading');
+    };
+    
+    try {
+        const response = await fetch(`${API_BASE_URL}/graficos/todos`);
+        
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let pendiente = '';
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            
+            pendiente += decoder.decode(value, { stream: true });
+            const lineas = pendiente.split('\n');
+            pendiente = lineas.pop();
+            
+            lineas.filter(linea => linea.trim()).forEach(linea => mostrarGrafico(JSON.parse(linea)));
+        }
+        
+        if (pendiente.trim()) {
+            mostrarGrafico(JSON.parse(pendiente));
+        }
+        
+        showNotification('Gráficos generados exitosamente', 'success');
+    } catch (error) {
+        console.error('Error cargando gráficos:', error);
+        tipos.forEach(tipo => {
+            const placeholder = document.getElementById(`${tipo}-chart`);
+            if (placeholder.classList.contains('loading')) {
+                placeholder.innerHTML = `
+                    <div class="error-message">
+                        <i class="fas fa-exclamation-triangle"></i>
+                        <p>Error cargando gráfico: ${error.message}</p>
+                    </div>
+                `;
+                placeholder.classList.remove('loading');
+            }
+        });
+        showNotification(`Error generando gráficos: ${error.message}`, 'error');
+    }
+}
+
 function getSlideIndexByType(tipo) {
     const slideTypes = ['area', 'radar', 'barras', 'pastel'];
     return slideTypes.indexOf(tipo);
@@ -436,14 +511,22 @@ async function entrenarModelo() {
     resultDiv.classList.add('show');
     
     try {
-        const response = await fetch(`${API_BASE_URL}/ml/entrenar`);
+        let data;
         
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
+        // El entrenamiento corre en segundo plano: consultar hasta que haya un modelo publicado
+        for (let intento = 0; intento < 30; intento++) {
+            const response = await fetch(`${API_BASE_URL}/ml/entrenar`);
+            
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            
+            data = await response.json();
+            
+            if (!data.en_curso) break;
+            await new Promise(resolve => setTimeout(resolve, 2000));
         }
         
-        const data = await response.json();
-        
         if (data.success) {
             const result = data.result;
             let featureHTML = '';
@@ -91,6 +91,10 @@ $api_status = call_api('health');
                         <i class="fas fa-chart-pie"></i>
                         Distribución
                     </button>
+                    <button class="control-btn" onclick="cargarTodosLosGraficos()">
+                        <i class="fas fa-layer-group"></i>
+                        Todos los Gráficos
+                    </button>
                 </div>
             </section>
 